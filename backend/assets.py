@@ -0,0 +1,264 @@
+import base64
+import hashlib
+import io
+import mimetypes
+import os
+from collections import OrderedDict
+from urllib.parse import unquote, urlsplit
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Link modunda tekil görsellerin yazıldığı alt klasör
+ASSET_DIR = "assets"
+
+# Yazdırma kalitesi için kutu boyutunun kaç katına kadar piksel tutulacağı
+DEFAULT_SCALE = 2
+
+MODES = ("inline", "link")
+
+# Uzantısız dosyalar için imza tabanlı tür tespiti
+SIGNATURES = (
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF8", "image/gif"),
+    (b"RIFF", "image/webp"),
+    (b"<svg", "image/svg+xml"),
+    (b"<?xml", "image/svg+xml"),
+)
+
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+    "image/svg+xml": ".svg",
+}
+
+# PIL ile yeniden kaydedilebilen (raster) türler
+PIL_FORMATS = {"image/png": "PNG", "image/jpeg": "JPEG", "image/webp": "WEBP"}
+
+
+def detect_mime_type(path, payload):
+    """İçerik imzasından görsel türünü bul; tanınan bir görsel değilse None.
+
+    Uzantı tek başına yeterli sayılmaz (ör. `x.png` adlı metin dosyası
+    gömülmez); SVG'de imza `<?xml` ise içerikte `<svg` etiketi aranır.
+    """
+    head = payload[:16].lstrip()
+    for signature, mime_type in SIGNATURES:
+        if not head.startswith(signature):
+            continue
+        if mime_type == "image/webp" and payload[8:12] != b"WEBP":
+            return None
+        if signature == b"<?xml" and b"<svg" not in payload[:4096]:
+            return None
+        return mime_type
+    if mimetypes.guess_type(path)[0] == "image/svg+xml" and b"<svg" in payload[:4096]:
+        return "image/svg+xml"
+    return None
+
+
+def downscale(payload, mime_type, box, scale=DEFAULT_SCALE):
+    """Görseli `box` (CSS px) boyutunun `scale` katına sığacak şekilde küçült.
+
+    PIL kurulu değilse, tür raster değilse veya görsel zaten küçükse
+    içerik olduğu gibi döner.
+    """
+    image_format = PIL_FORMATS.get(mime_type)
+    if image_format is None or not box:
+        return payload
+    try:
+        from PIL import Image
+    except ImportError:
+        return payload
+
+    width, height = box
+    limit = (max(1, int(width * scale)), max(1, int(height * scale)))
+    with Image.open(io.BytesIO(payload)) as image:
+        if image.width <= limit[0] and image.height <= limit[1]:
+            return payload
+        image.thumbnail(limit)
+        output = io.BytesIO()
+        if image_format == "JPEG":
+            image.convert("RGB").save(output, "JPEG", quality=85, optimize=True)
+        else:
+            image.save(output, image_format, optimize=True)
+
+    resized = output.getvalue()
+    return resized if len(resized) < len(payload) else payload
+
+
+class Asset:
+    """İçerik hash'iyle tanımlanan tekil görsel"""
+
+    __slots__ = ("digest", "payload", "mime_type", "file_name", "src")
+
+    def __init__(self, payload, mime_type, mode):
+        self.digest = hashlib.sha256(payload).hexdigest()
+        self.payload = payload
+        self.mime_type = mime_type
+        self.file_name = self.digest[:32] + EXTENSIONS.get(mime_type, "")
+        if mode == "inline":
+            encoded = base64.b64encode(payload).decode("ascii")
+            self.src = f"data:{mime_type};base64,{encoded}"
+        else:
+            self.src = f"{ASSET_DIR}/{self.file_name}"
+
+    @property
+    def size(self):
+        return len(self.payload) + len(self.src)
+
+
+class AssetCache:
+    """Görsel referanslarını bir kez çözen, içerikle tekilleştiren, byte sınırlı önbellek.
+
+    Referans (dosya yolu + mtime/boyut + kutu) içerik hash'ine eşlenir;
+    aynı logo binlerce faturada kullanılsa da bir kez okunur, küçültülür
+    ve kodlanır. `mode="inline"` görseli data URI olarak gömer,
+    `mode="link"` ise `assets/<hash>` yolunu döndürür ve her tekil görsel
+    `new_assets` ile bir kez yazılmak üzere bildirilir. Toplam byte
+    `max_bytes`'ı aşınca en eski görseller atılır.
+    """
+
+    def __init__(self, mode="inline", base_dir=None, max_bytes=DEFAULT_MAX_BYTES, scale=DEFAULT_SCALE):
+        if mode not in MODES:
+            raise ValueError(f"Bilinmeyen görsel modu: {mode}")
+        self.mode = mode
+        self.base_dir = os.path.realpath(base_dir or os.getcwd())
+        self.max_bytes = max_bytes
+        self.scale = scale
+        self.references = {}
+        self.assets = OrderedDict()
+        self.total_bytes = 0
+        self.pending = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, reference):
+        """Referansı yerel dosya yoluna çevir; yerel değilse veya `base_dir` dışındaysa None.
+
+        Referanslar fatura verisinden geldiği için yol (`file://` dahil)
+        sembolik bağlar çözülerek `base_dir` içinde kalmak zorundadır;
+        `/etc/passwd` veya `../gizli` gibi referanslar çözülmez.
+        """
+        if reference.startswith("data:"):
+            return None
+        url = urlsplit(reference)
+        if url.scheme not in ("", "file") or url.netloc not in ("", "localhost"):
+            return None
+        path = unquote(url.path)
+        if "\0" in path:
+            return None
+        path = os.path.realpath(os.path.join(self.base_dir, path))
+        if os.path.commonpath((self.base_dir, path)) != self.base_dir:
+            return None
+        return path
+
+    def resolve(self, reference, box=None):
+        """Referansı önbellekten çöz; yerel olmayan veya okunamayan referans için None"""
+        path = self.path_for(reference)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        key = (path, stat.st_mtime_ns, stat.st_size, box)
+        digest = self.references.get(key)
+        if digest is not None:
+            asset = self.assets.get(digest)
+            if asset is not None:
+                self.assets.move_to_end(digest)
+                self.hits += 1
+                return asset
+
+        self.misses += 1
+        with open(path, "rb") as file:
+            payload = file.read()
+        mime_type = detect_mime_type(path, payload)
+        if mime_type is None:
+            # Görsel olmayan dosya gömülmez, referans olduğu gibi kalır
+            return None
+        asset = Asset(downscale(payload, mime_type, box, self.scale), mime_type, self.mode)
+
+        self.references[key] = asset.digest
+        if asset.digest not in self.assets:
+            self.assets[asset.digest] = asset
+            self.total_bytes += asset.size
+            if self.mode == "link":
+                self.pending.append(asset)
+            self._evict()
+        return asset
+
+    def src(self, reference, box=None):
+        """`img src` değeri: çözülebilirse önbellekteki görsel, yoksa referansın kendisi"""
+        asset = self.resolve(str(reference), box)
+        return reference if asset is None else asset.src
+
+    def new_assets(self):
+        """Son çağrıdan beri ilk kez görülen görseller: (dosya adı, içerik) listesi"""
+        pending, self.pending = self.pending, []
+        return [(f"{ASSET_DIR}/{asset.file_name}", asset.payload) for asset in pending]
+
+    def _evict(self):
+        """Byte sınırı aşıldıysa en az kullanılan görselleri at"""
+        while self.total_bytes > self.max_bytes and len(self.assets) > 1:
+            digest, asset = self.assets.popitem(last=False)
+            self.total_bytes -= asset.size
+            self.evictions += 1
+        if len(self.references) > 4 * len(self.assets) + 1024:
+            self.references = {key: digest for key, digest in self.references.items() if digest in self.assets}
+
+    def info(self):
+        """Önbellek istatistikleri"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "assets": len(self.assets),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+_caches = {}
+
+
+def get_asset_cache(mode="inline", base_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+    """Process içinde (mod, klasör) başına paylaşılan görsel önbelleği"""
+    key = (mode, os.path.realpath(base_dir or os.getcwd()), max_bytes)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = AssetCache(mode, base_dir, max_bytes)
+    return cache
+
+
+def write_asset_file(output_dir, name, payload):
+    """Görseli klasöre bir kez yaz (varsa dokunma); eş zamanlı yazımlara karşı atomik"""
+    path = os.path.join(output_dir, name)
+    if os.path.exists(path):
+        return False
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as file:
+        file.write(payload)
+    os.replace(temporary, path)
+    return True
+
+
+def prepare_render_options(render_options):
+    """Seri hale getirilebilir render seçeneklerini process içi seçeneklere çevir.
+
+    `{"assets": "inline" | "link", "asset_dir": ...}` anahtarları worker'daki
+    paylaşılan `AssetCache` ile değiştirilir; (seçenekler, önbellek) döner.
+    """
+    options = dict(render_options or {})
+    mode = options.pop("assets", None)
+    asset_dir = options.pop("asset_dir", None)
+    if not mode:
+        return options, None
+    cache = get_asset_cache(mode, asset_dir)
+    options["assets"] = cache
+    return options, cache
@@ -0,0 +1,504 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
+from operator import itemgetter
+
+from assets import prepare_render_options, write_asset_file
+from layout_schema import LayoutError
+from pdf_output import MERGE_PARTS_DIR, get_renderer, merge_pdf_files, pdf_file_name, require_weasyprint
+from profiling import Profiler, activate
+from result_cache import counter_delta, get_result_cache
+from stylesheet import STYLE_MODES
+from template_cache import get_compiled_template
+import profiling
+from totals import apply_totals_chunk
+
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_NAME_PATTERN = "invoice_{index}.html"
+
+
+class RecordError:
+    """Okunamayan JSONL satırı; kaydın yerine geçer ve hatalı kayıt olarak raporlanır"""
+
+    def __init__(self, message):
+        self.message = message
+
+
+def iter_jsonl_records(file_path):
+    """JSONL dosyasındaki kayıtları tek tek oku (boş satırlar atlanır).
+
+    Parse edilemeyen satır çalışmayı durdurmaz; satır numarasını içeren bir
+    `RecordError` olarak döner ve o kayıt hatalı sayılır.
+    """
+    with open(file_path, "r", encoding="utf-8") as file:
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as error:
+                    yield RecordError(f"JSONDecodeError: satır {line_number}: {error}")
+
+
+def iter_chunks(records, chunk_size):
+    """Kayıtları (sıra, kayıt) çiftlerinden oluşan parçalara böl"""
+    iterator = enumerate(records)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def output_file_name(index, record, name_pattern, name_key=None):
+    """Kayıt için çıktı dosya adını oluştur (`name_key` değeri dosya adı olamıyorsa ValueError)"""
+    if name_key and isinstance(record, dict) and record.get(name_key):
+        name = str(record[name_key]).strip()
+        if not name or name in (".", "..") or any(char in name for char in "/\\\0"):
+            raise ValueError(f"Geçersiz dosya adı ({name_key}): {record[name_key]!r}")
+        return name + ".html"
+    return name_pattern.format(index=index)
+
+
+class OutputNames:
+    """Bir çalışmadaki çıktı adlarını kayıt sırasıyla ana process'te atayıp tekilleştirir.
+
+    Daha önce verilmiş bir ad (büyük/küçük harf farkı gözetmeden, Windows
+    dosya sistemindeki gibi) `ad_<sıra>.html` olur; böylece aynı
+    `name_key` değerli kayıtlar birbirinin üzerine yazılmaz. Adı geçersiz
+    kayıt `RecordError` ile değiştirilir ve hatalı sayılır.
+    """
+
+    def __init__(self, name_pattern, name_key=None):
+        self.name_pattern = name_pattern
+        self.name_key = name_key
+        self.used = set()
+
+    def assign(self, chunk):
+        """Parçanın `(sıra, kayıt)` listesini ve `sıra -> ad` sözlüğünü döndür"""
+        assigned = []
+        names = {}
+        for index, record in chunk:
+            if not isinstance(record, RecordError):
+                try:
+                    name = output_file_name(index, record, self.name_pattern, self.name_key)
+                    names[index] = self.unique(name, index)
+                except ValueError as error:
+                    record = RecordError(f"ValueError: {error}")
+            assigned.append((index, record))
+        return assigned, names
+
+    def unique(self, name, index):
+        """Adı ilk kullanımda olduğu gibi, tekrarında kayıt sırasıyla döndür"""
+        if name.casefold() in self.used:
+            stem, extension = os.path.splitext(name)
+            name = f"{stem}_{index}{extension}"
+            suffix = 1
+            while name.casefold() in self.used:
+                name = f"{stem}_{index}_{suffix}{extension}"
+                suffix += 1
+        self.used.add(name.casefold())
+        return name
+
+
+def named_chunks(chunks, name_pattern, name_key=None):
+    """`(parça, adlar)` çiftleri üret.
+
+    Adlar sadece çakışabilecekleri durumda (`name_key` verilmiş veya kalıp
+    `{index}` içermiyor) `OutputNames` ile atanır; aksi halde None'dır ve
+    worker adı sıradan türetir.
+    """
+    if not name_key and "{index" in name_pattern:
+        for chunk in chunks:
+            yield chunk, None
+        return
+    output_names = OutputNames(name_pattern, name_key)
+    for chunk in chunks:
+        yield output_names.assign(chunk)
+
+
+def render_chunk(json_file_path, chunk, output_dir, name_pattern, name_key=None, render_options=None,
+                 output_format="html", merge=False, profile=None, names=None):
+    """Bir parçadaki kayıtları render edip yaz; hatalar kaydı durdurmaz.
+
+    `output_format="pdf"` ile her kayıt PDF olarak yazılır; `merge=True` ise
+    parçanın tüm sayfaları tek bir ara PDF'te toplanır (sonra birleştirilir).
+    `profile` None değilse parça kendi profiliyle çalışır (değer trace
+    bayrağıdır) ve özeti `stats["profile"]` içinde döner. `names` (`sıra ->
+    dosya adı`, bkz. `OutputNames`) verilirse adlar oradan alınır.
+    """
+    if profile is None:
+        return _render_chunk(json_file_path, chunk, output_dir, name_pattern, name_key, render_options,
+                             output_format, merge, names)
+
+    profiler = Profiler(trace=profile)
+    previous = activate(profiler)
+    try:
+        stats = _render_chunk(json_file_path, chunk, output_dir, name_pattern, name_key, render_options,
+                              output_format, merge, names)
+    finally:
+        activate(previous)
+    stats["profile"] = profiler.snapshot()
+    return stats
+
+
+def _render_chunk(json_file_path, chunk, output_dir, name_pattern, name_key, render_options, output_format, merge,
+                  names=None):
+    """`render_chunk` gövdesi"""
+    render_options, asset_cache = prepare_render_options(render_options)
+    warnings = []
+    chunk = prepare_chunk(chunk, render_options.pop("totals", None), warnings)
+    cache_options = render_options.pop("result_cache", None)
+    styles = render_options.pop("styles", "inline")
+    # Sonuç önbelleği sadece görselsiz HTML çıktısında kullanılır (görsel dosyaları değişebilir)
+    result_cache = None
+    if cache_options and asset_cache is None and output_format == "html":
+        result_cache = get_result_cache(**cache_options)
+        cache_before = result_cache.info()
+    compiled = get_compiled_template(json_file_path, styles)
+    renderer = get_renderer(os.path.abspath(output_dir)) if output_format == "pdf" else None
+    started = time.perf_counter()
+
+    rendered = 0
+    pages = 0
+    bytes_out = 0
+    failures = []
+    documents = []
+    for index, record, error in chunk:
+        if error is not None:
+            failures.append((index, error))
+            continue
+        temporary = None
+        try:
+            if names is None:
+                name = output_file_name(index, record, name_pattern, name_key)
+            else:
+                name = names[index]
+            output_path = os.path.join(output_dir, name)
+            # HTML çıktısı geçici dosyaya yazılıp yerine taşınır; önceki çalışmanın dosyası
+            # ancak yeni çıktı tamamlanınca değişir
+            temporary = f"{output_path}.{os.getpid()}.tmp"
+            if result_cache is not None:
+                payload, page_count = result_cache.render_with_pages(compiled, record, **render_options)
+                with open(temporary, "wb") as file:
+                    file.write(payload)
+                os.replace(temporary, output_path)
+                bytes_out += len(payload)
+                pages += page_count
+            elif renderer is None:
+                # Doküman tek string olarak oluşturulmadan dosyaya parça parça yazılır
+                with open(temporary, "w", encoding="utf-8") as file:
+                    page_count = compiled.render_to(file, record, **render_options)
+                    size = file.tell()
+                os.replace(temporary, output_path)
+                bytes_out += size
+                pages += page_count
+            else:
+                html = compiled.render(record, **render_options)
+                with profiling.stage("pdf"):
+                    document = renderer.render(html)
+                    if merge:
+                        documents.append(document)
+                    else:
+                        output_path = pdf_file_name(output_path)
+                        document.write_pdf(output_path)
+                        bytes_out += os.path.getsize(output_path)
+                pages += len(document.pages)
+            rendered += 1
+        except Exception as error:
+            # Yarıda kalan geçici dosya bırakılmaz
+            if temporary is not None and os.path.exists(temporary):
+                os.remove(temporary)
+            failures.append((index, f"{type(error).__name__}: {error}"))
+
+    # Link modunda her tekil görsel klasöre bir kez yazılır
+    if asset_cache is not None:
+        for name, payload in asset_cache.new_assets():
+            if write_asset_file(output_dir, name, payload):
+                bytes_out += len(payload)
+
+    if documents:
+        part_path = os.path.join(output_dir, MERGE_PARTS_DIR, f"part_{chunk[0][0]:09d}.pdf")
+        with profiling.stage("pdf_merge"):
+            renderer.merge(documents, part_path)
+        bytes_out += os.path.getsize(part_path)
+
+    profiling.count("bytes_out", bytes_out)
+    profiling.count("pages", pages)
+
+    stats = {
+        "rendered": rendered,
+        "failed": len(failures),
+        "failures": failures,
+        "warnings": warnings,
+        "pages": pages,
+        "bytes": bytes_out,
+        "seconds": time.perf_counter() - started,
+    }
+    if result_cache is not None:
+        stats["result_cache"] = counter_delta(cache_before, result_cache.info())
+    return stats
+
+
+def prepare_chunk(chunk, totals_options=None, warnings=None):
+    """Parçayı `(sıra, kayıt, hata)` listesine çevir; istenirse toplamları tek geçişte hesapla.
+
+    `RecordError` kayıtları render edilmeden hatalı olarak işaretlenir.
+    Toplamlar hesaplanırken gönderdiği toplamlar tutmayan kayıtlar
+    `warnings` listesine `(sıra, uyarı)` olarak eklenir (render edilirler).
+    """
+    errors = [(index, None, record.message) for index, record in chunk if isinstance(record, RecordError)]
+    if errors:
+        chunk = [(index, record) for index, record in chunk if not isinstance(record, RecordError)]
+    if totals_options:
+        prepared = apply_totals_chunk(chunk, totals_options, warnings)
+    else:
+        prepared = [(index, record, None) for index, record in chunk]
+    if errors:
+        prepared = sorted(prepared + errors, key=itemgetter(0))
+    return prepared
+
+
+def init_worker(json_file_path, pdf_base_url=None, styles="inline"):
+    """Worker başlangıcında şablonu (ve gerekirse PDF render edicisini) bir kez hazırla"""
+    get_compiled_template(json_file_path, styles)
+    if pdf_base_url is not None:
+        get_renderer(pdf_base_url)
+
+
+def render_batch(json_file_path, records, output_dir, workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 name_pattern=DEFAULT_NAME_PATTERN, name_key=None, on_chunk=None, render_options=None,
+                 output_format="html", merge_path=None, profiler=None):
+    """Tek bir şablonla çok sayıda kaydı process havuzunda render et.
+
+    `records` bir liste, generator veya `iter_jsonl_records` olabilir; kayıtlar
+    parça parça dağıtılır ve aynı anda en fazla `workers * 2` parça bekler.
+    Her worker şablonu bir kez derler. `workers=0` aynı process içinde çalışır.
+    Hatalı kayıtlar toplanır, çalışma durmaz. `on_chunk(stats)` her parça
+    bittiğinde çağrılır. `render_options` (ör. `{"paginate": True}`)
+    `CompiledTemplate.render`'a aktarılır; `{"assets": "inline"}` veya
+    `{"assets": "link"}` görselleri worker başına önbellekten çözer;
+    `{"totals": True}` (veya `totals.apply_totals` argümanları içeren bir
+    dict) satır kalemlerinden toplamları parça bazında kolon kolon hesaplar;
+    gönderdiği toplamlar hesaplananlardan farklı olan kayıtlar render edilir
+    ve özetteki `warnings` listesine `(sıra, uyarı)` olarak eklenir.
+    `{"result_cache": {"directory": ..., "compress": True}}` aynı şablon +
+    veri için önceki HTML çıktısını worker'ların paylaştığı önbellekten
+    yazar; özetteki `result_cache` isabet/ıska sayılarını içerir.
+    `{"styles": "classes"}` yazı ve hücre stillerini paylaşılan CSS
+    sınıflarına taşır (daha küçük çıktı). `name_key` ile aynı adı alan
+    kayıtlar `OutputNames` ile tekilleştirilir, geçersiz adlar hatalı
+    kayıt sayılır.
+
+    `output_format="pdf"` her faturayı PDF olarak yazar (weasyprint gerekir);
+    her worker tek bir sıcak `PdfRenderer` kullanır. `merge_path` verilirse
+    tüm faturalar kayıt sırasıyla tek bir çok sayfalı PDF'te birleştirilir.
+
+    `profiler` (`profiling.Profiler`) verilirse her parça worker'da kendi
+    profiliyle çalışır ve aşama süreleri, sayaçlar (ve `trace=True` ise
+    olaylar) bu profilde toplanır.
+    """
+    json_file_path = os.path.abspath(json_file_path)
+    # Şablon worker'lar başlamadan doğrulanır; hatalı şablon `LayoutError` ile hemen reddedilir
+    styles = (render_options or {}).get("styles", "inline")
+    get_compiled_template(json_file_path, styles)
+    os.makedirs(output_dir, exist_ok=True)
+    if merge_path:
+        output_format = "pdf"
+    pdf_base_url = os.path.abspath(output_dir) if output_format == "pdf" else None
+    if pdf_base_url is not None:
+        require_weasyprint()
+    if merge_path:
+        parts_dir = os.path.join(output_dir, MERGE_PARTS_DIR)
+        os.makedirs(parts_dir, exist_ok=True)
+
+    summary = {"rendered": 0, "failed": 0, "failures": [], "warnings": [], "pages": 0, "bytes": 0, "chunks": 0}
+    started = time.perf_counter()
+
+    def collect(stats):
+        summary["rendered"] += stats["rendered"]
+        summary["failed"] += stats["failed"]
+        summary["failures"].extend(stats["failures"])
+        summary["warnings"].extend(stats["warnings"])
+        summary["pages"] += stats["pages"]
+        summary["bytes"] += stats["bytes"]
+        summary["chunks"] += 1
+        if "result_cache" in stats:
+            totals = summary.setdefault("result_cache", {})
+            for name, value in stats["result_cache"].items():
+                totals[name] = totals.get(name, 0) + value
+        if profiler is not None and "profile" in stats:
+            profiler.merge(stats["profile"])
+        if on_chunk:
+            on_chunk(stats)
+
+    chunks = named_chunks(iter_chunks(records, chunk_size), name_pattern, name_key)
+    profile = None if profiler is None else profiler.trace
+
+    if workers == 0:
+        for chunk, names in chunks:
+            collect(render_chunk(json_file_path, chunk, output_dir, name_pattern, name_key, render_options,
+                                 output_format, bool(merge_path), profile, names))
+    else:
+        workers = workers or os.cpu_count() or 1
+
+        def start_pool():
+            return ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(json_file_path, pdf_base_url, styles))
+
+        def submit(pool, chunk, names):
+            return pool.submit(render_chunk, json_file_path, chunk, output_dir, name_pattern, name_key,
+                               render_options, output_format, bool(merge_path), profile, names)
+
+        pool = start_pool()
+        pending = {}
+        try:
+            for chunk, names in chunks:
+                try:
+                    future = submit(pool, chunk, names)
+                except BrokenProcessPool:
+                    # Çöken bir worker havuzu kullanılamaz hale getirir: bekleyen parçalar
+                    # hatalı sayılır, kalan parçalar yeni bir havuzda devam eder
+                    for finished in list(pending):
+                        collect(_chunk_result(finished, pending.pop(finished)))
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = start_pool()
+                    future = submit(pool, chunk, names)
+                pending[future] = chunk
+
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for finished in done:
+                        collect(_chunk_result(finished, pending.pop(finished)))
+
+            for finished in list(pending):
+                collect(_chunk_result(finished, pending.pop(finished)))
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    if merge_path:
+        # Parça adları ilk kaydın sırasını içerir; ad sırası kayıt sırasıdır
+        parts = sorted(os.listdir(parts_dir))
+        if parts:
+            merge_pdf_files([os.path.join(parts_dir, name) for name in parts], merge_path)
+        os.rmdir(parts_dir)
+
+    summary["seconds"] = time.perf_counter() - started
+    summary["per_second"] = summary["rendered"] / summary["seconds"] if summary["seconds"] else 0.0
+    summary["pages_per_second"] = summary["pages"] / summary["seconds"] if summary["seconds"] else 0.0
+    summary["failures"].sort()
+    summary["warnings"].sort()
+    return summary
+
+
+def _chunk_result(future, chunk):
+    """Parça sonucunu al; worker tamamen çökerse (`BrokenProcessPool` dahil) tüm parçayı hatalı say"""
+    try:
+        return future.result()
+    except Exception as error:
+        message = f"{type(error).__name__}: {error}"
+        return {
+            "rendered": 0,
+            "failed": len(chunk),
+            "failures": [(index, message) for index, _ in chunk],
+            "warnings": [],
+            "pages": 0,
+            "bytes": 0,
+            "seconds": 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL kayıtlarını tek bir şablonla toplu render et")
+    parser.add_argument("layout", help="Şablon JSON dosyası (ör. test.json)")
+    parser.add_argument("records", help="Her satırı bir fatura verisi olan JSONL dosyası")
+    parser.add_argument("-o", "--output-dir", default="batch_output", help="Çıktı klasörü")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Process sayısı (0: aynı process)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Parça başına kayıt sayısı")
+    parser.add_argument("--name-pattern", default=DEFAULT_NAME_PATTERN, help="Dosya adı kalıbı ({index})")
+    parser.add_argument("--name-key", default=None, help="Dosya adı olarak kullanılacak kayıt alanı")
+    parser.add_argument("--paginate", action="store_true", help="Taşan tabloları birden çok sayfaya böl")
+    parser.add_argument("--assets", choices=["inline", "link"], default=None,
+                        help="Görselleri data URI olarak göm veya assets/ altında tek kopya tut")
+    parser.add_argument("--totals", nargs="?", const="{}", default=None,
+                        help="Toplamları satır kalemlerinden hesapla (isteğe bağlı JSON seçenekler)")
+    parser.add_argument("--result-cache", default=None, metavar="KLASÖR",
+                        help="Aynı şablon + veri için önceki HTML çıktısını bu klasördeki önbellekten kullan")
+    parser.add_argument("--cache-size", type=int, default=1024, help="Sonuç önbelleği disk sınırı (MB)")
+    parser.add_argument("--compress-cache", action="store_true", help="Sonuç önbelleğini gzip ile sakla")
+    parser.add_argument("--styles", choices=STYLE_MODES, default="inline",
+                        help="classes: tekrar eden stilleri <style> içindeki sınıflarda topla")
+    parser.add_argument("--pdf", action="store_true", help="Her faturayı PDF olarak yaz (weasyprint gerekir)")
+    parser.add_argument("--merge", default=None, help="Tüm faturaları bu tek PDF dosyasında birleştir")
+    parser.add_argument("--profile", action="store_true", help="Aşama sürelerini ve sayaçları raporla")
+    parser.add_argument("--trace", default=None, help="Chrome-trace/speedscope JSON dosyası yaz (--profile içerir)")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Parça bazlı ilerlemeyi yazma")
+    args = parser.parse_args()
+
+    def report(stats):
+        rate = stats["rendered"] / stats["seconds"] if stats["seconds"] else 0.0
+        page_rate = stats["pages"] / stats["seconds"] if stats["seconds"] else 0.0
+        print(f"parça: {stats['rendered']} render, {stats['failed']} hata, {rate:.0f} fatura/sn, {page_rate:.1f} sayfa/sn")
+
+    profiler = Profiler(trace=bool(args.trace)) if args.profile or args.trace else None
+
+    try:
+        summary = render_batch(
+            args.layout,
+            iter_jsonl_records(args.records),
+            args.output_dir,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            name_pattern=args.name_pattern,
+            name_key=args.name_key,
+            on_chunk=None if args.quiet else report,
+            render_options={
+                "paginate": args.paginate,
+                "assets": args.assets,
+                "totals": None if args.totals is None else json.loads(args.totals) or True,
+                "result_cache": args.result_cache and {
+                    "directory": args.result_cache,
+                    "max_disk_bytes": args.cache_size * 1024 * 1024,
+                    "compress": args.compress_cache,
+                },
+                "styles": args.styles,
+            },
+            output_format="pdf" if args.pdf else "html",
+            merge_path=args.merge,
+            profiler=profiler,
+        )
+    except (RuntimeError, LayoutError) as error:
+        raise SystemExit(str(error))
+
+    print(
+        f"Toplam: {summary['rendered']} render, {summary['failed']} hata, "
+        f"{summary['seconds']:.2f} sn, {summary['per_second']:.0f} fatura/sn, "
+        f"{summary['pages']} sayfa, {summary['pages_per_second']:.1f} sayfa/sn"
+    )
+    if "result_cache" in summary:
+        cache = summary["result_cache"]
+        hits = cache["memory_hits"] + cache["disk_hits"]
+        lookups = hits + cache["misses"]
+        print(f"Sonuç önbelleği: {hits}/{lookups} isabet (%{hits / lookups * 100 if lookups else 0:.1f}; "
+              f"bellek {cache['memory_hits']}, disk {cache['disk_hits']}), {cache['disk_evictions']} silinen")
+    for index, message in summary["failures"][:20]:
+        print(f"  kayıt {index}: {message}")
+    if summary["warnings"]:
+        print(f"Toplam uyuşmazlığı: {len(summary['warnings'])} kayıt")
+        for index, message in summary["warnings"][:20]:
+            print(f"  kayıt {index}: {message}")
+
+    if profiler is not None:
+        print()
+        print(profiler.report())
+        if args.trace:
+            profiler.write_trace(args.trace)
+            print(f"Trace yazıldı: {args.trace} ({len(profiler.events)} olay)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,965 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import timeit
+import tracemalloc
+
+LAYOUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test.json")
+TOOL_KEYS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "frontend", "src", "templates", "data", "tool.json"
+)
+
+# (senaryo, öğe sayısı, tablo sayısı, toplam satır) — `suite` varsayılanları
+SUITE_SCENARIOS = [
+    ("tek_satir", 5, 1, 1),
+    ("orta", 50, 1, 100),
+    ("cok_oge", 500, 0, 0),
+    ("cok_tablo", 100, 5, 10000),
+    ("uzun_tablo", 20, 1, 100000),
+]
+SUITE_PATHS = ("json", "html")
+SUITE_METRICS = ("p50_ms", "p95_ms", "peak_mb")
+TABLE_COLUMNS = ("productName", "quantity", "unitPrice", "vatRate", "totalAmount")
+
+
+def make_rows(count):
+    """Sahte tablo satırları üret"""
+    return [
+        {
+            "productName": f"Ürün {index}",
+            "unitPrice": 10 + index % 90,
+            "vatRate": 0.2,
+            "totalAmount": round((10 + index % 90) * 1.2, 2),
+        }
+        for index in range(count)
+    ]
+
+
+def make_invoice(index, row_count=10):
+    """test.json şablonuna uygun sahte fatura verisi üret"""
+    return {
+        "invoiceName": f"INV-{index:06d}",
+        "image": "./image.png",
+        "table": make_rows(row_count),
+        "totalVat": 25,
+        "total": 165,
+    }
+
+
+def write_jsonl(path, count, row_count=10):
+    """Sahte faturaları JSONL dosyasına satır satır yaz"""
+    with open(path, "w", encoding="utf-8") as file:
+        for index in range(count):
+            file.write(json.dumps(make_invoice(index, row_count), ensure_ascii=False))
+            file.write("\n")
+
+
+def bench_stream(sizes, output_format):
+    """Akış modunda farklı giriş boyutları için süre ve tepe bellek ölç"""
+    from batch_process import iter_jsonl_records
+    from output_writers import open_writer
+    from stream_process import stream_render
+
+    print(f"{'kayıt':>10} {'giriş MB':>10} {'süre sn':>10} {'fatura/sn':>10} {'tepe bellek MB':>15}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            input_path = os.path.join(workdir, f"records_{size}.jsonl")
+            write_jsonl(input_path, size)
+            target = os.path.join(workdir, f"out_{size}{output_format}")
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            with open_writer(target) as writer:
+                summary = stream_render(LAYOUT_PATH, iter_jsonl_records(input_path), writer, workers=0)
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            input_mb = os.path.getsize(input_path) / 1e6
+            print(
+                f"{size:>10} {input_mb:>10.1f} {elapsed:>10.2f} "
+                f"{summary['rendered'] / elapsed:>10.0f} {peak / 1e6:>15.2f}"
+            )
+            os.remove(input_path)
+
+
+def bench_rows(sizes):
+    """JSON ve HTML akışlarında tablo satır sayısına göre render süresi"""
+    from html_process import process_html
+    from json_process import generate_html_template_only, load_json_content
+    from template_cache import compile_template
+
+    json_data = load_json_content(LAYOUT_PATH)
+    compiled = compile_template(json_data)
+    html_template = generate_html_template_only(json_data)
+
+    print(f"{'satır':>10} {'json sn':>10} {'json µs/satır':>14} {'html sn':>10} {'html µs/satır':>14}")
+    for size in sizes:
+        data = make_invoice(0, size)
+
+        started = time.perf_counter()
+        compiled.render(data)
+        json_elapsed = time.perf_counter() - started
+
+        started = time.perf_counter()
+        process_html(html_template, data)
+        html_elapsed = time.perf_counter() - started
+
+        print(
+            f"{size:>10} {json_elapsed:>10.3f} {json_elapsed / size * 1e6:>14.2f} "
+            f"{html_elapsed:>10.3f} {html_elapsed / size * 1e6:>14.2f}"
+        )
+
+
+def render_memory(mode, row_count, output_path):
+    """Yeni bir process'te tek bir faturayı `mode` yoluyla dosyaya yaz; süre ve bellek ölç.
+
+    `bs4`: eski zincir (string birleştirme + parse + `str(soup)`), `string`:
+    `CompiledTemplate.render` + tek `write`, `stream`: `process_json_to_html(...,
+    stream=True)` (`render_to` ile parça parça yazım). Veri ve şablon ölçümden önce hazırlanır.
+    """
+    from json_process import (
+        adjust_elements_after_table_processing,
+        generate_html_from_json,
+        load_json_content,
+        process_json_to_html,
+    )
+    from template_cache import get_compiled_template
+
+    json_data = load_json_content(LAYOUT_PATH)
+    compiled = get_compiled_template(LAYOUT_PATH)
+    data = make_invoice(0, row_count)
+
+    def run():
+        if mode == "bs4":
+            from bs4 import BeautifulSoup
+
+            soup = BeautifulSoup(generate_html_from_json(json_data, data), "html.parser")
+            adjust_elements_after_table_processing(soup, json_data, data)
+            with open(output_path, "w", encoding="utf-8") as file:
+                file.write(str(soup))
+        elif mode == "string":
+            with open(output_path, "w", encoding="utf-8") as file:
+                file.write(compiled.render(data))
+        else:
+            process_json_to_html(LAYOUT_PATH, data, output_path, stream=True)
+
+    try:
+        import resource
+    except ImportError:
+        # Windows: RSS ölçülemez, sadece tracemalloc
+        resource = None
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+    started = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else None
+
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "seconds": elapsed,
+        # ru_maxrss Linux'ta KB cinsindendir
+        "rss_growth_mb": None if resource is None else (rss_after - rss_before) / 1024,
+        "peak_mb": peak / 1e6,
+        "output_mb": os.path.getsize(output_path) / 1e6,
+    }
+
+
+def bench_memory(row_count, modes):
+    """Büyük bir fatura için yazım yollarının tepe RSS ve Python bellek kullanımını karşılaştır"""
+    import multiprocessing
+
+    # Her ölçüm temiz bir process'te: ru_maxrss process ömrü boyunca sadece artar
+    context = multiprocessing.get_context("spawn")
+    print(f"{row_count} satırlı fatura")
+    print(f"{'yol':>8} {'sn':>8} {'RSS artışı MB':>14} {'tepe MB':>9} {'çıktı MB':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode in modes:
+            with context.Pool(1) as pool:
+                result = pool.apply(render_memory, (mode, row_count, os.path.join(workdir, f"{mode}.html")))
+            rss = "-" if result["rss_growth_mb"] is None else f"{result['rss_growth_mb']:.1f}"
+            print(f"{mode:>8} {result['seconds']:>8.2f} {rss:>14} {result['peak_mb']:>9.1f} {result['output_mb']:>9.1f}")
+
+
+def bench_cache(sizes, repeat):
+    """Render ile sonuç önbelleğinin bellek ve disk (düz/gzip) isabetlerini karşılaştır"""
+    from json_process import load_json_content
+    from result_cache import ResultCache
+    from template_cache import compile_template
+
+    compiled = compile_template(load_json_content(LAYOUT_PATH))
+
+    def measure(function):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - started) / repeat * 1e6
+
+    print(f"{'satır':>8} {'render µs':>10} {'bellek µs':>10} {'disk µs':>10} {'gzip µs':>10} {'gzip oranı':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            data = make_invoice(0, size)
+            memory = ResultCache()
+            memory.render(compiled, data)
+            row = [measure(lambda: compiled.render(data)), measure(lambda: memory.render(compiled, data))]
+            for compress in (False, True):
+                directory = os.path.join(workdir, f"{size}_{compress}")
+                ResultCache(directory, compress=compress).render(compiled, data)
+                # Bellek katmanı kapalı: her okuma diskten
+                disk = ResultCache(directory, max_memory_bytes=0, compress=compress)
+                row.append(measure(lambda: disk.render(compiled, data)))
+            stored = sum(entry.stat().st_size for shard in os.scandir(directory) for entry in os.scandir(shard.path))
+            ratio = len(compiled.render(data).encode("utf-8")) / stored
+            print(f"{size:>8} " + " ".join(f"{value:>10.0f}" for value in row) + f" {ratio:>10.1f}x")
+
+
+def bench_incremental(row_count, repeat):
+    """Tek alanı değişen fatura için tam render ile artımlı render'ı karşılaştır"""
+    from incremental import IncrementalRenderer
+    from json_process import load_json_content
+    from template_cache import compile_template
+
+    compiled = compile_template(load_json_content(LAYOUT_PATH))
+    data = make_invoice(0, row_count)
+    cases = [
+        ("tam render", compiled.render),
+        ("artımlı", IncrementalRenderer(compiled).render),
+    ]
+
+    print(f"{row_count} satırlı tablo, her turda sadece `invoiceName` değişiyor")
+    print(f"{'yöntem':>12} {'µs/render':>10}")
+    for name, render in cases:
+        render(data)
+        started = time.perf_counter()
+        for index in range(repeat):
+            render(dict(data, invoiceName=f"INV-{index}"))
+        print(f"{name:>12} {(time.perf_counter() - started) / repeat * 1e6:>10.0f}")
+
+
+def bench_escape(row_count, repeat, max_overhead):
+    """Tablo hücre kaçışının maliyetini render süresine oranla ölç.
+
+    Kaçış adımı (kolon bazlı toplu kaçış ve karşılaştırma için hücre başına
+    `html.escape`) aynı string kolonlar üzerinde ayrı ölçülür; uçtan uca
+    fark tek çekirdekli makinelerde gürültüde kaybolduğundan oran kaçışsız
+    render süresine göre hesaplanır. Toplu kaçışın oranı `max_overhead`'i
+    aşarsa 1 ile çıkar.
+    """
+    import html
+
+    from json_process import load_json_content
+    from row_renderer import RowRenderer
+    from template_cache import compile_template
+
+    compiled = compile_template(load_json_content(LAYOUT_PATH))
+    data = make_invoice(0, row_count)
+    table_items = [item for item in compiled.items if item[1] == "table"]
+    row_renderer = table_items[0][5]
+    columns = RowRenderer(row_renderer.headers).columns(data[compiled.page_items[table_items[0][0]]["value"]])
+
+    unescaped = compile_template(load_json_content(LAYOUT_PATH))
+    unescaped.items = [
+        (*item[:5], RowRenderer(item[5].headers, item[5].cell_prefixes)) if item[1] == "table" else item
+        for item in unescaped.items
+    ]
+
+    def best(run):
+        return min(timeit.repeat(run, number=1, repeat=repeat))
+
+    render_time = best(lambda: unescaped.render(data))
+    cases = [
+        ("toplu", best(lambda: [row_renderer.escape_column(column) for column in columns])),
+        ("hücre başına", best(lambda: [[html.escape(value, quote=False) for value in column] for column in columns])),
+    ]
+
+    print(f"{row_count} satırlı tablo, kaçışsız render {render_time * 1e3:.2f} ms ({repeat} turun en iyisi)")
+    print(f"{'kaçış':>14} {'ms/render':>10} {'ek süre':>8}")
+    for name, elapsed in cases:
+        print(f"{name:>14} {elapsed * 1e3:>10.2f} {elapsed / render_time * 100:>7.1f}%")
+
+    overhead = cases[0][1] / render_time
+    if overhead > max_overhead:
+        print(f"Toplu kaçışın ek süresi %{overhead * 100:.1f}, sınır %{max_overhead * 100:.1f}")
+        raise SystemExit(1)
+
+
+def bench_styles(sizes, repeat):
+    """Inline stil ve paylaşılan sınıf modlarında çıktı boyutu ve render süresi"""
+    import gzip
+
+    from json_process import load_json_content
+    from template_cache import compile_template
+
+    json_data = load_json_content(LAYOUT_PATH)
+    modes = [(styles, compile_template(json_data, styles)) for styles in ("inline", "classes")]
+
+    print(f"{'satır':>8} {'mod':>8} {'bayt':>10} {'gzip bayt':>10} {'ms/render':>10}")
+    for size in sizes:
+        data = make_invoice(0, size)
+        for styles, compiled in modes:
+            html = compiled.render(data)
+            elapsed = min(timeit.repeat(lambda: compiled.render(data), number=1, repeat=repeat))
+            compressed = len(gzip.compress(html.encode("utf-8"), compresslevel=6))
+            print(f"{size:>8} {styles:>8} {len(html.encode('utf-8')):>10} {compressed:>10} {elapsed * 1e3:>10.2f}")
+
+
+def bench_writers(count, row_count, shard_mb, lookups):
+    """Çıktı yazıcılarında yazma süresi, dosya sayısı, disk boyutu ve tek fatura okuma süresi"""
+    from json_process import load_json_content
+    from output_writers import ShardIndex, open_writer
+    from template_cache import compile_template
+
+    compiled = compile_template(load_json_content(LAYOUT_PATH))
+    documents = [(f"invoice_{index}.html", compiled.render(make_invoice(index, row_count))) for index in range(count)]
+    shard_size = int(shard_mb * 1024 * 1024)
+    sinks = [
+        ("klasör", "", None, None, "tar"),
+        ("klasör+gzip", "", "gzip", None, "tar"),
+        ("tar shard", "", None, shard_size, "tar"),
+        ("tar shard+gzip", "", "gzip", shard_size, "tar"),
+        ("zip shard+gzip", "", "gzip", shard_size, "zip"),
+        ("bellek+gzip", ":memory:", "gzip", None, "tar"),
+    ]
+
+    print(f"{count} fatura x {row_count} satır")
+    print(f"{'yazıcı':>15} {'sn':>8} {'dosya':>8} {'disk MB':>9} {'okuma µs':>10}")
+    rng = random.Random(0)
+    for label, target, compression, shard, shard_format in sinks:
+        with tempfile.TemporaryDirectory() as workdir:
+            target = target or os.path.join(workdir, "out")
+            started = time.perf_counter()
+            with open_writer(target, compression, shard, shard_format) as writer:
+                for name, html in documents:
+                    writer.write(name, html)
+            elapsed = time.perf_counter() - started
+
+            if target == ":memory:":
+                files, disk = 0, sum(map(len, writer.files.values()))
+            else:
+                paths = [os.path.join(target, name) for name in os.listdir(target)]
+                files, disk = len(paths), sum(map(os.path.getsize, paths))
+
+            read_us = ""
+            if shard:
+                index = ShardIndex(target)
+                names = [rng.choice(documents)[0] for _ in range(lookups)]
+                read_elapsed = min(timeit.repeat(lambda: [index.read(name) for name in names], number=1, repeat=3))
+                read_us = f"{read_elapsed / lookups * 1e6:.1f}"
+            print(f"{label:>15} {elapsed:>8.3f} {files:>8} {disk / 1e6:>9.2f} {read_us:>10}")
+
+
+# `startup` senaryolarında alt process'te çalışan kod: içe aktarma ve ilk render süreleri ölçülür
+STARTUP_SCRIPT = """
+import sys, time
+started = time.perf_counter()
+{imports}
+imported = time.perf_counter()
+{work}
+print(imported - started, time.perf_counter() - imported, "bs4" in sys.modules)
+"""
+
+
+def bench_startup(repeat):
+    """Yeni process'te import süresi ve ilk render'a kadar geçen süre (JSON ve .ctpl şablonla)"""
+    import statistics
+    import sys
+
+    from json_process import load_json_content
+    from template_cache import compile_template, save_precompiled
+
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    data = json.dumps(make_invoice(0, 10))
+    with tempfile.TemporaryDirectory() as workdir:
+        precompiled_path = os.path.join(workdir, "layout.ctpl")
+        save_precompiled(compile_template(load_json_content(LAYOUT_PATH)), precompiled_path)
+        render = "get_compiled_template({path!r}).render(json.loads({data!r}))"
+        scenarios = [
+            ("boş", "", ""),
+            ("import json_process", "import json_process", ""),
+            ("import html_process", "import html_process", ""),
+            ("ilk render (JSON)", "import json\nfrom template_cache import get_compiled_template",
+             render.format(path=LAYOUT_PATH, data=data)),
+            ("ilk render (.ctpl)", "import json\nfrom template_cache import get_compiled_template",
+             render.format(path=precompiled_path, data=data)),
+        ]
+
+        print(f"{'senaryo':>20} {'import ms':>10} {'render ms':>10} {'toplam ms':>10} {'bs4':>5}")
+        for label, imports, work in scenarios:
+            script = STARTUP_SCRIPT.format(imports=imports, work=work)
+            imports_ms, work_ms, totals_ms = [], [], []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                output = subprocess.run(
+                    [sys.executable, "-c", script], cwd=backend_dir, capture_output=True, text=True, check=True
+                ).stdout.split()
+                totals_ms.append((time.perf_counter() - started) * 1e3)
+                imports_ms.append(float(output[0]) * 1e3)
+                work_ms.append(float(output[1]) * 1e3)
+            print(
+                f"{label:>20} {statistics.median(imports_ms):>10.1f} {statistics.median(work_ms):>10.1f} "
+                f"{statistics.median(totals_ms):>10.1f} {'evet' if output[2] == 'True' else 'hayır':>5}"
+            )
+
+
+# `heights` senaryolarında uzun ürün adları bu kelimelerden kurulur
+WRAP_WORDS = "paslanmaz çelik bağlantı elemanı somun vida M8 galvanizli şişe kapağı".split()
+
+
+def bench_heights(row_count, repeat):
+    """Satır yüksekliği ölçümünün maliyeti: kaymayan / kısmen kayan / tamamen kayan tablolarda render ile karşılaştırma"""
+    from json_process import load_json_content
+    from layout_schema import load_layout
+    from pagination import paginate_items
+    from template_cache import compile_template
+
+    json_data = load_json_content(LAYOUT_PATH)
+    compiled = compile_template(json_data)
+    layout = load_layout(json_data)
+    rng = random.Random(0)
+
+    print(f"{row_count} satır")
+    print(f"{'senaryo':>12} {'ölçüm ms':>10} {'render ms':>10} {'kayan':>8} {'sayfa (sabit/ölçülen)':>22}")
+    for label, ratio in (("kaymayan", 0.0), ("%10 kayan", 0.1), ("hepsi kayan", 1.0)):
+        data = make_invoice(0, row_count)
+        for row in data["table"]:
+            if rng.random() < ratio:
+                row["productName"] = " ".join(rng.choice(WRAP_WORDS) for _ in range(rng.randint(4, 12)))
+
+        measure_ms = min(timeit.repeat(lambda: layout.row_heights(data), number=1, repeat=repeat)) * 1e3
+        render_ms = min(timeit.repeat(lambda: compiled.render(data), number=1, repeat=repeat)) * 1e3
+        row_heights = layout.row_heights(data)
+        wrapped = sum(height > 34 for height in row_heights.get("table", ()))
+        row_counts = layout.row_counts(data)
+        fixed_pages = len(paginate_items(layout.page_items, row_counts))
+        measured_pages = len(paginate_items(layout.page_items, row_counts, row_heights=row_heights))
+        print(f"{label:>12} {measure_ms:>10.2f} {render_ms:>10.2f} {wrapped:>8} {f'{fixed_pages}/{measured_pages}':>22}")
+
+
+def default_worker_counts():
+    """`parallel` için seri, 2'nin kuvvetleri ve çekirdek sayısı (tek çekirdekte de 2 process denenir)"""
+    cores = os.cpu_count() or 1
+    counts = [0]
+    workers = 2
+    while workers < cores:
+        counts.append(workers)
+        workers *= 2
+    counts.append(max(cores, 2))
+    return counts
+
+
+def bench_parallel(sizes, worker_counts, repeat):
+    """Tek büyük faturada tablo gövdesinin seri ve process havuzunda paralel üretimi (dosyaya akışla)"""
+    from json_process import load_json_content
+    from parallel_rows import resolve_row_workers
+    from template_cache import compile_template
+
+    compiled = compile_template(load_json_content(LAYOUT_PATH))
+    print(f"{os.cpu_count()} çekirdek")
+    print(f"{'satır':>8} {'process':>8} {'sn':>8} {'hızlanma':>9} {'otomatik':>9}")
+    with tempfile.TemporaryDirectory() as workdir:
+        output_path = os.path.join(workdir, "invoice.html")
+        for size in sizes:
+            data = make_invoice(0, size)
+            auto = resolve_row_workers(size)
+
+            def run(row_workers):
+                with open(output_path, "w", encoding="utf-8") as file:
+                    compiled.render_to(file, data, row_workers=row_workers)
+
+            serial = None
+            for workers in worker_counts:
+                elapsed = min(timeit.repeat(lambda: run(workers), number=1, repeat=repeat))
+                if serial is None:
+                    serial = elapsed
+                chosen = "evet" if resolve_row_workers(size, workers) == auto else ""
+                print(f"{size:>8} {workers:>8} {elapsed:>8.3f} {serial / elapsed:>8.2f}x {chosen:>9}")
+
+
+def bench_totals(invoices, row_count):
+    """Fatura başına toplam hesabı ile tüm faturaların tek kolon geçişini karşılaştır"""
+    from totals import apply_totals, apply_totals_batch
+
+    records = [make_invoice(index, row_count) for index in range(invoices)]
+
+    started = time.perf_counter()
+    single = [apply_totals(record) for record in records]
+    single_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = apply_totals_batch(records)
+    batch_elapsed = time.perf_counter() - started
+
+    lines = invoices * row_count
+    print(f"{invoices} fatura x {row_count} satır, sonuçlar aynı: {single == batch}")
+    print(f"{'yöntem':>14} {'sn':>8} {'µs/satır':>10}")
+    print(f"{'fatura başına':>14} {single_elapsed:>8.3f} {single_elapsed / lines * 1e6:>10.2f}")
+    print(f"{'toplu':>14} {batch_elapsed:>8.3f} {batch_elapsed / lines * 1e6:>10.2f}")
+
+
+def make_layout(item_count, table_count=0, seed=0):
+    """Sentetik şablon: `item_count` öğe, bunların `table_count` tanesi tablo (kalanı metin/veri/görsel)"""
+    rng = random.Random(seed)
+    kinds = ["table"] * table_count + [
+        "image" if index % 10 == 9 else rng.choice(("text", "data", "data"))
+        for index in range(item_count - table_count)
+    ]
+    rng.shuffle(kinds)
+
+    items = []
+    column = 0
+    y = 10
+    for index, kind in enumerate(kinds):
+        item = {
+            "id": f"item-{index}",
+            "type": kind,
+            "fontFamily": "sans",
+            "fontSize": rng.choice((10, 12, 14)),
+            "textAlign": rng.choice(("left", "center", "right")),
+            "fontWeight": "normal",
+            "fontStyle": "normal",
+            "textDecoration": "none",
+        }
+        if kind == "table":
+            if column:
+                column, y = 0, y + 40
+            item.update(label=f"Tablo {index}", value=f"table{index}",
+                        position={"x": 10, "y": y}, size={"width": 768, "height": 150})
+            item["dataColumns"] = [
+                {"label": name, "value": name, "width": 150, "textAlign": "left"} for name in TABLE_COLUMNS
+            ]
+            y += 160
+            items.append(item)
+            continue
+
+        if kind == "data":
+            # İç içe anahtar: group2.section1.field17
+            value = f"group{index % 7}.section{index % 3}.field{index}"
+        elif kind == "image":
+            value = f"image{index}"
+        else:
+            value = f"Etiket {index}"
+        item.update(label=value, value=value, position={"x": 10 + column * 190, "y": y},
+                    size={"width": 180, "height": 32})
+        items.append(item)
+        column = (column + 1) % 4
+        if not column:
+            y += 40
+
+    return {"pageItems": items, "exportDate": "2024-01-01T00:00:00.000Z", "pageSize": "A4"}
+
+
+def make_layout_data(layout, line_count, seed=0):
+    """Şablondaki anahtarlara uygun veri; `line_count` satır tablolara eşit dağıtılır"""
+    rng = random.Random(seed)
+    data = {}
+    tables = []
+    for item in layout["pageItems"]:
+        if item["type"] == "data":
+            *groups, field = item["value"].split(".")
+            target = data
+            for group in groups:
+                target = target.setdefault(group, {})
+            target[field] = f"Değer {rng.randrange(10 ** 6)}"
+        elif item["type"] == "image":
+            data[item["value"]] = "./image.png"
+        elif item["type"] == "table":
+            tables.append(item["value"])
+
+    for position, key in enumerate(tables):
+        share = line_count // len(tables) + (position < line_count % len(tables))
+        rows = []
+        for index in range(share):
+            quantity = rng.randint(1, 20)
+            price = rng.randint(100, 100000) / 100
+            rows.append({
+                "productName": f"Ürün {index}",
+                "quantity": quantity,
+                "unitPrice": price,
+                "vatRate": rng.choice((0.01, 0.1, 0.2)),
+                "totalAmount": round(quantity * price, 2),
+            })
+        data[key] = rows
+    return data
+
+
+def percentile(values, ratio):
+    """Sıralı listede yüzdelik değer"""
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+def measure_case(render, budget, min_repeat=3, max_repeat=1000):
+    """Isınmadan sonra süre bütçesi dolana kadar render et; gecikmeler ve tepe bellek"""
+    render()
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < max_repeat and (len(latencies) < min_repeat or time.perf_counter() - started < budget):
+        call_started = time.perf_counter()
+        render()
+        latencies.append(time.perf_counter() - call_started)
+
+    tracemalloc.start()
+    render()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "repeat": len(latencies),
+        "mean_ms": sum(latencies) / len(latencies) * 1e3,
+        "p50_ms": percentile(latencies, 0.5) * 1e3,
+        "p95_ms": percentile(latencies, 0.95) * 1e3,
+        "p99_ms": percentile(latencies, 0.99) * 1e3,
+        "per_second": len(latencies) / sum(latencies),
+        "peak_mb": peak / 1e6,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_suite(scenarios, paths, budget, output_path):
+    """Sentetik şablon/fatura senaryolarında iki render yolunu ölçüp sonuçları JSON'a yaz"""
+    from html_process import process_html, process_html_soup
+    from json_process import generate_html_template_only, process_json_to_html
+
+    results = []
+    print(f"{'senaryo':>12} {'yol':>5} {'öğe':>5} {'tablo':>5} {'satır':>7} {'tekrar':>6} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'render/sn':>10} {'tepe MB':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, item_count, table_count, line_count in scenarios:
+            layout = make_layout(item_count, table_count)
+            data = make_layout_data(layout, line_count)
+            layout_path = os.path.join(workdir, f"{name}.json")
+            with open(layout_path, "w", encoding="utf-8") as file:
+                json.dump(layout, file, ensure_ascii=False)
+            output_path_html = os.path.join(workdir, f"{name}.html")
+
+            html_template = generate_html_template_only(layout)
+            cases = {
+                "json": lambda: process_json_to_html(layout_path, data, output_path_html, stream=True),
+                "html": lambda: process_html(html_template, data),
+                "soup": lambda: process_html_soup(html_template, data),
+            }
+            for path in paths:
+                result = {"scenario": name, "path": path, "items": item_count, "tables": table_count,
+                          "lines": line_count}
+                result.update(measure_case(cases[path], budget))
+                result["lines_per_second"] = result["per_second"] * line_count
+                results.append(result)
+                print(
+                    f"{name:>12} {path:>5} {item_count:>5} {table_count:>5} {line_count:>7} {result['repeat']:>6} "
+                    f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f} "
+                    f"{result['per_second']:>10.1f} {result['peak_mb']:>8.2f}"
+                )
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "budget": budget,
+        },
+        "results": results,
+    }
+    with open(output_path, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"Sonuçlar: {output_path}")
+
+
+def compare_results(baseline_path, current_path, threshold):
+    """İki `suite` sonucunu karşılaştır; eşiği aşan kötüleşmeleri işaretle, varsa çıkış kodu 1"""
+    def load(path):
+        with open(path, "r", encoding="utf-8") as file:
+            report = json.load(file)
+        return report["meta"], {(result["scenario"], result["path"]): result for result in report["results"]}
+
+    baseline_meta, baseline = load(baseline_path)
+    current_meta, current = load(current_path)
+    print(f"önce: {baseline_meta.get('revision')} ({baseline_meta['created']}), "
+          f"sonra: {current_meta.get('revision')} ({current_meta['created']}), eşik %{threshold * 100:.0f}")
+    print(f"{'senaryo':>12} {'yol':>5} {'metrik':>8} {'önce':>10} {'sonra':>10} {'değişim':>9}")
+
+    regressions = 0
+    for key, result in current.items():
+        previous = baseline.get(key)
+        if previous is None:
+            print(f"{key[0]:>12} {key[1]:>5} {'(yeni senaryo)':>20}")
+            continue
+        for metric in SUITE_METRICS:
+            before, after = previous[metric], result[metric]
+            change = (after - before) / before if before else 0.0
+            flag = ""
+            if change > threshold:
+                flag = "  REGRESYON"
+                regressions += 1
+            elif change < -threshold:
+                flag = "  iyileşme"
+            print(f"{key[0]:>12} {key[1]:>5} {metric:>8} {before:>10.2f} {after:>10.2f} {change * 100:>8.1f}%{flag}")
+    for key in sorted(baseline.keys() - current.keys()):
+        print(f"{key[0]:>12} {key[1]:>5} {'(yeni sonuçta yok)':>20}")
+
+    print(f"{regressions} regresyon")
+    if regressions:
+        raise SystemExit(1)
+
+
+def split_get_nested_value(data, key):
+    """Karşılaştırma için eski `get_nested_value` (her çağrıda `split`)"""
+    value = data
+    for k in key.split("."):
+        if isinstance(value, dict):
+            value = value.get(k)
+        else:
+            return None
+    return value
+
+
+def bench_keys(repeat):
+    """tool.json anahtar kataloğunda eski erişim, derlenmiş erişiciler ve toplu okuma"""
+    from data_keys import DataKey, KeyExtractor
+
+    with open(TOOL_KEYS_PATH, "r", encoding="utf-8") as file:
+        catalogue = json.load(file)
+    keys = [f"{group}.{field}" for group, fields in catalogue.items() for field in fields]
+    record = {group: {field: f"{field}-değer" for field in fields} for group, fields in catalogue.items()}
+    compiled = [DataKey(key) for key in keys]
+    extractor = KeyExtractor(keys)
+
+    def measure(function):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            function()
+        return (time.perf_counter() - started) / repeat * 1e6
+
+    results = [
+        ("split (eski)", measure(lambda: [split_get_nested_value(record, key) for key in keys])),
+        ("DataKey.get", measure(lambda: [accessor.get(record) for accessor in compiled])),
+        ("KeyExtractor.extract", measure(lambda: extractor.extract(record))),
+    ]
+    print(f"{len(keys)} anahtar, {repeat} tekrar")
+    print(f"{'yöntem':>22} {'µs/kayıt':>10} {'hız':>8}")
+    for name, micros in results:
+        print(f"{name:>22} {micros:>10.2f} {results[0][1] / micros:>7.2f}x")
+
+
+async def http_request(reader, writer, method, path, body=b""):
+    """Keep-alive bağlantı üzerinden tek HTTP isteği gönder, (durum, gövde) döndür"""
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    chunked = False
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        if line.lower().startswith(b"transfer-encoding:") and b"chunked" in line.lower():
+            chunked = True
+        elif line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    if not chunked:
+        return status, await reader.readexactly(length)
+
+    parts = []
+    while chunked:
+        size = int((await reader.readline()).strip(), 16)
+        parts.append(await reader.readexactly(size + 2))
+        if not size:
+            break
+    return status, b"".join(part[:-2] for part in parts)
+
+
+def bench_service(host, port, requests, concurrency, unique):
+    """Çalışan render servisine eş zamanlı istek gönderip gecikme ve hız ölç"""
+    import asyncio
+
+    with open(LAYOUT_PATH, "rb") as file:
+        layout = file.read()
+    bodies = [json.dumps(make_invoice(index), ensure_ascii=False).encode("utf-8") for index in range(unique)]
+
+    async def run():
+        reader, writer = await asyncio.open_connection(host, port)
+        status, body = await http_request(reader, writer, "POST", "/layouts", layout)
+        writer.close()
+        if status != 201:
+            raise SystemExit(f"Şablon kaydedilemedi: {status} {body.decode()}")
+        render_path = f"/layouts/{json.loads(body)['layoutId']}/render"
+
+        latencies = []
+        failures = 0
+        counter = iter(range(requests))
+
+        async def client():
+            nonlocal failures
+            reader, writer = await asyncio.open_connection(host, port)
+            for index in counter:
+                started = time.perf_counter()
+                status, _ = await http_request(reader, writer, "POST", render_path, bodies[index % unique])
+                latencies.append(time.perf_counter() - started)
+                failures += status != 200
+            writer.close()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        percentile = lambda ratio: latencies[min(len(latencies) - 1, int(len(latencies) * ratio))] * 1000
+        print(f"{requests} istek, {concurrency} eş zamanlı, {unique} farklı gövde, {failures} hata")
+        print(f"{requests / elapsed:.0f} istek/sn, p50 {percentile(0.5):.1f} ms, "
+              f"p95 {percentile(0.95):.1f} ms, p99 {percentile(0.99):.1f} ms")
+
+        reader, writer = await asyncio.open_connection(host, port)
+        print("Servis istatistikleri:", (await http_request(reader, writer, "GET", "/stats"))[1].decode())
+        writer.close()
+
+    asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend render benchmark'ları")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    stream = commands.add_parser("stream", help="JSONL akış modunda bellek kullanımı")
+    stream.add_argument("--sizes", default="1000,5000,20000", help="Virgülle ayrılmış kayıt sayıları")
+    stream.add_argument("--format", default=".tar", choices=[".tar", ".zip", ""], help="Çıktı biçimi ('' klasör)")
+
+    rows = commands.add_parser("rows", help="Tablo satır sayısına göre ölçekleme")
+    rows.add_argument("--sizes", default="100,10000,100000", help="Virgülle ayrılmış satır sayıları")
+
+    memory = commands.add_parser("memory", help="Büyük faturada string ve akış yazımının bellek kullanımı")
+    memory.add_argument("--rows", type=int, default=50000, help="Tablo satır sayısı")
+    memory.add_argument("--modes", default="bs4,string,stream", help="Karşılaştırılacak yollar")
+
+    cache = commands.add_parser("cache", help="Sonuç önbelleği isabet maliyeti ve render karşılaştırması")
+    cache.add_argument("--sizes", default="10,1000,20000", help="Virgülle ayrılmış satır sayıları")
+    cache.add_argument("--repeat", type=int, default=50)
+
+    incremental = commands.add_parser("incremental", help="Artımlı render ile tam render karşılaştırması")
+    incremental.add_argument("--rows", type=int, default=1000, help="Tablo satır sayısı")
+    incremental.add_argument("--repeat", type=int, default=200)
+
+    escape = commands.add_parser("escape", help="Hücre kaçışının render süresine etkisi")
+    escape.add_argument("--rows", type=int, default=10000, help="Tablo satır sayısı")
+    escape.add_argument("--repeat", type=int, default=30)
+    escape.add_argument("--max-overhead", type=float, default=0.05, help="İzin verilen ek süre (0.05 = %%5)")
+
+    styles = commands.add_parser("styles", help="Inline stil ile paylaşılan sınıfların boyut/süre karşılaştırması")
+    styles.add_argument("--sizes", default="10,1000,10000", help="Virgülle ayrılmış satır sayıları")
+    styles.add_argument("--repeat", type=int, default=20)
+
+    writers = commands.add_parser("writers", help="Klasör, sıkıştırma ve shard yazıcılarının karşılaştırması")
+    writers.add_argument("--count", type=int, default=5000, help="Fatura sayısı")
+    writers.add_argument("--rows", type=int, default=10, help="Fatura başına satır sayısı")
+    writers.add_argument("--shard-mb", type=float, default=64, help="Shard boyutu (MB)")
+    writers.add_argument("--lookups", type=int, default=1000, help="Shard indeksinden rastgele okuma sayısı")
+
+    startup = commands.add_parser("startup", help="Yeni process'te import ve ilk render süresi (JSON / .ctpl)")
+    startup.add_argument("--repeat", type=int, default=15, help="Senaryo başına process sayısı (medyan raporlanır)")
+
+    heights = commands.add_parser("heights", help="Metin ölçümüyle satır yüksekliği tahmini maliyeti")
+    heights.add_argument("--rows", type=int, default=10000, help="Tablo satır sayısı")
+    heights.add_argument("--repeat", type=int, default=5)
+
+    parallel = commands.add_parser("parallel", help="Tek büyük faturada tablo satırlarının çok çekirdekte üretimi")
+    parallel.add_argument("--sizes", default="50000,200000", help="Virgülle ayrılmış satır sayıları")
+    parallel.add_argument("--workers", default=None, help="Virgülle ayrılmış process sayıları (0: seri; varsayılan 0,2,4,..,çekirdek)")
+    parallel.add_argument("--repeat", type=int, default=3)
+
+    totals = commands.add_parser("totals", help="Toplam hesabı: fatura başına ve toplu kolon geçişi")
+    totals.add_argument("--invoices", type=int, default=5000)
+    totals.add_argument("--rows", type=int, default=20, help="Fatura başına satır sayısı")
+
+    keys = commands.add_parser("keys", help="Veri anahtarı erişimi mikro benchmark'ı")
+    keys.add_argument("--repeat", type=int, default=20000, help="Kayıt başına tekrar sayısı")
+
+    service = commands.add_parser("service", help="Çalışan render servisine yük testi")
+    service.add_argument("--host", default="127.0.0.1")
+    service.add_argument("--port", type=int, default=8080)
+    service.add_argument("-n", "--requests", type=int, default=2000, help="Toplam istek sayısı")
+    service.add_argument("-c", "--concurrency", type=int, default=32, help="Eş zamanlı bağlantı sayısı")
+    service.add_argument("--unique", type=int, default=100, help="Farklı fatura gövdesi sayısı")
+
+    suite = commands.add_parser("suite", help="Sentetik şablon/fatura senaryolarıyla regresyon ölçümü")
+    suite.add_argument("-o", "--output", default="benchmark_results.json", help="Sonuç dosyası")
+    suite.add_argument("--paths", default=",".join(SUITE_PATHS), help="Ölçülecek yollar: json, html, soup (hazırlıksız eski HTML akışı)")
+    suite.add_argument("--budget", type=float, default=3.0, help="Senaryo/yol başına ölçüm süresi (sn)")
+    suite.add_argument(
+        "--scenario", action="append", default=None, metavar="AD:ÖĞE:TABLO:SATIR",
+        help="Özel senaryo (tekrarlanabilir), ör. buyuk:200:3:50000",
+    )
+
+    compare = commands.add_parser("compare", help="İki suite sonucunu karşılaştır")
+    compare.add_argument("baseline", help="Önceki sonuç dosyası")
+    compare.add_argument("current", help="Yeni sonuç dosyası")
+    compare.add_argument("--threshold", type=float, default=0.10, help="Regresyon eşiği (0.10 = %%10)")
+
+    args = parser.parse_args()
+
+    if args.command == "suite":
+        scenarios = SUITE_SCENARIOS
+        if args.scenario:
+            scenarios = []
+            for spec in args.scenario:
+                name, *counts = spec.split(":")
+                scenarios.append((name, *map(int, counts)))
+        bench_suite(scenarios, args.paths.split(","), args.budget, args.output)
+    elif args.command == "compare":
+        compare_results(args.baseline, args.current, args.threshold)
+    elif args.command == "memory":
+        bench_memory(args.rows, args.modes.split(","))
+    elif args.command == "cache":
+        bench_cache([int(size) for size in args.sizes.split(",")], args.repeat)
+    elif args.command == "incremental":
+        bench_incremental(args.rows, args.repeat)
+    elif args.command == "escape":
+        bench_escape(args.rows, args.repeat, args.max_overhead)
+    elif args.command == "styles":
+        bench_styles([int(size) for size in args.sizes.split(",")], args.repeat)
+    elif args.command == "writers":
+        bench_writers(args.count, args.rows, args.shard_mb, args.lookups)
+    elif args.command == "startup":
+        bench_startup(args.repeat)
+    elif args.command == "heights":
+        bench_heights(args.rows, args.repeat)
+    elif args.command == "parallel":
+        if args.workers:
+            worker_counts = [int(workers) for workers in args.workers.split(",")]
+        else:
+            worker_counts = default_worker_counts()
+        bench_parallel([int(size) for size in args.sizes.split(",")], worker_counts, args.repeat)
+    elif args.command == "totals":
+        bench_totals(args.invoices, args.rows)
+    elif args.command == "keys":
+        bench_keys(args.repeat)
+    elif args.command == "service":
+        bench_service(args.host, args.port, args.requests, args.concurrency, args.unique)
+    elif args.command == "stream":
+        bench_stream([int(size) for size in args.sizes.split(",")], args.format)
+    elif args.command == "rows":
+        bench_rows([int(size) for size in args.sizes.split(",")])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import re
+
+# `items[0].name` gibi köşeli parantezli indeksler
+INDEX_PATTERN = re.compile(r"\[(-?\d+)\]")
+
+# Derlenmiş anahtar önbelleğinin üst sınırı (aşılınca temizlenir)
+MAX_COMPILED_KEYS = 4096
+
+
+def parse_key(key):
+    """Anahtarı `(ad, liste indeksi)` adımlarına ayır.
+
+    `"customer.name"` → `(("customer", None), ("name", None))`,
+    `"items[0].name"` ve `"items.0.name"` → `(("items", None), ("0", 0), ("name", None))`.
+    Sayısal adımlar dict'te metin anahtar, listede indeks olarak kullanılır.
+    """
+    steps = []
+    for part in INDEX_PATTERN.sub(r".\1", key).split("."):
+        index = None
+        if part.lstrip("-").isdigit():
+            index = int(part)
+        steps.append((part, index))
+    return tuple(steps)
+
+
+def step_value(value, name, index):
+    """Tek bir adımı uygula; dict'te anahtar, listede indeks, aksi halde None"""
+    if isinstance(value, dict):
+        return value.get(name)
+    if index is not None and isinstance(value, list) and -len(value) <= index < len(value):
+        return value[index]
+    return None
+
+
+class DataKey:
+    """Bir kez ayrıştırılmış veri anahtarı (`customer.name`, `items[0].price`).
+
+    Her çağrıda `split` yapmak yerine adımlar derlemede hazırlanır; tek
+    adımlı anahtarlar doğrudan `dict.get` ile çözülür. Değer yoksa
+    `default` döner.
+    """
+
+    __slots__ = ("key", "steps", "default", "name")
+
+    def __init__(self, key, default=None):
+        self.key = key
+        self.steps = parse_key(key)
+        self.default = default
+        self.name = self.steps[0][0] if len(self.steps) == 1 else None
+
+    def get(self, data, default=None):
+        """Değeri oku; bulunamazsa (veya None ise) varsayılanı döndür"""
+        if default is None:
+            default = self.default
+
+        if self.name is not None:
+            value = data.get(self.name) if isinstance(data, dict) else None
+            return default if value is None else value
+
+        value = data
+        for name, index in self.steps:
+            if isinstance(value, dict):
+                value = value.get(name)
+            elif index is not None and isinstance(value, list) and -len(value) <= index < len(value):
+                value = value[index]
+            else:
+                return default
+        return default if value is None else value
+
+
+class KeyExtractor:
+    """Bir şablondaki tüm veri anahtarlarını tek geçişte okuyan toplu erişici.
+
+    Anahtarlar ortak önekleri paylaşan bir ağaçta tutulur; `customer.name`
+    ve `customer.address` için `data["customer"]` bir kez okunur.
+    `extract` her anahtar için değeri (yoksa varsayılanı) içeren bir dict
+    döndürür.
+    """
+
+    def __init__(self, keys, defaults=None):
+        defaults = defaults or {}
+        self.keys = list(dict.fromkeys(keys))
+        self.empty = {key: defaults.get(key) for key in self.keys}
+
+        # Düğüm: adım -> [çocuk düğüm, bu adımda biten anahtarlar]
+        self.tree = {}
+        for key in self.keys:
+            node = self.tree
+            steps = parse_key(key)
+            for position, step in enumerate(steps):
+                entry = node.setdefault(step, [{}, []])
+                if position == len(steps) - 1:
+                    entry[1].append(key)
+                node = entry[0]
+
+    def extract(self, data):
+        """Kayıttaki tüm anahtarların değerlerini tek geçişte döndür"""
+        result = dict(self.empty)
+        if data:
+            self._walk(self.tree, data, result)
+        return result
+
+    def _walk(self, node, value, result):
+        for (name, index), (children, keys) in node.items():
+            child = step_value(value, name, index)
+            if child is None:
+                continue
+            for key in keys:
+                result[key] = child
+            if children:
+                self._walk(children, child, result)
+
+
+_compiled_keys = {}
+
+
+def compile_key(key):
+    """Anahtarı derle (process içinde önbelleğe alınır)"""
+    compiled = _compiled_keys.get(key)
+    if compiled is None:
+        if len(_compiled_keys) >= MAX_COMPILED_KEYS:
+            _compiled_keys.clear()
+        compiled = _compiled_keys[key] = DataKey(key)
+    return compiled
+
+
+def get_nested_value(data, key):
+    """İç içe verileri anahtardan erişir. Örn: "user.name" -> data["user"]["name"], "items[0].name" de desteklenir"""
+    return compile_key(key).get(data)
@@ -0,0 +1,38 @@
+from decimal import Decimal
+
+# `str()` çıktısı HTML özel karakteri içeremeyen tipler; kaçış taraması atlanır
+SAFE_TYPES = (int, float, Decimal, bool, type(None))
+
+
+def escape_text(value):
+    """Metin içeriği için `&`, `<` ve `>` karakterlerini kaçışla; özel karakter yoksa aynı nesne döner"""
+    if "&" in value or "<" in value or ">" in value:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return value
+
+
+def escape_attr(value):
+    """Çift tırnaklı attribute değeri için `escape_text` + `"` kaçışı"""
+    if "&" in value or "<" in value or ">" in value or '"' in value:
+        return value.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+    return value
+
+
+def text(value):
+    """Herhangi bir değeri kaçışlanmış metne çevir (sayılar taranmadan yazılır)"""
+    if type(value) in SAFE_TYPES:
+        return str(value)
+    return escape_text(str(value))
+
+
+def escape_column(values):
+    """Bir kolonun tüm değerlerini toplu kaçışla.
+
+    Kolon birleştirilip bir kez taranır; özel karakter yoksa (sayılar ve
+    çoğu metin) liste olduğu gibi döner ve değer başına iş yapılmaz.
+    """
+    joined = "".join(values)
+    if "&" in joined or "<" in joined or ">" in joined:
+        return [escape_text(value) for value in values]
+    return values
+
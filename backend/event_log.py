@@ -0,0 +1,63 @@
+import json
+import sys
+
+# Kütüphane logger'ı; yapılandırılmadıkça hiçbir şey yazılmaz
+LOGGER_NAME = "invoice"
+
+# `logging.INFO`; logging modülü sadece gerektiğinde yüklenir
+INFO = 20
+
+
+def logger_name(name):
+    """Modül için `invoice.<ad>` logger adı"""
+    return f"{LOGGER_NAME}.{name}"
+
+
+def log_event(name, event, level=INFO, **fields):
+    """Olayı alanlarıyla birlikte `name` logger'ına yaz; seviye kapalıysa kayıt hiç oluşturulmaz.
+
+    `logging` hiç içe aktarılmamışsa yapılandırılmış bir handler da
+    olamaz; bu durumda modül yüklenmeden dönülür (kısa ömürlü CLI
+    process'lerinin açılışı logging'e ödeme yapmaz).
+    """
+    logging = sys.modules.get("logging")
+    if logging is None:
+        return
+    logger = logging.getLogger(name)
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+class TextFormatter:
+    """`olay alan=değer ...` biçiminde tek satır"""
+
+    def format(self, record):
+        fields = getattr(record, "fields", {})
+        return " ".join([record.getMessage()] + [f"{key}={value}" for key, value in fields.items()])
+
+
+class JsonFormatter:
+    """Her kaydı tek satır JSON olarak yaz (log toplayıcılar için)"""
+
+    def format(self, record):
+        entry = {
+            "time": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level="INFO", json_output=False, stream=None):
+    """`invoice` logger'ına stderr (veya `stream`) handler'ı bağla; CLI'lar ve test betiği içindir"""
+    import logging
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter() if json_output else TextFormatter())
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers[:] = [handler]
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
+    logger.propagate = False
+    return logger
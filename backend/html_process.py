@@ -1,24 +1,30 @@
-from bs4 import BeautifulSoup
 import re
 
+import profiling
+from data_keys import get_nested_value
+from escaping import escape_column
+from event_log import log_event, logger_name
+from layout import ROW_HEIGHT, ItemIndex
+from output_writers import open_output
+from row_renderer import RowRenderer
+from text_metrics import TableMeasure, table_columns
+
+
+TOP_PATTERN = re.compile(r'top:\s*(\d+)px')
+WIDTH_PATTERN = re.compile(r'(?<![-\w])width:\s*([\d.]+)px')
+HEIGHT_PATTERN = re.compile(r'(?<![-\w])height:\s*([\d.]+)px')
+FONT_SIZE_PATTERN = re.compile(r'font-size:\s*([\d.]+)px')
+FONT_FAMILY_PATTERN = re.compile(r'font-family:\s*([^;]+)')
+FONT_WEIGHT_PATTERN = re.compile(r'font-weight:\s*(\w+)')
+
+LOG_NAME = logger_name("html_process")
+
 
 def load_file_content(file_path):
     with open(file_path, "r", encoding="utf-8") as file:
         return file.read()
 
 
-def get_nested_value(data, key):
-    """İç içe verileri anahtardan erişir. Örn: "user.name" -> data["user"]["name"]"""
-    keys = key.split(".")
-    value = data
-    for k in keys:
-        if isinstance(value, dict):
-            value = value.get(k)
-        else:
-            return None
-    return value
-
-
 def process_text_element(element, data):
     """Text tipi elementi işle"""
     data_key = element.get("data-key")
@@ -35,17 +41,49 @@ def process_data_element(element, data):
             element.string = str(value)
 
 
+def table_measure(element, header_cells):
+    """Tablo elemanının style'ından satır ölçeri; yazı boyutu veya kolon genişlikleri yoksa None (sabit model)"""
+    style = element.get("style", "")
+    font_size = FONT_SIZE_PATTERN.search(style)
+    width = WIDTH_PATTERN.search(style)
+    widths = [WIDTH_PATTERN.search(cell.get("style", "")) for cell in header_cells]
+    if not font_size or not width or not widths or not all(widths):
+        return None
+
+    font_family = FONT_FAMILY_PATTERN.search(style)
+    font_weight = FONT_WEIGHT_PATTERN.search(style)
+    return TableMeasure(
+        [float(match.group(1)) for match in widths],
+        float(width.group(1)),
+        font_family.group(1).strip() if font_family else "sans",
+        float(font_size.group(1)),
+        font_weight.group(1) if font_weight else "normal",
+    )
+
+
+def rows_height(measure, headers, table_data):
+    """Yazılan satırların toplam yüksekliği; ölçer yoksa veya hiçbir hücre kaymıyorsa sabit `ROW_HEIGHT` modeli"""
+    # Hücresiz satırların yüksekliği sıfır kabul edilir (calculate_row_height ile aynı)
+    if not headers:
+        return 0
+    if measure is not None and table_data:
+        row_heights = measure.row_heights(table_columns(table_data, headers))
+        if row_heights is not None:
+            return sum(row_heights)
+    return len(table_data) * ROW_HEIGHT
+
+
 def process_table_element(element, data):
-    """Table tipi elementi işle"""
+    """Table tipi elementi işle, `(eklenen satır sayısı, satırların toplam yüksekliği)` döndür"""
     data_key = element.get("data-key")
     table = element.find("table")
     
     if not table or not data_key or data_key not in data:
-        return
+        return None
     
     table_data = data[data_key]
     if not isinstance(table_data, list):
-        return
+        return None
     
     # Thead'den header bilgisini al
     thead = table.find("thead")
@@ -53,46 +91,61 @@ def process_table_element(element, data):
         thead = table.find("tr")  # İlk tr varsa header olarak kullan
     
     headers = []
+    header_cells = []
     if thead:
         for th in thead.find_all("th"):
             key = th.get("data-key")
             if key:
                 headers.append(key)
+                header_cells.append(th)
     
     # Tbody bulup satırları temizle
     tbody = table.find("tbody")
     if tbody:
         tbody.clear()
     else:
+        from bs4 import BeautifulSoup
+
         tbody = BeautifulSoup("<tbody></tbody>", "html.parser").tbody
         table.append(tbody)
     
-    # Veri satırlarını ekle
-    for row_data in table_data:
-        tr = BeautifulSoup("<tr></tr>", "html.parser").tr
-        
-        for header_key in headers:
-            td = BeautifulSoup(
-                f'<td style="border:1px solid #d1d5db;padding:8px;text-align:left"></td>',
-                "html.parser"
-            ).td
-            value = row_data.get(header_key, "")
-            td.string = str(value)
-            tr.append(td)
-        
-        tbody.append(tr)
-
-
-def process_image_element(element, data):
-    """Image tipi elementi işle"""
+    # Veri satırlarını tek seferde üret; satırlar ağaca parse edilmeden eklenir
+    if table_data:
+        from soup_nodes import RawRows
+
+        rows_html = RowRenderer(headers, escape_column=escape_column).render_rows(table_data)
+        tbody.append(RawRows(rows_html))
+    
+    return (len(table_data) if headers else 0), rows_height(table_measure(element, header_cells), headers, table_data)
+
+
+def element_box(element):
+    """Elemanın style'ındaki `width`/`height` (px) değerleri; yoksa None"""
+    style = element.get("style", "")
+    width = WIDTH_PATTERN.search(style)
+    height = HEIGHT_PATTERN.search(style)
+    if width and height:
+        return float(width.group(1)), float(height.group(1))
+    return None
+
+
+def process_image_element(element, data, assets=None):
+    """Image tipi elementi işle (`assets` verilirse görsel önbellekten çözülür)"""
     data_key = element.get("data-key")
     if data_key and data_key in data:
         image_url = data[data_key]
         if image_url:
+            if assets is not None:
+                image_url = assets.src(image_url, element_box(element))
             # Mevcut img tag'ını bul ya da oluştur
             img = element.find("img")
             if not img:
-                img = BeautifulSoup(f'<img src="{image_url}" style="width:100%;height:100%;object-fit:cover;"/>', "html.parser").img
+                from bs4 import BeautifulSoup
+
+                # URL metinden parse edilmez, attribute olarak atanır (tırnaklı URL yeni attribute açamaz)
+                img = BeautifulSoup("", "html.parser").new_tag(
+                    "img", attrs={"src": str(image_url), "style": "width:100%;height:100%;object-fit:cover;"}
+                )
                 element.clear()
                 element.append(img)
             else:
@@ -103,7 +156,7 @@ def process_image_element(element, data):
 
 
 def calculate_row_height(row_element):
-    """Tablo satırının yüksekliğini hesapla"""
+    """Tablo satırının tek satırlık yüksekliği (şablondaki statik satırlar için; veri satırları `rows_height` ile ölçülür)"""
     if not row_element:
         return 0
     
@@ -113,22 +166,32 @@ def calculate_row_height(row_element):
     
     # CSS'den padding ve border bilgisini al
     # Varsayılan: 8px padding + 1px border (toplam ~18px per row)
-    return 34  # 8px padding top + 8px padding bottom + 1px border top + 1px border bottom
+    return ROW_HEIGHT  # 8px padding top + 8px padding bottom + 1px border top + 1px border bottom
 
 
-def adjust_element_positions(soup, table_element, original_table_height):
-    """Tablo yüksekliği değişirse, altındaki elementlerin Y konumunu ayarla"""
+def parse_top(element):
+    """Elementin style'ındaki `top: Npx` değerini döndür (yoksa None)"""
+    top_match = TOP_PATTERN.search(element.get("style", ""))
+    return int(top_match.group(1)) if top_match else None
+
+
+def table_shift(table_element, original_table_height, actual_rows_height=None):
+    """Tablonun `(alt sınır, yükseklik farkı)` çiftini döndür; büyümediyse None"""
     if not table_element or not table_element.find("table"):
-        return
+        return None
     
     table = table_element.find("table")
     tbody = table.find("tbody")
     
     if not tbody:
-        return
+        return None
     
-    rows = tbody.find_all("tr")
-    actual_height = len(rows) * calculate_row_height(rows[0] if rows else None)
+    if actual_rows_height is None:
+        rows = tbody.find_all("tr")
+        actual_height = len(rows) * calculate_row_height(rows[0] if rows else None)
+    else:
+        # Satırlar process_table_element tarafından eklendi, yükseklikleri ölçüldü
+        actual_height = actual_rows_height
     
     # Orijinal yüksekliği string'den çıkar (örn: "90px" -> 90)
     try:
@@ -140,69 +203,109 @@ def adjust_element_positions(soup, table_element, original_table_height):
     height_difference = actual_height - original_height
     
     if height_difference <= 0:
-        return  # Tablo küçüldü, ayarlama gerekli yok
-    
-    # Tablo elementinin style'ından top ve height'ını al
-    table_style = table_element.get("style", "")
-    table_top = 0
+        return None  # Tablo küçüldü, ayarlama gerekli yok
     
     # Style'den top pozisyonunu çıkar
-    top_match = re.search(r'top:\s*(\d+)px', table_style)
-    if top_match:
-        table_top = int(top_match.group(1))
-    
-    # Tablo elementinin sonrası gelen tüm elementleri bul
-    all_items = soup.find_all(class_="item")
-    for item in all_items:
-        # Tablo elementinin sonrası gelen elementleri kontrol et
-        item_style = item.get("style", "")
-        
-        # Style'den top değerini çıkar
-        top_match = re.search(r'top:\s*(\d+)px', item_style)
-        if not top_match:
-            continue
-        
-        item_top = int(top_match.group(1))
-        
-        # Eğer bu element tablo altında ise (top pozisyonu tablo altında)
-        table_bottom = table_top + original_height
-        if item_top >= table_bottom:
-            # Yeni top konumunu hesapla
-            new_top = item_top + height_difference
-            new_style = re.sub(r'top:\s*\d+px', f'top: {new_top}px', item_style)
+    table_top = parse_top(table_element) or 0
+    
+    return table_top + original_height, height_difference
+
+
+def apply_table_shifts(items, table_shifts):
+    """Tabloların altındaki elementleri `(tablo sırası, alt sınır, fark)` listesiyle tek seferde güncelle.
+
+    Tablolar belge sırasıyla uygulanmış gibi hesaplanır: bir tablonun alt
+    sınırı önceki tabloların kaydırdığı konumundan alınır.
+    """
+    if not table_shifts:
+        return
+    
+    # Elementlerin top değerleri bir kez okunur, y'ye göre sıralı indeks kurulur
+    tops = [parse_top(item) for item in items]
+    shifts = ItemIndex(tops).sequential_shifts(table_shifts)
+    
+    for item, item_top, shift in zip(items, tops, shifts):
+        if shift:
+            new_style = TOP_PATTERN.sub(f'top: {item_top + shift}px', item.get("style", ""))
             item["style"] = new_style
 
 
-def process_html(html_content, data):
+def adjust_element_positions(soup, table_element, original_table_height, actual_rows_height=None):
+    """Tablo yüksekliği değişirse, altındaki elementlerin Y konumunu ayarla"""
+    shift = table_shift(table_element, original_table_height, actual_rows_height)
+    if shift:
+        items = soup.find_all(class_="item")
+        position = next((index for index, item in enumerate(items) if item is table_element), None)
+        apply_table_shifts(items, [(position, *shift)])
+
+
+def process_html(html_content, data, assets=None, parser="html.parser"):
+    """HTML şablonuna verileri yerleştir.
+
+    Şablon içerik hash'iyle önbellekte bir kez hazırlanır (bkz.
+    `html_template.PreparedHtmlTemplate`); her faturada doküman parse
+    edilmeden sadece boşluklar doldurulur. Hazırlanamayan şablonlarda
+    (iç içe `.item`) `process_html_soup` kullanılır.
+    """
+    # Döngüsel import olmaması için burada içe aktarılır
+    from html_template import get_prepared_html_template
+    
+    prepared = get_prepared_html_template(html_content, parser)
+    if prepared is None:
+        return process_html_soup(html_content, data, assets, parser)
+    return prepared.render(data, assets)
+
+
+def process_html_soup(html_content, data, assets=None, parser="html.parser"):
     """HTML'yi BeautifulSoup ile parse et ve verileri yerleştir"""
-    soup = BeautifulSoup(html_content, "html.parser")
+    from bs4 import BeautifulSoup
+
+    with profiling.stage("parse"):
+        soup = BeautifulSoup(html_content, parser)
     
     # Tüm item elementlerini bul
     items = soup.find_all(class_="item")
     
-    for item in items:
-        data_type = item.get("data-type")
-        original_height = item.get("style", "")
-        
-        if data_type == "text":
-            process_text_element(item, data)
-        elif data_type == "data":
-            process_data_element(item, data)
-        elif data_type == "table":
-            # Orijinal yüksekliği kaydet
-            height_match = re.search(r'height:\s*(\d+px)', original_height)
-            original_table_height = height_match.group(1) if height_match else "90px"
+    # Büyüyen tabloların kaydırmaları en sonda tek seferde uygulanır
+    table_shifts = []
+    
+    with profiling.stage("fill"):
+        for position, item in enumerate(items):
+            data_type = item.get("data-type")
+            original_height = item.get("style", "")
             
-            process_table_element(item, data)
-            adjust_element_positions(soup, item, original_table_height)
-        elif data_type == "image":
-            process_image_element(item, data)
+            if data_type == "text":
+                process_text_element(item, data)
+            elif data_type == "data":
+                process_data_element(item, data)
+            elif data_type == "table":
+                # Orijinal yüksekliği kaydet
+                height_match = re.search(r'height:\s*(\d+px)', original_height)
+                original_table_height = height_match.group(1) if height_match else "90px"
+                
+                filled = process_table_element(item, data)
+                row_count, actual_rows_height = filled if filled else (0, None)
+                profiling.count("rows", row_count)
+                shift = table_shift(item, original_table_height, actual_rows_height)
+                if shift:
+                    table_shifts.append((position, *shift))
+            elif data_type == "image":
+                process_image_element(item, data, assets)
+    
+    with profiling.stage("adjust"):
+        apply_table_shifts(items, table_shifts)
+    
+    if profiling.enabled():
+        profiling.count("items", len(items))
+        profiling.count("soup_nodes", sum(1 for _ in soup.descendants))
     
-    return str(soup)
+    with profiling.stage("serialize"):
+        return str(soup)
 
 
 def save_html(html_content, output_path):
-    """İşlenen HTML'yi dosyaya yaz"""
-    with open(output_path, "w", encoding="utf-8") as file:
+    """İşlenen HTML'yi dosyaya yaz (`.gz`/`.zst` uzantısında sıkıştırılmış)"""
+    with profiling.stage("write"), open_output(output_path) as file:
         file.write(html_content)
-    print(f"Çıktı dosyası kaydedildi: {output_path}")
+    profiling.count("bytes_out", len(html_content))
+    log_event(LOG_NAME, "output_written", path=output_path, format="html", chars=len(html_content))
@@ -0,0 +1,299 @@
+import copy
+import hashlib
+import re
+from collections import OrderedDict
+
+import profiling
+from data_keys import DataKey
+from escaping import escape_column, escape_text
+from html_process import TOP_PATTERN, calculate_row_height, element_box, parse_top, rows_height, table_measure
+from layout import ItemIndex
+from row_renderer import RowRenderer
+from template_cache import SLOT, _soup_attr
+
+ORIGINAL_HEIGHT_PATTERN = re.compile(r'height:\s*(\d+px)')
+
+IMG_STYLE = ' style="width:100%;height:100%;object-fit:cover;"/>'
+
+PARSERS = ("html.parser", "lxml")
+
+
+def _table_info(element):
+    """Tablo elemanının tek seferlik bilgisi: başlık anahtarları, satır ölçeri, satır öncesi/sonrası ve şablondaki yükseklik"""
+    from bs4 import BeautifulSoup
+    from bs4.element import NavigableString
+
+    table = element.find("table")
+    if not table:
+        return None
+
+    thead = table.find("thead") or table.find("tr")
+    header_cells = [th for th in thead.find_all("th") if th.get("data-key")] if thead else []
+    headers = [th.get("data-key") for th in header_cells]
+    measure = table_measure(element, header_cells)
+
+    # Veri hiç yazılmazsa tabloyu şablondaki satırlar belirler (None: tbody yok)
+    tbody = table.find("tbody")
+    static_height = None
+    if tbody:
+        rows = tbody.find_all("tr")
+        static_height = len(rows) * calculate_row_height(rows[0] if rows else None)
+
+    # Satırlar yazıldığında içerik: tbody temizlenir (yoksa oluşturulur), satırlar SLOT yerine gelir
+    clone = copy.copy(element)
+    clone_table = clone.find("table")
+    clone_tbody = clone_table.find("tbody")
+    if clone_tbody:
+        clone_tbody.clear()
+    else:
+        clone_tbody = BeautifulSoup("<tbody></tbody>", "html.parser").tbody
+        clone_table.append(clone_tbody)
+    clone_tbody.append(NavigableString(SLOT))
+    before, after = clone.decode_contents().split(SLOT)
+
+    return RowRenderer(headers, escape_column=escape_column), measure, static_height, before, after
+
+
+def _image_info(element):
+    """Görsel elemanının `src` yerleştirilecek içerik parçaları (img yoksa None)"""
+    clone = copy.copy(element)
+    img = clone.find("img")
+    if not img:
+        return None
+    img["src"] = SLOT
+    before, after = clone.decode_contents().split(f'"{SLOT}"')
+    return before, after
+
+
+class PreparedHtmlTemplate:
+    """Bir HTML şablonunun bir kez parse edilip statik parçalara ve tipli boşluklara ayrılmış hali.
+
+    Her `.item` elemanının içeriği ve (konumu varsa) `style` değeri birer
+    boşluktur; render sırasında doküman parse edilmez, boşluklar veriyle
+    doldurulup segmentlerle birleştirilir. Çıktı aynı parser ile
+    `process_html_soup` çıktısıyla aynıdır. İç içe `.item` elemanları
+    desteklenmez (`ValueError`).
+    """
+
+    def __init__(self, html_content, parser="html.parser"):
+        with profiling.stage("prepare"):
+            self._prepare(html_content, parser)
+
+    def _prepare(self, html_content, parser):
+        """Şablonu parse et, eleman bilgilerini çıkar ve dokümanı boşluklardan böl"""
+        if parser not in PARSERS:
+            raise ValueError(f"Desteklenmeyen parser: {parser}")
+        # bs4 sadece hazırlıkta gerekir; hazır şablonun render'ı parse etmez
+        from bs4 import BeautifulSoup, FeatureNotFound
+        from bs4.element import NavigableString
+
+        try:
+            soup = BeautifulSoup(html_content, parser)
+        except FeatureNotFound:
+            raise RuntimeError("lxml parser için lxml paketi gerekli: pip install lxml") from None
+
+        elements = soup.find_all(class_="item")
+        element_ids = {id(element) for element in elements}
+        for element in elements:
+            if any(id(parent) in element_ids for parent in element.parents):
+                raise ValueError("İç içe .item elemanları hazırlanamaz")
+
+        # Eleman bilgisi: (tip, anahtar, orijinal içerik, ek bilgi)
+        self.items = []
+        self.tops = []
+        self.styles = []
+        slots = []
+        for position, element in enumerate(elements):
+            data_type = element.get("data-type")
+            data_key = element.get("data-key")
+            style = element.get("style", "")
+            extra = None
+            if data_type == "data" and data_key:
+                extra = DataKey(data_key)
+            elif data_type == "table":
+                # Şablondaki yükseklik: style'daki ilk `height: Npx` (yoksa 90px)
+                height_match = ORIGINAL_HEIGHT_PATTERN.search(style)
+                extra = (_table_info(element), int((height_match.group(1) if height_match else "90px")[:-2]))
+            elif data_type == "image":
+                extra = (_image_info(element), element_box(element))
+
+            self.items.append((data_type, data_key, element.decode_contents(), extra))
+            self.styles.append(style)
+            top = parse_top(element)
+            self.tops.append(top)
+
+            if top is not None:
+                element["style"] = SLOT
+                slots.append(("style", position))
+            element.clear()
+            element.append(NavigableString(SLOT))
+            slots.append(("content", position))
+
+        self.slots = slots
+        self.index = ItemIndex(self.tops)
+        self.segments = str(soup).split(SLOT)
+        if len(self.segments) != len(slots) + 1:
+            raise ValueError("Şablon hazırlanamadı: boşluk sayısı uyuşmuyor")
+
+        # Style boşluklarının tırnakları değerle birlikte (_soup_attr) yazılır
+        for number, (kind, _) in enumerate(slots):
+            if kind == "style":
+                if not self.segments[number].endswith('"') or not self.segments[number + 1].startswith('"'):
+                    raise ValueError("Şablon hazırlanamadı: beklenmeyen style biçimi")
+                self.segments[number] = self.segments[number][:-1]
+                self.segments[number + 1] = self.segments[number + 1][1:]
+
+    def render(self, data, assets=None):
+        """Boşlukları veriyle doldurup son HTML'yi döndür (`process_html` ile aynı)"""
+        contents = []
+        table_shifts = []
+        rows_total = 0
+
+        with profiling.stage("fill"):
+            for position, (data_type, data_key, original, extra) in enumerate(self.items):
+                content = original
+                if data_type == "text":
+                    if data_key and data_key in data:
+                        content = escape_text(str(data[data_key]))
+                elif data_type == "data":
+                    if extra is not None:
+                        value = extra.get(data)
+                        if value is not None:
+                            content = escape_text(str(value))
+                elif data_type == "table":
+                    content, shift, row_count = self._fill_table(position, data_key, original, extra, data)
+                    rows_total += row_count or 0
+                    if shift:
+                        table_shifts.append((position, *shift))
+                elif data_type == "image":
+                    content = self._fill_image(data_key, original, extra, data, assets)
+                contents.append(content)
+
+        profiling.count("rows", rows_total)
+        if profiling.enabled():
+            profiling.count("items", len(self.items))
+
+        with profiling.stage("adjust"):
+            shifts = self.index.sequential_shifts(table_shifts) if table_shifts else None
+
+        with profiling.stage("serialize"):
+            segments = self.segments
+            parts = [segments[0]]
+            for number, (kind, position) in enumerate(self.slots):
+                if kind == "content":
+                    parts.append(contents[position])
+                else:
+                    style = self.styles[position]
+                    if shifts and shifts[position]:
+                        style = TOP_PATTERN.sub(f"top: {self.tops[position] + shifts[position]}px", style)
+                    parts.append(_soup_attr(style))
+                parts.append(segments[number + 1])
+            return "".join(parts)
+
+    def _fill_table(self, position, data_key, original, extra, data):
+        """Tablo içeriği, `(alt sınır, fark)` kaydırması ve yazılan satır sayısı"""
+        info, original_height = extra
+        if info is None:
+            return original, None, None
+
+        row_renderer, measure, static_height, before, after = info
+        table_data = data[data_key] if data_key and data_key in data else None
+        if isinstance(table_data, list):
+            content = before + (row_renderer.render_rows(table_data) if table_data else "") + after
+            row_count = len(table_data) if row_renderer.headers else 0
+            actual_height = rows_height(measure, row_renderer.headers, table_data)
+        else:
+            content, row_count = original, None
+            if static_height is None:
+                return content, None, None
+            actual_height = static_height
+
+        difference = actual_height - original_height
+        if difference <= 0:
+            return content, None, row_count
+        return content, ((self.tops[position] or 0) + original_height, difference), row_count
+
+    @staticmethod
+    def _fill_image(data_key, original, info, data, assets=None):
+        """Görsel içeriği: mevcut img'nin `src`'i değişir, yoksa yeni img yazılır"""
+        if not data_key or data_key not in data:
+            return original
+        image_url = data[data_key]
+        if not image_url:
+            return original
+
+        parts, box = info
+        if assets is not None:
+            image_url = assets.src(image_url, box)
+        if parts is not None:
+            return parts[0] + _soup_attr(str(image_url)) + parts[1]
+        return "<img src=" + _soup_attr(str(image_url)) + IMG_STYLE
+
+
+def prepare_html_template(html_content, parser="html.parser"):
+    """HTML şablonunu bir kez hazırla (`parser="lxml"` daha hızlı hazırlık, lxml gerekir)"""
+    return PreparedHtmlTemplate(html_content, parser)
+
+
+class PreparedHtmlCache:
+    """Şablon içeriğinin hash'i ile anahtarlanan, boyutu sınırlı LRU önbellek.
+
+    Hazırlanamayan şablonlar (iç içe `.item`) `None` olarak saklanır;
+    `process_html` bunlar için BeautifulSoup akışına döner.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, html_content, parser="html.parser"):
+        """Hazırlanmış şablonu döndür, gerekirse hazırla"""
+        key = (hashlib.sha256(html_content.encode("utf-8")).digest(), parser)
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            profiling.count("html_template_hits")
+            return self.entries[key]
+
+        self.misses += 1
+        profiling.count("html_template_misses")
+        try:
+            prepared = prepare_html_template(html_content, parser)
+        except ValueError:
+            prepared = None
+        self.entries[key] = prepared
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+        return prepared
+
+    def clear(self):
+        """Önbelleği ve sayaçları sıfırla"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Önbellek istatistiklerini döndür"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+        }
+
+
+_default_cache = PreparedHtmlCache()
+
+
+def get_prepared_html_template(html_content, parser="html.parser"):
+    """Varsayılan önbellekten hazırlanmış şablonu al (hazırlanamıyorsa None)"""
+    return _default_cache.get(html_content, parser)
+
+
+def html_template_cache_info():
+    """Varsayılan önbelleğin istatistiklerini döndür"""
+    return _default_cache.info()
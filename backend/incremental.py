@@ -0,0 +1,102 @@
+import hashlib
+import pickle
+
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def fingerprint(value):
+    """Girdi değerinin karşılaştırılabilir özeti (skalerler olduğu gibi, diğerleri hash olarak)"""
+    if isinstance(value, SCALAR_TYPES):
+        return type(value), value
+    payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+class IncrementalRenderer:
+    """Aynı faturanın ardışık render'larında sadece değişen elemanları yeniden üreten render edici.
+
+    Her eleman için son içerik parçası ve girdisinin özeti (`fingerprint`)
+    tutulur; yeni veride özeti değişmeyen elemanlar yeniden üretilmez.
+    Konumlar sadece bir tablonun satır sayısı veya ölçülen satır
+    yükseklikleri değiştiğinde yeniden hesaplanır; bu durumda `top` değeri
+    değişen elemanlar da yenilenir.
+    Çıktı `CompiledTemplate.render` ile aynıdır. Sayfalama desteklenmez;
+    görsel dosyasının diskte değişmesi izlenmez.
+    """
+
+    def __init__(self, compiled, assets=None):
+        self.compiled = compiled
+        self.assets = assets
+        self.row_counts = None
+        self.row_heights = None
+        self.tops = None
+        self.inputs = {}
+        self.contents = {}
+        self.fragments = {}
+        self.stats = {"renders": 0, "relayouts": 0, "items_rendered": 0, "items_reused": 0}
+
+    def item_input(self, compiled_item, data):
+        """Elemanın içeriğini belirleyen veri değerinin özeti"""
+        index, kind, _, _, _, extra = compiled_item
+        if kind == "text":
+            return None
+        if not data:
+            return fingerprint(None)
+        if kind == "data":
+            return fingerprint(extra.get(data))
+        return fingerprint(data.get(self.compiled.page_items[index]["value"]))
+
+    def update(self, data):
+        """Durumu yeni veriye getir; yeniden üretilen elemanların indekslerini döndür"""
+        compiled = self.compiled
+        self.stats["renders"] += 1
+
+        row_counts = compiled.layout.row_counts(data)
+        row_heights = compiled.layout.row_heights(data)
+        previous_tops = self.tops
+        tops = previous_tops
+        if row_counts != self.row_counts or row_heights != self.row_heights:
+            tops = compiled.layout.tops(row_counts, row_heights)
+            self.stats["relayouts"] += 1
+
+        changed = []
+        for compiled_item in compiled.items:
+            index = compiled_item[0]
+            key = self.item_input(compiled_item, data)
+
+            content_changed = index not in self.contents or self.inputs[index] != key
+            if content_changed:
+                self.contents[index] = compiled.render_content(compiled_item, data, assets=self.assets)
+                self.inputs[index] = key
+            elif tops is previous_tops or tops[index] == previous_tops[index]:
+                self.stats["items_reused"] += 1
+                continue
+
+            _, _, opening, middle, closing, _ = compiled_item
+            self.fragments[index] = opening + tops[index] + middle + self.contents[index] + closing
+            self.stats["items_rendered"] += 1
+            changed.append(index)
+
+        self.row_counts = row_counts
+        self.row_heights = row_heights
+        self.tops = tops
+        return changed
+
+    def render(self, data=None):
+        """Değişen elemanları yenileyip tam dokümanı döndür"""
+        self.update(data)
+        compiled = self.compiled
+        fragments = self.fragments
+
+        parts = [compiled.head]
+        for position, compiled_item in enumerate(compiled.items):
+            if position:
+                parts.append(compiled.separators[position - 1])
+            parts.append(fragments[compiled_item[0]])
+        parts.append(compiled.tail)
+        return "".join(parts)
+
+    def patch(self, data=None):
+        """Sadece değişen elemanları `(item indeksi, eleman HTML'i)` listesi olarak döndür"""
+        return [(index, self.fragments[index]) for index in self.update(data)]
@@ -1,16 +1,29 @@
+import io
 import json
-from bs4 import BeautifulSoup
+import os
 import re
 
+import profiling
+from data_keys import get_nested_value
+from escaping import escape_attr, escape_column, escape_text, text
+from event_log import log_event, logger_name
+from layout import compute_item_shifts
+from layout_schema import get_layout, item_columns
+from output_writers import compress, compression_for_path, open_output
+from row_renderer import CELL_STYLE, RowRenderer
+from stylesheet import StyleSheet, check_style_mode
+
+LOG_NAME = logger_name("json_process")
+
 
 def load_json_content(file_path):
     """JSON dosyasını yükle"""
-    with open(file_path, "r", encoding="utf-8") as file:
+    with profiling.stage("load_json"), open(file_path, "r", encoding="utf-8") as file:
         return json.load(file)
 
 
-def create_base_html_template(page_size="A4"):
-    """Temel HTML şablonunu oluştur"""
+def create_base_html_template(page_size="A4", css=""):
+    """Temel HTML şablonunu oluştur (`css`: `<style>` bloğuna eklenecek üretilmiş sınıflar)"""
     html_template = f"""<!DOCTYPE html>
 <html>
 <head>
@@ -86,7 +99,7 @@ def create_base_html_template(page_size="A4"):
         box-shadow: none;
       }}
     }}
-  </style>
+{css}  </style>
 </head>
 <body>
   <div class="preview-container">
@@ -99,140 +112,126 @@ def create_base_html_template(page_size="A4"):
     return html_template
 
 
-def get_nested_value(data, key):
-    """İç içe verileri anahtardan erişir. Örn: "user.name" -> data["user"]["name"]"""
-    keys = key.split(".")
-    value = data
-    for k in keys:
-        if isinstance(value, dict):
-            value = value.get(k)
-        else:
-            return None
-    return value
-
-
-def create_text_element(item, data=None):
-    """Text tipi element oluştur - veriyle birlikte"""
-    pos = item["position"]
-    size = item["size"]
+def create_item_style(item, top=None):
+    """Elemanın (`LayoutItem`) inline style metnini oluştur (tüm tipler için ortak)"""
+    if top is None:
+        top = item.y
     
     style = f"""
         position: absolute;
-        left: {pos["x"]}px;
-        top: {pos["y"]}px;
-        width: {size["width"]}px;
-        height: {size["height"]}px;
-        font-family: {item["fontFamily"]};
-        font-size: {item["fontSize"]}px;
+        left: {item.x}px;
+        top: {top}px;
+        width: {item.width}px;
+        height: {item.height}px;
+        font-family: {item.font_family};
+        font-size: {item.font_size}px;
         color: #000;
-        text-align: {item["textAlign"]};
-        font-weight: {item["fontWeight"]};
-        font-style: {item["fontStyle"]};
-        text-decoration: {item["textDecoration"]};
+        text-align: {item.text_align};
+        font-weight: {item.font_weight};
+        font-style: {item.font_style};
+        text-decoration: {item.text_decoration};
         line-height: 1.5;
     """
     
-    # Text elemanları sabit metin gösterir
-    content = item["value"]
+    return style.strip()
+
+
+def create_item_geometry(item, top=None):
+    """Elemanın sadece konum ve boyut style'ı (sınıf modunda inline kalan kısım)"""
+    if top is None:
+        top = item.y
     
-    return f'''<div class="item" data-type="text" data-key="{item["value"]}" style="{style.strip()}">
+    return f"left: {item.x}px; top: {top}px; width: {item.width}px; height: {item.height}px;"
+
+
+def create_item_typography(item):
+    """Elemanın yazı bildirimleri (sınıf modunda paylaşılan sınıfa taşınır; konum `.item`'da)"""
+    return (
+        f"font-family: {item.font_family}",
+        f"font-size: {item.font_size}px",
+        "color: #000",
+        f"text-align: {item.text_align}",
+        f"font-weight: {item.font_weight}",
+        f"font-style: {item.font_style}",
+        f"text-decoration: {item.text_decoration}",
+    )
+
+
+def create_item_attributes(item, top=None, stylesheet=None):
+    """Elemanın `(style, sınıf)` çifti; `stylesheet` yoksa tam inline style ve sınıf None"""
+    if stylesheet is None:
+        return create_item_style(item, top), None
+    return create_item_geometry(item, top), stylesheet.intern(create_item_typography(item))
+
+
+def create_item_html(item_type, item, style, content, class_name=None):
+    """Elemanı konumlanmış item div'i ile sar"""
+    class_attr = "item" if class_name is None else f"item {class_name}"
+    return f'''<div class="{class_attr}" data-type="{item_type}" data-key="{escape_attr(item.value)}" style="{escape_attr(style)}">
         {content}
     </div>'''
 
 
-def create_data_element(item, data=None):
-    """Data tipi element oluştur - veriyle birlikte"""
-    pos = item["position"]
-    size = item["size"]
+def create_text_element(item, data=None, stylesheet=None):
+    """Text tipi element oluştur - veriyle birlikte"""
+    style, class_name = create_item_attributes(item, stylesheet=stylesheet)
     
-    style = f"""
-        position: absolute;
-        left: {pos["x"]}px;
-        top: {pos["y"]}px;
-        width: {size["width"]}px;
-        height: {size["height"]}px;
-        font-family: {item["fontFamily"]};
-        font-size: {item["fontSize"]}px;
-        color: #000;
-        text-align: {item["textAlign"]};
-        font-weight: {item["fontWeight"]};
-        font-style: {item["fontStyle"]};
-        text-decoration: {item["textDecoration"]};
-        line-height: 1.5;
-    """
+    # Text elemanları sabit metin gösterir
+    content = escape_text(item.value)
+    
+    return create_item_html("text", item, style, content, class_name)
+
+
+def create_data_element(item, data=None, stylesheet=None):
+    """Data tipi element oluştur - veriyle birlikte"""
+    style, class_name = create_item_attributes(item, stylesheet=stylesheet)
     
     # Veriyi al ve yerleştir
-    content = item["value"]
+    content = escape_text(item.value)
     if data:
-        value = get_nested_value(data, item["value"])
+        value = get_nested_value(data, item.value)
         if value is not None:
-            content = str(value)
+            content = text(value)
     
-    return f'''<div class="item" data-type="data" data-key="{item["value"]}" style="{style.strip()}">
-        {content}
-    </div>'''
+    return create_item_html("data", item, style, content, class_name)
 
 
-def create_table_element(item, data=None):
-    """Table tipi element oluştur - veriyle birlikte"""
-    pos = item["position"]
-    size = item["size"]
-    
-    style = f"""
-        position: absolute;
-        left: {pos["x"]}px;
-        top: {pos["y"]}px;
-        width: {size["width"]}px;
-        height: {size["height"]}px;
-        font-family: {item["fontFamily"]};
-        font-size: {item["fontSize"]}px;
-        color: #000;
-        text-align: {item["textAlign"]};
-        font-weight: {item["fontWeight"]};
-        font-style: {item["fontStyle"]};
-        text-decoration: {item["textDecoration"]};
-        line-height: 1.5;
-    """
-    
-    # Tablo header'larını oluştur
-    headers_html = ""
+def create_table_headers(item, stylesheet=None):
+    """Tablo başlıklarını oluştur, (anahtarlar, header HTML) döner"""
+    # `dataColumns` yoksa varsayılan başlıklar
+    headers_html = []
     headers = []
-    if "dataColumns" in item and item["dataColumns"]:
-        for col in item["dataColumns"]:
-            col_width = col.get("width", 120)
-            col_align = col.get("textAlign", "left")
-            headers.append(col["value"])
-            headers_html += f'''
-            <th data-key="{col["value"]}" style="border:1px solid #d1d5db;padding:8px;text-align:{col_align};width:{col_width}px">{col["label"]}</th>'''
-    else:
-        # Varsayılan başlık
-        headers = ["productName", "unitPrice", "vatRate", "totalAmount"]
-        headers_html = '''
-            <th data-key="productName" style="border:1px solid #d1d5db;padding:8px;text-align:left;width:120px">Ürün Adı</th>
-            <th data-key="unitPrice" style="border:1px solid #d1d5db;padding:8px;text-align:left;width:120px">Birim Fiyat</th>
-            <th data-key="vatRate" style="border:1px solid #d1d5db;padding:8px;text-align:left;width:120px">KDV</th>
-            <th data-key="totalAmount" style="border:1px solid #d1d5db;padding:8px;text-align:left;width:120px">Toplam</th>'''
+    for column in item_columns(item):
+        headers.append(column.value)
+        th_style = f"border:1px solid #d1d5db;padding:8px;text-align:{column.text_align};width:{column.width}px"
+        style_attr = f'style="{th_style}"' if stylesheet is None else f'class="{stylesheet.intern(th_style)}"'
+        headers_html.append(f'''
+            <th data-key="{escape_attr(column.value)}" {style_attr}>{escape_text(column.label)}</th>''')
     
-    # Tablo body'sini oluştur
-    tbody_html = ""
-    if data and item["value"] in data:
-        table_data = data[item["value"]]
-        if isinstance(table_data, list):
-            for row_data in table_data:
-                tbody_html += "<tr>"
-                for header_key in headers:
-                    value = row_data.get(header_key, "")
-                    tbody_html += f'<td style="border:1px solid #d1d5db;padding:8px;text-align:left">{str(value)}</td>'
-                tbody_html += "</tr>"
-    
-    # Eğer veri yoksa boş satır ekle
-    if not tbody_html:
-        tbody_html = "<tr>"
-        for _ in headers:
-            tbody_html += '<td style="border:1px solid #d1d5db;padding:8px;text-align:left"></td>'
-        tbody_html += "</tr>"
-    
-    table_html = f'''
+    return headers, "".join(headers_html)
+
+
+def create_cell_prefixes(headers, stylesheet=None):
+    """Gövde hücrelerinin açılış etiketleri; `stylesheet` yoksa None (inline `CELL_OPEN`)"""
+    if stylesheet is None:
+        return None
+    return [f'<td class="{stylesheet.intern(CELL_STYLE)}">'] * len(headers)
+
+
+def create_table_body(item, headers, data=None, stylesheet=None):
+    """Tablo gövdesindeki satırları oluştur"""
+    table_data = []
+    if data and item.value in data and isinstance(data[item.value], list):
+        table_data = data[item.value]
+    
+    # Veri yoksa RowRenderer tek boş satır döner
+    row_renderer = RowRenderer(headers, create_cell_prefixes(headers, stylesheet), escape_column=escape_column)
+    return row_renderer.render_rows(table_data)
+
+
+def create_table_html(headers_html, tbody_html):
+    """Başlık ve gövdeden tablo HTML'ini oluştur"""
+    return f'''
         <table style="border-collapse:collapse;width:100%;min-width:100%">
           <tr>{headers_html}
           </tr>
@@ -240,44 +239,31 @@ def create_table_element(item, data=None):
             {tbody_html}
           </tbody>
         </table>'''
-    
-    return f'''<div class="item" data-type="table" data-key="{item["value"]}" style="{style.strip()}">
-        {table_html}
-    </div>'''
 
 
-def create_image_element(item, data=None):
-    """Image tipi element oluştur - veriyle birlikte"""
-    pos = item["position"]
-    size = item["size"]
+def create_table_element(item, data=None, stylesheet=None):
+    """Table tipi element oluştur - veriyle birlikte"""
+    style, class_name = create_item_attributes(item, stylesheet=stylesheet)
     
-    style = f"""
-        position: absolute;
-        left: {pos["x"]}px;
-        top: {pos["y"]}px;
-        width: {size["width"]}px;
-        height: {size["height"]}px;
-        font-family: {item["fontFamily"]};
-        font-size: {item["fontSize"]}px;
-        color: #000;
-        text-align: {item["textAlign"]};
-        font-weight: {item["fontWeight"]};
-        font-style: {item["fontStyle"]};
-        text-decoration: {item["textDecoration"]};
-        line-height: 1.5;
-    """
+    # Tablo header'larını oluştur
+    headers, headers_html = create_table_headers(item, stylesheet)
     
-    # Veriyi kontrol et
-    image_url = ""
-    if data and item["value"] in data:
-        image_url = data[item["value"]]
+    # Tablo body'sini oluştur
+    tbody_html = create_table_body(item, headers, data, stylesheet)
     
+    table_html = create_table_html(headers_html, tbody_html)
+    
+    return create_item_html("table", item, style, table_html, class_name)
+
+
+def create_image_content(image_url):
+    """Resim içeriğini oluştur, url yoksa placeholder döner"""
     if image_url:
         # Gerçek resim
-        content_html = f'<img src="{image_url}" style="width:100%;height:100%;object-fit:cover;"/>'
-    else:
-        # Placeholder image
-        content_html = f'''
+        return f'<img src="{escape_attr(str(image_url))}" style="width:100%;height:100%;object-fit:cover;"/>'
+    
+    # Placeholder image
+    return f'''
         <div style="width:100%;height:100%;display:flex;align-items:center;justify-content:center;">
           <div
             style="width:100%;height:100%;background:#f1f5f9;border:1px dashed #d1d5db;border-radius:6px;display:flex;align-items:center;justify-content:center;">
@@ -289,136 +275,208 @@ def create_image_element(item, data=None):
             </svg>
           </div>
         </div>'''
+
+
+def create_image_element(item, data=None, stylesheet=None):
+    """Image tipi element oluştur - veriyle birlikte"""
+    style, class_name = create_item_attributes(item, stylesheet=stylesheet)
     
-    return f'''<div class="item" data-type="image" data-key="{item["value"]}" style="{style.strip()}">
-        {content_html}
-    </div>'''
+    # Veriyi kontrol et
+    image_url = ""
+    if data and item.value in data:
+        image_url = data[item.value]
+    
+    content_html = create_image_content(image_url)
+    
+    return create_item_html("image", item, style, content_html, class_name)
 
 
-def generate_html_from_json(json_data, data=None):
-    """JSON'dan veriyle birlikte HTML oluştur"""
-    page_size = json_data.get("pageSize", "A4")
-    page_items = json_data.get("pageItems", [])
+# Eleman tipi -> `LayoutItem` kaydından HTML üreten fonksiyon
+ELEMENT_BUILDERS = {
+    "text": create_text_element,
+    "data": create_data_element,
+    "table": create_table_element,
+    "image": create_image_element,
+}
+
+
+def generate_html_from_json(json_data, data=None, styles="inline"):
+    """JSON'dan veriyle birlikte HTML oluştur (şablon önce doğrulanır, eksik alanlar varsayılanla dolar).
+
+    Doğrulanmış `Layout` şablon içeriğine göre önbellekte tutulur
+    (`layout_schema.get_layout`), elemanlar `LayoutItem` kayıtlarından üretilir.
+
+    `styles="classes"` ile aynı yazı ve hücre stilleri `<style>` bloğunda
+    üretilen sınıflarda toplanır, elemanlarda sadece konum/boyut inline kalır.
+    """
+    layout = get_layout(json_data)
+    stylesheet = StyleSheet() if check_style_mode(styles) == "classes" else None
     
-    # Temel HTML şablonunu oluştur
-    html_template = create_base_html_template(page_size)
+    # Elementleri veriyle birlikte oluştur; parçalar sonda tek seferde birleştirilir
+    parts = []
     
-    # Elementleri veriyle birlikte oluştur
-    elements_html = ""
+    with profiling.stage("generate"):
+        for item in layout.items:
+            parts.append(ELEMENT_BUILDERS[item.type](item, data, stylesheet))
+            parts.append("\n\n")
     
-    for item in page_items:
-        item_type = item.get("type", "text")
-        
-        if item_type == "text":
-            elements_html += create_text_element(item, data) + "\n\n"
-        elif item_type == "data":
-            elements_html += create_data_element(item, data) + "\n\n"
-        elif item_type == "table":
-            elements_html += create_table_element(item, data) + "\n\n"
-        elif item_type == "image":
-            elements_html += create_image_element(item, data) + "\n\n"
+    # Temel HTML şablonunu oluştur (üretilen sınıflar `<style>` bloğuna eklenir)
+    html_template = create_base_html_template(layout.page_size, stylesheet.css() if stylesheet else "")
     
     # Placeholder'ı elementlerle değiştir
-    html_template = html_template.replace("<!-- CONTENT_PLACEHOLDER -->", elements_html)
+    html_template = html_template.replace("<!-- CONTENT_PLACEHOLDER -->", "".join(parts))
     
     return html_template
 
 
-def generate_html_template_only(json_data):
+def generate_html_template_only(json_data, styles="inline"):
     """JSON'dan sadece şablon HTML oluştur (veri olmadan)"""
-    return generate_html_from_json(json_data, None)
+    return generate_html_from_json(json_data, None, styles)
 
 
-def adjust_elements_after_table_processing(soup, json_data):
-    """Tablo işleme sonrası elementlerin konumlarını ayarla"""
-    # JSON'dan tablo elementlerini bul
-    page_items = json_data.get("pageItems", [])
-    
-    for item in page_items:
-        if item.get("type") == "table":
-            # Bu tablo elementinin HTML'deki karşılığını bul
-            table_elements = soup.find_all("div", {"data-type": "table", "data-key": item["value"]})
-            
-            if not table_elements:
-                continue
-                
-            table_element = table_elements[0]
-            table = table_element.find("table")
-            
-            if not table:
-                continue
-            
-            # Tablo verilerini kontrol et
-            tbody = table.find("tbody")
-            if not tbody:
-                continue
-            
-            rows = tbody.find_all("tr")
-            if not rows:
+def adjust_elements_after_table_processing(soup, json_data, data=None):
+    """Tablo işleme sonrası elementlerin konumlarını ayarla (`data` verilirse kayan satırlar ölçülür)"""
+    with profiling.stage("adjust"):
+        # Doğrulanmış şablon (generate_html_from_json ile aynı önbellek kaydı)
+        layout = get_layout(json_data)
+        
+        # data-key -> HTML elementleri (ağaç sadece bir kez taranır)
+        elements_by_key = {}
+        for element in soup.find_all("div", attrs={"data-key": True}):
+            elements_by_key.setdefault(element.get("data-key"), []).append(element)
+        
+        # Her tablo anahtarı için HTML'deki satır sayısı (aynı anahtarda ilk tablo geçerli)
+        row_counts = {}
+        for item in layout.tables:
+            if item.value in row_counts:
                 continue
-            
-            # Orijinal yükseklik (JSON'dan)
-            original_height = item["size"]["height"]
-            
-            # Gerçek yükseklik (satır sayısına göre)
-            row_height = 34  # padding + border
-            actual_height = len(rows) * row_height + 40  # header için extra
-            
-            # Yükseklik farkı
-            height_difference = actual_height - original_height
-            
-            if height_difference <= 0:
+        
+            table_element = next(
+                (element for element in elements_by_key.get(item.value, ()) if element.get("data-type") == "table"),
+                None,
+            )
+            table = table_element.find("table") if table_element else None
+            tbody = table.find("tbody") if table else None
+            if tbody:
+                row_counts[item.value] = len(tbody.find_all("tr"))
+        
+        # Satırları kayan tabloların yükseklikleri veriden ölçülür
+        row_heights = layout.row_heights(data) if data else None
+        
+        # Tüm tabloların kaydırmaları y'ye göre sıralı indeksle tek taramada toplanır
+        shifts = compute_item_shifts(layout.page_items, row_counts, row_heights)
+        
+        for other_item, shift in zip(layout.items, shifts):
+            if not shift:
                 continue
-            
-            # Tablo konumu
-            table_x = item["position"]["x"]
-            table_y = item["position"]["y"]
-            table_bottom = table_y + original_height
-            
-            # Altındaki elementleri bul ve konumlarını ayarla
-            for other_item in page_items:
-                other_y = other_item["position"]["y"]
-                
-                # Bu element tablo altında mı?
-                if other_y >= table_bottom and other_item["id"] != item["id"]:
-                    # HTML'deki karşılığını bul
-                    other_elements = soup.find_all("div", {"data-key": other_item["value"]})
-                    
-                    for other_element in other_elements:
-                        style = other_element.get("style", "")
-                        
-                        # Yeni top konumunu hesapla
-                        new_top = other_y + height_difference
-                        
-                        # Style'da top değerini güncelle
-                        new_style = re.sub(r'top:\s*\d+px', f'top: {new_top}px', style)
-                        other_element["style"] = new_style
-
-
-def process_json_to_html(json_file_path, data, output_path):
-    """JSON dosyasından veriyle birlikte doğrudan HTML oluştur"""
-    # JSON'u yükle
-    json_data = load_json_content(json_file_path)
-    
-    # Veriyle birlikte HTML'yi doğrudan oluştur
-    processed_html = generate_html_from_json(json_data, data)
+        
+            new_top = other_item.y + shift
+            for other_element in elements_by_key.get(other_item.value, ()):
+                style = other_element.get("style", "")
+        
+                # Style'da top değerini güncelle
+                new_style = re.sub(r'top:\s*\d+px', f'top: {new_top}px', style)
+                other_element["style"] = new_style
+
+
+def process_json_to_html(json_file_path, data, output_path, paginate=False, assets=None, result_cache=None,
+                         styles="inline", row_workers=None, stream=False):
+    """JSON dosyasından veriyle birlikte doğrudan HTML oluştur (isteğe bağlı çok sayfalı).
+
+    Yazılan HTML doküman döner. `stream=True` ile doküman bellekte tek
+    string olarak oluşturulmadan dosyaya parça parça yazılır ve None döner
+    (büyük faturalar için). `output_path` `.pdf` ile bitiyorsa çıktı PDF olarak yazılır (weasyprint gerekir). `assets` bir
+    `assets.AssetCache` ise görseller önbellekten yerleştirilir.
+    `result_cache` bir `result_cache.ResultCache` ise aynı şablon + veri
+    için daha önce üretilmiş çıktı (HTML veya PDF) olduğu gibi yazılır;
+    görsel önbelleğiyle birlikte kullanılmaz (görsel dosyası değişebilir).
+    `.html.gz`/`.html.zst` çıktıları sıkıştırılarak yazılır; dosya başına
+    ekrana yazı basılmaz, `output_written` olayı `invoice` logger'ına gider.
+    `styles="classes"` tekrar eden stilleri paylaşılan CSS sınıflarına taşır.
+    `row_workers` büyük tablo gövdelerinin kaç process'te üretileceğidir
+    (None: satır sayısına göre otomatik, 0: seri; bkz. `CompiledTemplate.render`).
+    PDF çıktısında None döner.
+    """
+    # Döngüsel import olmaması için burada içe aktarılır
+    from template_cache import get_compiled_template
     
-    # BeautifulSoup ile parse et (pozisyon ayarlaması için)
-    soup = BeautifulSoup(processed_html, "html.parser")
+    # Derlenmiş şablonu önbellekten al (JSON sadece değiştiğinde yüklenir)
+    with profiling.stage("template"):
+        compiled = get_compiled_template(json_file_path, styles)
     
-    # Tablo sonrası element konumlarını ayarla
-    adjust_elements_after_table_processing(soup, json_data)
+    pdf = output_path.lower().endswith(".pdf")
+    if result_cache is not None and assets is None:
+        from result_cache import result_key
+        
+        if pdf:
+            key = result_key(compiled.digest, data, "pdf", paginate=paginate)
+            payload = result_cache.get(key)
+            if payload is None:
+                payload = render_pdf(compiled, data, output_path, paginate).write_pdf()
+                result_cache.put(key, payload)
+        else:
+            payload = result_cache.render(compiled, data, paginate)
+        html = None if pdf or stream else payload.decode("utf-8")
+        payload = compress(payload, compression_for_path(output_path))
+        with profiling.stage("write"), open(output_path, "wb") as file:
+            file.write(payload)
+        profiling.count("bytes_out", len(payload))
+        log_event(LOG_NAME, "output_written", path=output_path, format="pdf" if pdf else "html",
+                  bytes=len(payload), cached=True)
+        return html
+    
+    # PDF modu: process içindeki sıcak render ediciyle doğrudan PDF yaz
+    if pdf:
+        document = render_pdf(compiled, data, output_path, paginate, assets)
+        with profiling.stage("pdf"):
+            document.write_pdf(output_path)
+        log_event(LOG_NAME, "output_written", path=output_path, format="pdf", pages=len(document.pages))
+        return None
+    
+    if stream:
+        # Sonucu parça parça kaydet
+        html = None
+        pages = stream_json_to_html(compiled, data, output_path, paginate, assets, row_workers)
+    else:
+        buffer = io.StringIO()
+        pages = stream_json_to_html(compiled, data, buffer, paginate, assets, row_workers)
+        html = buffer.getvalue()
+        with profiling.stage("write"), open_output(output_path) as file:
+            file.write(html)
+    size = os.path.getsize(output_path)
+    profiling.count("bytes_out", size)
     
-    # Güncellenmiş HTML'yi al
-    final_html = str(soup)
+    log_event(LOG_NAME, "output_written", path=output_path, format="html", pages=pages, bytes=size)
     
-    # Sonucu kaydet
-    with open(output_path, "w", encoding="utf-8") as file:
-        file.write(final_html)
+    return html
+
+
+def render_pdf(compiled, data, output_path, paginate=False, assets=None):
+    """Derlenmiş şablonu process içindeki sıcak PDF render ediciyle dokümana çevir"""
+    from pdf_output import get_renderer
     
-    print(f"JSON'dan HTML oluşturuldu ve işlendi: {output_path}")
+    # Konumlar HTML üretilmeden hesaplanır, doküman tek geçişte yazılır
+    final_html = compiled.render(data, paginate=paginate, assets=assets)
+    base_url = os.path.dirname(os.path.abspath(output_path))
+    with profiling.stage("pdf"):
+        document = get_renderer(base_url).render(final_html)
+    profiling.count("pages", len(document.pages))
+    return document
+
+
+def stream_json_to_html(compiled, data, target, paginate=False, assets=None, row_workers=None):
+    """Derlenmiş şablonu veriyle render edip `target`'a akış olarak yaz.
+
+    `target` bir dosya yolu veya `write(str)` metodu olan herhangi bir
+    nesnedir (açık dosya, `io.StringIO`, `output_writers.ChunkedSink`).
+    Yol `.gz`/`.zst` ile bitiyorsa çıktı sıkıştırılarak yazılır. Yazılan
+    sayfa sayısını döndürür.
+    """
+    if hasattr(target, "write"):
+        return compiled.render_to(target, data, paginate=paginate, assets=assets, row_workers=row_workers)
     
-    return final_html
+    with open_output(target) as file:
+        return compiled.render_to(file, data, paginate=paginate, assets=assets, row_workers=row_workers)
 
 
 def save_template_html(json_file_path, output_path):
@@ -430,9 +488,9 @@ def save_template_html(json_file_path, output_path):
     html_template = generate_html_template_only(json_data)
     
     # Sonucu kaydet
-    with open(output_path, "w", encoding="utf-8") as file:
+    with open_output(output_path) as file:
         file.write(html_template)
     
-    print(f"JSON'dan HTML şablonu oluşturuldu: {output_path}")
+    log_event(LOG_NAME, "template_written", path=output_path, bytes=len(html_template))
     
     return html_template
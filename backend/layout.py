@@ -0,0 +1,154 @@
+from bisect import bisect_left
+
+# Tek satırlık tablo satırının yüksekliği (padding + border); kayan satırlar `text_metrics` ile ölçülür
+ROW_HEIGHT = 34
+
+# Tablo başlığı için ek yükseklik
+TABLE_HEADER_HEIGHT = 40
+
+# A4 sayfa yüksekliği (297mm, 96dpi) ve sayfalama kenar boşlukları
+PAGE_HEIGHT = 1122
+PAGE_BOTTOM_MARGIN = 40
+CONTINUATION_TOP = 40
+
+EMITTED_TYPES = ("text", "data", "table", "image")
+
+
+def table_row_count(item, data=None):
+    """Tablonun gövdesinde oluşacak satır sayısını hesapla (veri yoksa 1 boş satır)"""
+    if data and item["value"] in data:
+        table_data = data[item["value"]]
+        if isinstance(table_data, list) and table_data:
+            return len(table_data)
+    return 1
+
+
+def table_actual_height(row_count, row_heights=None):
+    """Satır sayısına (veya ölçülen satır yüksekliklerine) göre tablonun gerçek yüksekliği"""
+    if row_heights is not None:
+        return sum(row_heights) + TABLE_HEADER_HEIGHT
+    return row_count * ROW_HEIGHT + TABLE_HEADER_HEIGHT
+
+
+def collect_row_counts(page_items, data=None):
+    """Her tablo anahtarı için satır sayısını topla (aynı anahtarda ilk tablo geçerli)"""
+    row_counts = {}
+    for item in page_items:
+        if item.get("type") == "table" and item["value"] not in row_counts:
+            row_counts[item["value"]] = table_row_count(item, data)
+    return row_counts
+
+
+class ItemIndex:
+    """Elemanların y konumuna göre sıralı indeksi (render başına bir kez kurulur).
+
+    Her tablonun etkilediği ilk eleman `bisect` ile bulunur; birden çok
+    tablonun kaydırmaları `cumulative_shifts` (orijinal konumlara göre) veya
+    `sequential_shifts` (tablolar sırayla uygulanmış gibi) ile toplanır.
+    """
+
+    def __init__(self, ys):
+        # ys: eleman sırasına göre y değerleri (None olanlar indekse girmez)
+        self.size = len(ys)
+        self.order = sorted((index for index, y in enumerate(ys) if y is not None), key=ys.__getitem__)
+        self.ys = [ys[index] for index in self.order]
+        # Eleman sırası -> indeksteki konum (indekste olmayanlar için None)
+        self.ranks = [None] * self.size
+        for position, index in enumerate(self.order):
+            self.ranks[index] = position
+
+    def cumulative_shifts(self, shifts_below):
+        """`(alt sınır, kaydırma)` çiftlerinden her elemanın toplam kaydırmasını hesapla.
+
+        Her çift, y değeri alt sınıra eşit veya büyük olan tüm elemanları
+        kaydırır; birden çok çiftin etkisi toplanır.
+        """
+        return self._spread([(bisect_left(self.ys, bottom), difference) for bottom, difference in shifts_below])
+
+    def sequential_shifts(self, table_shifts):
+        """`(tablo sırası, orijinal alt sınır, kaydırma)` üçlülerini sırayla uygula.
+
+        Eski HTML akışındaki gibi her tablonun alt sınırı önceki tabloların
+        kaydırdığı güncel konumundan alınır ve güncel y'lerle karşılaştırılır
+        (yan yana tablolarda `cumulative_shifts`'ten farklı sonuç verebilir);
+        tablo sırası `None` ise alt sınır olduğu gibi kullanılır. Kaydırma y
+        sırasını bozmadığından eşik yine ikili aramayla bulunur.
+        """
+        starts = []
+
+        def shifted_y(position):
+            return self.ys[position] + sum(difference for start, difference in starts if start <= position)
+
+        for index, bottom, difference in table_shifts:
+            rank = None if index is None else self.ranks[index]
+            if rank is not None:
+                bottom += shifted_y(rank) - self.ys[rank]
+            low, high = 0, len(self.ys)
+            while low < high:
+                middle = (low + high) // 2
+                if shifted_y(middle) < bottom:
+                    low = middle + 1
+                else:
+                    high = middle
+            starts.append((low, difference))
+        return self._spread(starts)
+
+    def _spread(self, starts):
+        """`(indeks konumu, kaydırma)` başlangıçlarını eleman sırasına göre toplam kaydırmaya çevir"""
+        deltas = [0] * (len(self.ys) + 1)
+        for start, difference in starts:
+            deltas[start] += difference
+
+        shifts = [0] * self.size
+        running = 0
+        for position, index in enumerate(self.order):
+            running += deltas[position]
+            shifts[index] = running
+        return shifts
+
+
+def table_shifts(page_items, row_counts, row_heights=None):
+    """Büyüyen her tablo için `(orijinal alt sınır, yükseklik farkı)` listesi.
+
+    `row_heights` (anahtar -> satır yükseklikleri) verilen tablolarda
+    yükseklik ölçülen satırlardan, diğerlerinde sabit satır modelinden
+    hesaplanır.
+    """
+    shifts_below = []
+    for item in page_items:
+        if item.get("type") != "table":
+            continue
+
+        row_count = row_counts.get(item["value"], 0)
+        if not row_count:
+            continue
+
+        original_height = item["size"]["height"]
+        heights = row_heights.get(item["value"]) if row_heights else None
+        height_difference = table_actual_height(row_count, heights) - original_height
+        if height_difference > 0:
+            shifts_below.append((item["position"]["y"] + original_height, height_difference))
+    return shifts_below
+
+
+def compute_item_shifts(page_items, row_counts, row_heights=None):
+    """Her elemanın tablolardan kaynaklanan toplam y kaydırmasını hesapla"""
+    ys = [
+        item["position"]["y"] if item.get("type", "text") in EMITTED_TYPES else None
+        for item in page_items
+    ]
+    return ItemIndex(ys).cumulative_shifts(table_shifts(page_items, row_counts, row_heights))
+
+
+def compute_item_tops(page_items, row_counts, row_heights=None):
+    """HTML üretilmeden önce her elemanın son `top` değerini hesapla.
+
+    Büyüyen her tablo, orijinal alt sınırının altında kalan elemanları kendi
+    yükseklik farkı kadar aşağı iter; birden çok tablonun etkisi toplanır.
+    Sonuç, eleman sırasına göre `top` değerlerinin metin halidir.
+    """
+    shifts = compute_item_shifts(page_items, row_counts, row_heights)
+    return [
+        str(item["position"]["y"] + shift) if shift else str(item["position"]["y"])
+        for item, shift in zip(page_items, shifts)
+    ]
@@ -0,0 +1,354 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+from layout import EMITTED_TYPES, ItemIndex, table_actual_height, table_row_count
+from text_metrics import TableMeasure, table_columns
+
+# frontend/src/templates/types/editor.ts `DraggableItem` alanlarının izin verilen değerleri
+ENUM_FIELDS = {
+    "textAlign": ("left", "center", "right"),
+    "fontWeight": ("normal", "bold"),
+    "fontStyle": ("normal", "italic"),
+    "textDecoration": ("none", "underline"),
+}
+
+# Eksik alanlar için varsayılanlar (editörün yeni eleman değerleri)
+DEFAULTS = {
+    "fontFamily": "sans",
+    "fontSize": 14,
+    "textAlign": "left",
+    "fontWeight": "normal",
+    "fontStyle": "normal",
+    "textDecoration": "none",
+}
+
+DEFAULT_COLUMN_WIDTH = 120
+
+# `fontFamily` CSS bildirimine olduğu gibi yazılır (sınıf modunda `<style>` bloğuna); bildirimden
+# veya `<style>` elemanından taşmayı sağlayan karakterler kabul edilmez
+FONT_FAMILY_FORBIDDEN = "<>{};"
+
+# `dataColumns` verilmeyen tabloların başlıkları
+DEFAULT_TABLE_COLUMNS = [
+    {"value": "productName", "label": "Ürün Adı"},
+    {"value": "unitPrice", "label": "Birim Fiyat"},
+    {"value": "vatRate", "label": "KDV"},
+    {"value": "totalAmount", "label": "Toplam"},
+]
+
+# `get_layout` önbelleğinde tutulan en fazla şablon sayısı
+LAYOUT_CACHE_SIZE = 32
+
+
+class LayoutError(ValueError):
+    """Şablon doğrulama hatası; tüm sorunlar `errors` içinde `(item id, alan, mesaj)` olarak döner"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        lines = [
+            "  " + ": ".join(part for part in (item_id, field, message) if part)
+            for item_id, field, message in errors
+        ]
+        super().__init__(f"Şablon geçersiz ({len(errors)} hata):\n" + "\n".join(lines))
+
+
+class TableColumn:
+    """Doğrulanmış tablo kolonu (`dataColumns` elemanı)"""
+
+    __slots__ = ("label", "value", "width", "text_align")
+
+    def __init__(self, label, value, width, text_align):
+        self.label = label
+        self.value = value
+        self.width = width
+        self.text_align = text_align
+
+
+# `DEFAULT_TABLE_COLUMNS`'un kayıt hali (varsayılan genişlik ve hizayla)
+DEFAULT_COLUMNS = [
+    TableColumn(column["label"], column["value"], DEFAULT_COLUMN_WIDTH, "left") for column in DEFAULT_TABLE_COLUMNS
+]
+
+
+class LayoutItem:
+    """Doğrulanmış ve varsayılanları doldurulmuş `pageItems` elemanı"""
+
+    __slots__ = (
+        "index", "id", "label", "value", "type", "x", "y", "width", "height",
+        "font_family", "font_size", "color", "text_align", "font_weight", "font_style", "text_decoration",
+        "columns", "repeat", "source",
+    )
+
+    def to_dict(self):
+        """Varsayılanları doldurulmuş `DraggableItem` sözlüğü (bilinmeyen ek alanlar korunur)"""
+        item = dict(self.source)
+        item.update(
+            id=self.id,
+            label=self.label,
+            value=self.value,
+            type=self.type,
+            position=dict(self.source["position"]),
+            size=dict(self.source["size"]),
+            fontFamily=self.font_family,
+            fontSize=self.font_size,
+            textAlign=self.text_align,
+            fontWeight=self.font_weight,
+            fontStyle=self.font_style,
+            textDecoration=self.text_decoration,
+        )
+        if self.columns is not None:
+            item["dataColumns"] = [
+                dict(raw, label=column.label, value=column.value)
+                for raw, column in zip(self.source["dataColumns"], self.columns)
+            ]
+        return item
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _check_box(raw, field, keys, errors, item_id):
+    """`position`/`size` gibi sayı çiftlerini doğrula"""
+    box = raw.get(field)
+    if not isinstance(box, dict):
+        errors.append((item_id, field, f"{'/'.join(keys)} içeren nesne olmalı"))
+        return None
+    values = []
+    for key in keys:
+        value = box.get(key)
+        if not _is_number(value):
+            errors.append((item_id, f"{field}.{key}", f"sayı olmalı, {value!r} geldi"))
+            return None
+        values.append(value)
+    return values
+
+
+def _check_columns(raw, errors, item_id):
+    """Tablo kolonlarını doğrula; `dataColumns` yoksa None (varsayılan başlıklar)"""
+    raw_columns = raw.get("dataColumns")
+    if raw_columns is None:
+        return None
+    if not isinstance(raw_columns, list):
+        errors.append((item_id, "dataColumns", "liste olmalı"))
+        return None
+
+    columns = []
+    for position, column in enumerate(raw_columns):
+        field = f"dataColumns[{position}]"
+        if not isinstance(column, dict):
+            errors.append((item_id, field, "nesne olmalı"))
+            continue
+        value = column.get("value")
+        if not isinstance(value, str) or not value:
+            errors.append((item_id, f"{field}.value", "boş olmayan metin olmalı"))
+            continue
+        label = column.get("label", value)
+        width = column.get("width", DEFAULT_COLUMN_WIDTH)
+        text_align = column.get("textAlign", "left")
+        if not _is_number(width):
+            errors.append((item_id, f"{field}.width", f"sayı olmalı, {width!r} geldi"))
+        if text_align not in ENUM_FIELDS["textAlign"]:
+            errors.append((item_id, f"{field}.textAlign", f"{'/'.join(ENUM_FIELDS['textAlign'])} olmalı"))
+        columns.append(TableColumn(str(label), value, width, text_align))
+    return columns
+
+
+def validate_item(raw, index, errors):
+    """Tek bir `pageItems` elemanını doğrula; hatalar `errors`'a eklenir, geçerliyse `LayoutItem` döner"""
+    if not isinstance(raw, dict):
+        errors.append((f"#{index}", "", "eleman nesne olmalı"))
+        return None
+
+    item_id = raw.get("id")
+    item_id = item_id if isinstance(item_id, str) and item_id else f"#{index}"
+    error_count = len(errors)
+
+    value = raw.get("value")
+    if not isinstance(value, str):
+        errors.append((item_id, "value", "metin olmalı"))
+
+    item_type = raw.get("type", "text")
+    if item_type not in EMITTED_TYPES:
+        errors.append((item_id, "type", f"{'/'.join(EMITTED_TYPES)} olmalı, {item_type!r} geldi"))
+
+    position = _check_box(raw, "position", ("x", "y"), errors, item_id)
+    size = _check_box(raw, "size", ("width", "height"), errors, item_id)
+
+    font_size = raw.get("fontSize", DEFAULTS["fontSize"])
+    if not _is_number(font_size) or font_size <= 0:
+        errors.append((item_id, "fontSize", f"pozitif sayı olmalı, {font_size!r} geldi"))
+    font_family = raw.get("fontFamily", DEFAULTS["fontFamily"])
+    if not isinstance(font_family, str) or not font_family:
+        errors.append((item_id, "fontFamily", "boş olmayan metin olmalı"))
+    elif any(char in font_family for char in FONT_FAMILY_FORBIDDEN):
+        errors.append((item_id, "fontFamily", f"{' '.join(FONT_FAMILY_FORBIDDEN)} karakterlerini içeremez"))
+
+    enums = {}
+    for field, allowed in ENUM_FIELDS.items():
+        enums[field] = raw.get(field, DEFAULTS[field])
+        if enums[field] not in allowed:
+            errors.append((item_id, field, f"{'/'.join(allowed)} olmalı, {enums[field]!r} geldi"))
+
+    columns = _check_columns(raw, errors, item_id) if item_type == "table" else None
+
+    if len(errors) != error_count:
+        return None
+
+    item = LayoutItem()
+    item.index = index
+    item.id = item_id
+    item.label = str(raw.get("label", value))
+    item.value = value
+    item.type = item_type
+    item.x, item.y = position
+    item.width, item.height = size
+    item.font_family = font_family
+    item.font_size = font_size
+    item.color = raw.get("color")
+    item.text_align = enums["textAlign"]
+    item.font_weight = enums["fontWeight"]
+    item.font_style = enums["fontStyle"]
+    item.text_decoration = enums["textDecoration"]
+    item.columns = columns
+    item.repeat = bool(raw.get("repeatOnEveryPage"))
+    item.source = raw
+    return item
+
+
+def item_columns(item):
+    """Tablo kaydının `TableColumn` listesi (`dataColumns` yoksa veya boşsa varsayılan kolonlar)"""
+    return item.columns or DEFAULT_COLUMNS
+
+
+def table_measure(item):
+    """Tablo kaydının `(kolon anahtarları, TableMeasure)` çifti (`dataColumns` yoksa varsayılan kolonlar)"""
+    columns = item_columns(item)
+    keys = [column.value for column in columns]
+    widths = [column.width for column in columns]
+    return keys, TableMeasure(widths, item.width, item.font_family, item.font_size, item.font_weight)
+
+
+class Layout:
+    """Bir kez doğrulanmış şablon: kayıtlar, normalize sözlükler ve render başına gereken ön hesaplar.
+
+    `items` doküman sırasındaki `LayoutItem` kayıtlarıdır, `y_order` ise
+    y konumuna göre sıralı indekslerdir. Kaydırma indeksi (`ItemIndex`) ve
+    kaydırmasız `top` değerleri bir kez kurulur; render'da sadece tablo
+    kayıtları üzerinden satır sayıları, kayan satırların yükseklikleri ve
+    kaydırmalar hesaplanır.
+    """
+
+    def __init__(self, items, page_size="A4"):
+        self.items = items
+        self.page_size = page_size
+        self.page_items = [item.to_dict() for item in items]
+        self.tables = [item for item in items if item.type == "table"]
+        self.y_order = sorted(range(len(items)), key=lambda index: items[index].y)
+        self.index = ItemIndex([item.y for item in items])
+        self.base_tops = [str(item.y) for item in items]
+        self.measures = [(item, *table_measure(item)) for item in self.tables]
+
+    def row_counts(self, data=None):
+        """Her tablo anahtarı için satır sayısı (aynı anahtarda ilk tablo geçerli)"""
+        row_counts = {}
+        for item in self.tables:
+            if item.value not in row_counts:
+                row_counts[item.value] = table_row_count(self.page_items[item.index], data)
+        return row_counts
+
+    def row_heights(self, data=None, parallel=None):
+        """Satırları kayan tablolar için anahtar -> satır yükseklikleri (aynı anahtarda ilk tablo geçerli).
+
+        Tüm hücreleri tek satıra sığan tablolar sözlüğe girmez; bunlar
+        sabit `ROW_HEIGHT` modeliyle yerleşir. `parallel` (anahtar ->
+        `parallel_rows.ParallelRows`) verilen tablolar worker'larda ölçülür.
+        """
+        row_heights = {}
+        if not data:
+            return row_heights
+        measured = set()
+        for item, keys, measure in self.measures:
+            if item.value in measured:
+                continue
+            measured.add(item.value)
+            table_data = data.get(item.value)
+            if not isinstance(table_data, list) or not table_data:
+                continue
+            pool = parallel.get(item.value) if parallel else None
+            if pool is not None:
+                heights = pool.row_heights(measure, keys)
+            else:
+                heights = measure.row_heights(table_columns(table_data, keys))
+            if heights is not None:
+                row_heights[item.value] = heights
+        return row_heights
+
+    def tops(self, row_counts, row_heights=None):
+        """Eleman sırasına göre son `top` değerleri (metin); tablo büyümediyse ön hesaplı liste"""
+        shifts_below = []
+        for item in self.tables:
+            row_count = row_counts.get(item.value, 0)
+            if not row_count:
+                continue
+            heights = row_heights.get(item.value) if row_heights else None
+            difference = table_actual_height(row_count, heights) - item.height
+            if difference > 0:
+                shifts_below.append((item.y + item.height, difference))
+
+        if not shifts_below:
+            return self.base_tops
+        shifts = self.index.cumulative_shifts(shifts_below)
+        return [
+            str(item.y + shift) if shift else top
+            for item, shift, top in zip(self.items, shifts, self.base_tops)
+        ]
+
+
+def load_layout(json_data):
+    """Şablon JSON'unu doğrulayıp `Layout`'a çevir; tüm hatalar tek `LayoutError` ile bildirilir"""
+    if not isinstance(json_data, dict):
+        raise LayoutError([("", "", "şablon bir JSON nesnesi olmalı")])
+
+    errors = []
+    raw_items = json_data.get("pageItems", [])
+    if not isinstance(raw_items, list):
+        raise LayoutError([("", "pageItems", "liste olmalı")])
+
+    page_size = json_data.get("pageSize", "A4")
+    if not isinstance(page_size, str):
+        errors.append(("", "pageSize", "metin olmalı"))
+
+    items = [validate_item(raw, index, errors) for index, raw in enumerate(raw_items)]
+    if errors:
+        raise LayoutError(errors)
+    return Layout(items, page_size)
+
+
+_layout_cache = OrderedDict()
+
+
+def get_layout(json_data):
+    """`load_layout` sonucunu içerik özetine göre önbellekten döndür.
+
+    Aynı şablon her render'da yeniden doğrulanmaz; anahtar şablonun
+    kanonik JSON'unun sha256 özetidir, en fazla `LAYOUT_CACHE_SIZE` şablon
+    tutulur. Dönen `Layout` paylaşılır, değiştirilmemelidir.
+    """
+    try:
+        canonical = json.dumps(json_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    except (TypeError, ValueError):
+        return load_layout(json_data)
+    key = hashlib.sha256(canonical.encode("utf-8")).digest()
+
+    layout = _layout_cache.get(key)
+    if layout is not None:
+        _layout_cache.move_to_end(key)
+        return layout
+
+    layout = load_layout(json_data)
+    _layout_cache[key] = layout
+    while len(_layout_cache) > LAYOUT_CACHE_SIZE:
+        _layout_cache.popitem(last=False)
+    return layout
@@ -1,3 +1,4 @@
+from event_log import configure_logging
 from html_process import process_html, load_file_content, save_html
 from json_process import process_json_to_html
 
@@ -96,6 +97,7 @@ def test_json_processor():
 
 
 def main():
+    configure_logging()
     print("Invoice Processor Test Suite")
     print("============================")
     
@@ -0,0 +1,415 @@
+import gzip
+import io
+import json
+import os
+import time
+
+from event_log import log_event, logger_name
+
+# Dosya başına sıkıştırma türleri ve çıktı adına eklenen uzantılar
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst"}
+COMPRESSIONS = tuple(COMPRESSION_SUFFIXES)
+
+# Yazma tamponu; küçük faturalar tek tek sistem çağrısına dönüşmez
+DEFAULT_BUFFER_SIZE = 1024 * 1024
+
+# Shard dosyası bu boyuta ulaşınca yeni shard açılır
+DEFAULT_SHARD_BYTES = 256 * 1024 * 1024
+
+# tar üyeleri bu boyutta bloklara tamamlanır (`tarfile.BLOCKSIZE`)
+TAR_BLOCK_SIZE = 512
+
+LOG_NAME = logger_name("output")
+
+
+def require_zstandard():
+    """zstandard'ı içe aktar; kurulu değilse anlaşılır bir hata ver"""
+    try:
+        import zstandard
+    except ImportError:
+        raise RuntimeError("zstd sıkıştırma için zstandard gerekli: pip install zstandard")
+    return zstandard
+
+
+def check_compression(compression):
+    """Sıkıştırma türünü doğrula (None: sıkıştırma yok)"""
+    if compression is not None and compression not in COMPRESSION_SUFFIXES:
+        raise ValueError(f"Geçersiz sıkıştırma: {compression} ({'/'.join(COMPRESSIONS)} olmalı)")
+    if compression == "zstd":
+        require_zstandard()
+    return compression
+
+
+def compression_for_path(path):
+    """Dosya adının uzantısından sıkıştırma türü (`.gz` → gzip, `.zst` → zstd, diğerleri None)"""
+    for compression, suffix in COMPRESSION_SUFFIXES.items():
+        if path.endswith(suffix):
+            return compression
+    return None
+
+
+def compress(payload, compression):
+    """Bytes içeriği sıkıştır (gzip'te mtime sabit: aynı içerik aynı bytes)"""
+    if compression == "gzip":
+        return gzip.compress(payload, compresslevel=6, mtime=0)
+    if compression == "zstd":
+        return require_zstandard().ZstdCompressor(level=3).compress(payload)
+    return payload
+
+
+def decompress(payload, compression):
+    """`compress` çıktısını geri aç"""
+    if compression == "gzip":
+        return gzip.decompress(payload)
+    if compression == "zstd":
+        return require_zstandard().ZstdDecompressor().decompress(payload)
+    return payload
+
+
+def open_output(path, buffer_size=DEFAULT_BUFFER_SIZE):
+    """Tek çıktı dosyasını tamponlu metin modunda aç; `.gz`/`.zst` uzantısında sıkıştırarak yazar"""
+    compression = compression_for_path(path)
+    if compression == "gzip":
+        # zlib çıktısı zaten blok blok biriktiği için ek tampon gerekmez
+        return io.TextIOWrapper(gzip.GzipFile(path, "wb", compresslevel=6, mtime=0), encoding="utf-8")
+    if compression == "zstd":
+        zstandard = require_zstandard()
+        return zstandard.open(path, "wt", cctx=zstandard.ZstdCompressor(level=3), encoding="utf-8")
+    return open(path, "w", encoding="utf-8", buffering=buffer_size)
+
+
+def encode_member(name, content, compression):
+    """Yazıcıya gelen içeriği (ad, bytes) çiftine çevir.
+
+    Sadece metin içerik (HTML) sıkıştırılır ve adına uzantı eklenir;
+    bytes içerik (görseller, PDF) zaten sıkıştırılmış kabul edilip olduğu
+    gibi yazılır.
+    """
+    if isinstance(content, bytes):
+        return name, content
+    payload = content.encode("utf-8")
+    if compression is None:
+        return name, payload
+    return name + COMPRESSION_SUFFIXES[compression], compress(payload, compression)
+
+
+class DirectoryWriter:
+    """Her faturayı klasöre ayrı bir dosya olarak yazar (içerik str veya bytes).
+
+    `compression` verilirse HTML dosyaları gzip/zstd ile sıkıştırılıp
+    `.gz`/`.zst` uzantısıyla yazılır. Her dosya tek bir `write` ile yazılır.
+    """
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.compression = check_compression(compression)
+        os.makedirs(path, exist_ok=True)
+
+    def write(self, name, content):
+        name, payload = encode_member(name, content, self.compression)
+        path = os.path.join(self.path, name)
+        if os.sep in name or "/" in name:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as file:
+            file.write(payload)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class MemoryWriter(DirectoryWriter):
+    """Çıktıları bellekte `ad → bytes` olarak tutan yazıcı (servis ve testler için)"""
+
+    def __init__(self, compression=None):
+        self.compression = check_compression(compression)
+        self.files = {}
+
+    def write(self, name, content):
+        name, payload = encode_member(name, content, self.compression)
+        self.files[name] = payload
+
+    def read(self, name):
+        """Yazılan içeriği (sıkıştırma açılmış bytes) döndür; ad sıkıştırma uzantısı olmadan da verilebilir"""
+        if name not in self.files and self.compression is not None:
+            name += COMPRESSION_SUFFIXES[self.compression]
+        return decompress(self.files[name], compression_for_path(name))
+
+
+class TarWriter(DirectoryWriter):
+    """Faturaları tek bir tar (veya .tar.gz) arşivine sırayla ekler"""
+
+    def __init__(self, path, compression=None):
+        self.path = path
+        self.compression = check_compression(compression)
+        # tarfile/zipfile sadece arşiv yazıcısı açıldığında yüklenir; render modüllerinin açılışı etkilenmez
+        import tarfile
+
+        mode = "w:gz" if path.endswith((".tar.gz", ".tgz")) else "w"
+        self.archive = tarfile.open(path, mode)
+
+    def write(self, name, content):
+        name, payload = encode_member(name, content, self.compression)
+        info = self.archive.tarinfo(name)
+        info.size = len(payload)
+        info.mtime = int(time.time())
+        self.archive.addfile(info, io.BytesIO(payload))
+        # tarfile yazarken üye listesine ihtiyaç duymaz; tutulursa bellek kayıt sayısıyla büyür
+        self.archive.members.clear()
+
+    def close(self):
+        self.archive.close()
+
+
+class ZipWriter(DirectoryWriter):
+    """Faturaları tek bir zip arşivine sırayla ekler.
+
+    Zip'in merkezi dizini arşiv sonunda yazıldığından dosya başına küçük bir
+    kayıt bellekte tutulur; tamamen sabit bellek için tar tercih edilmelidir.
+    `compression` verilirse üyeler zaten sıkıştırılmış olduğundan deflate
+    yerine olduğu gibi (stored) yazılır.
+    """
+
+    def __init__(self, path, compression=None):
+        import zipfile
+
+        self.path = path
+        self.compression = check_compression(compression)
+        self.archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self.stored = zipfile.ZIP_STORED
+
+    def write(self, name, content):
+        if self.compression is None:
+            self.archive.writestr(name, content)
+            return
+        name, payload = encode_member(name, content, self.compression)
+        self.archive.writestr(name, payload, compress_type=self.stored)
+
+    def close(self):
+        self.archive.close()
+
+
+def shard_file_name(number, shard_format):
+    """Shard sırasından dosya adı (`shard-00003.tar`)"""
+    return f"shard-{number:05d}.{shard_format}"
+
+
+class ShardWriter(DirectoryWriter):
+    """Faturaları boyutla dönen, sadece eklemeli tar/zip shard'larına yazar.
+
+    Klasörde `shard-00000.tar`, `shard-00001.tar`, ... oluşur; mevcut
+    shard'lar asla yeniden açılmaz, yeni çalıştırma sıradaki numaradan
+    devam eder. Her shard'ın yanındaki `.idx` dosyası üye başına bir JSON
+    satırı (`name`, `member`, `offset`, `size`) tutar; `ShardIndex` bir
+    faturayı shard'ı taramadan tek `seek` + `read` ile okur. Üyeler
+    sıkıştırılmadan (zip'te stored) yazıldığından `offset` verinin shard
+    içindeki konumudur; sıkıştırma `compression` ile üye başına yapılır.
+    Shard ve indeks dosyaları `buffer_size` tamponla yazılır. İndeks
+    satırları bellekte toplanır; her `buffer_size`'lık grup (ve shard
+    kapanışında kalanlar) shard `flush` + `fsync` ile diske indikten sonra
+    yazılır, böylece indeks diskte hiç yazılmamış bir üyeyi gösteremez.
+    """
+
+    def __init__(self, path, shard_format="tar", max_shard_bytes=DEFAULT_SHARD_BYTES, compression=None,
+                 buffer_size=DEFAULT_BUFFER_SIZE):
+        if shard_format not in ("tar", "zip"):
+            raise ValueError(f"Geçersiz shard biçimi: {shard_format} (tar/zip olmalı)")
+        self.path = path
+        self.shard_format = shard_format
+        self.max_shard_bytes = max_shard_bytes
+        self.compression = check_compression(compression)
+        self.buffer_size = buffer_size
+        os.makedirs(path, exist_ok=True)
+        self.number = 0
+        self.file = None
+        self.members = 0
+        self.pending_index = []
+        self.pending_bytes = 0
+
+    def _open_shard(self):
+        # Önceki çalıştırmaların shard'ları atlanır, sadece yeni dosya açılır
+        while True:
+            shard_path = os.path.join(self.path, shard_file_name(self.number, self.shard_format))
+            if not os.path.exists(shard_path):
+                break
+            self.number += 1
+        self.shard_path = shard_path
+        self.file = open(shard_path, "xb", buffering=self.buffer_size)
+        self.index = open(shard_path + ".idx", "x", encoding="utf-8", buffering=self.buffer_size)
+        if self.shard_format == "tar":
+            import tarfile
+
+            self.archive = tarfile.open(fileobj=self.file, mode="w")
+        else:
+            import zipfile
+
+            self.archive = zipfile.ZipFile(self.file, "w", compression=zipfile.ZIP_STORED)
+            self.zip_info = zipfile.ZipInfo
+        self.members = 0
+
+    def _flush_index(self):
+        """Bekleyen indeks satırlarını, gösterdikleri veri diske indikten sonra yaz"""
+        if not self.pending_index:
+            return
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.index.write("".join(self.pending_index))
+        self.index.flush()
+        self.pending_index.clear()
+        self.pending_bytes = 0
+
+    def _close_shard(self):
+        self._flush_index()
+        self.archive.close()
+        size = self.file.tell()
+        self.file.close()
+        self.index.close()
+        self.file = None
+        log_event(LOG_NAME, "shard_closed", path=self.shard_path, members=self.members, bytes=size)
+        self.number += 1
+
+    def write(self, name, content):
+        member, payload = encode_member(name, content, self.compression)
+        if self.file is not None and self.members and self.file.tell() + len(payload) > self.max_shard_bytes:
+            self._close_shard()
+        if self.file is None:
+            self._open_shard()
+
+        if self.shard_format == "tar":
+            info = self.archive.tarinfo(member)
+            info.size = len(payload)
+            info.mtime = int(time.time())
+            self.archive.addfile(info, io.BytesIO(payload))
+            self.archive.members.clear()
+            # Üye verisi 512 baytlık bloklara tamamlanır; veri, tamamlanmış bloğun başındadır
+            padded = -(-len(payload) // TAR_BLOCK_SIZE) * TAR_BLOCK_SIZE
+            offset = self.archive.offset - padded
+        else:
+            info = self.zip_info(member, time.localtime()[:6])
+            self.archive.writestr(info, payload)
+            offset = self.file.tell() - len(payload)
+
+        line = json.dumps({"name": name, "member": member, "offset": offset, "size": len(payload)},
+                          ensure_ascii=False) + "\n"
+        self.pending_index.append(line)
+        self.pending_bytes += len(line)
+        self.members += 1
+        if self.pending_bytes >= self.buffer_size:
+            self._flush_index()
+
+    def close(self):
+        if self.file is not None:
+            self._close_shard()
+
+
+class ShardIndex:
+    """`ShardWriter` klasörünün indeksleri: fatura adından shard içindeki konuma.
+
+    Yarım kalmış (yazıcı çökmesiyle sonlanmış) son indeks satırı yok
+    sayılır. `ShardWriter` indeks satırlarını shard verisi `fsync` ile
+    diske indikten sonra yazar; ayrıca shard dosyasının boyutunu aşan
+    (verisi yazılmamış) kayıtlar da indekse alınmaz.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        for file_name in sorted(os.listdir(path)):
+            if not file_name.endswith(".idx"):
+                continue
+            shard_path = os.path.join(path, file_name[:-len(".idx")])
+            try:
+                shard_size = os.path.getsize(shard_path)
+            except OSError:
+                continue
+            with open(os.path.join(path, file_name), "r", encoding="utf-8") as file:
+                for line in file:
+                    if not line.endswith("\n"):
+                        break
+                    entry = json.loads(line)
+                    if entry["offset"] + entry["size"] > shard_size:
+                        continue
+                    self.entries[entry["name"]] = (shard_path, entry["member"], entry["offset"], entry["size"])
+
+    def __contains__(self, name):
+        return name in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def names(self):
+        return self.entries.keys()
+
+    def read(self, name):
+        """Faturanın içeriğini (sıkıştırma açılmış bytes) shard'ı taramadan oku"""
+        shard_path, member, offset, size = self.entries[name]
+        with open(shard_path, "rb") as file:
+            file.seek(offset)
+            payload = file.read(size)
+        return decompress(payload, compression_for_path(member))
+
+
+class ChunkedSink:
+    """`render_to` parçalarını biriktirip `chunk_size` karakterlik bloklar halinde ileten sink.
+
+    `write` bloğu alacak çağrılabilir nesnedir (ör. `socket.sendall`,
+    ikili dosyanın `write` metodu); `encoding` verilirse bloklar bytes'a
+    çevrilir. Küçük parçalar (eleman açılışları, `top` değerleri) tek tek
+    sistem çağrısına dönüşmez, bellekte en fazla bir blok tutulur.
+    """
+
+    def __init__(self, write, chunk_size=64 * 1024, encoding="utf-8"):
+        self.target = write
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.parts = []
+        self.pending = 0
+        self.written = 0
+
+    def write(self, text):
+        self.parts.append(text)
+        self.pending += len(text)
+        if self.pending >= self.chunk_size:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if not self.parts:
+            return
+        block = "".join(self.parts)
+        self.parts.clear()
+        self.pending = 0
+        self.written += len(block)
+        self.target(block.encode(self.encoding) if self.encoding else block)
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_writer(target, compression=None, shard_size=None, shard_format="tar"):
+    """Hedefe göre yazıcı seç: .tar/.tar.gz/.tgz, .zip, `:memory:` veya klasör.
+
+    `shard_size` (bayt) verilirse hedef klasörü `shard_size`'da dönen
+    `shard_format` shard'larına yazılır. `compression` (gzip/zstd) HTML
+    içeriklerini dosya başına sıkıştırır.
+    """
+    if shard_size:
+        return ShardWriter(target, shard_format, shard_size, compression)
+    if target == ":memory:":
+        return MemoryWriter(compression)
+    if target.endswith((".tar", ".tar.gz", ".tgz")):
+        return TarWriter(target, compression)
+    if target.endswith(".zip"):
+        return ZipWriter(target, compression)
+    return DirectoryWriter(target, compression)
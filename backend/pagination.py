@@ -0,0 +1,137 @@
+from bisect import bisect_right
+from itertools import accumulate
+
+from layout import (
+    CONTINUATION_TOP,
+    EMITTED_TYPES,
+    PAGE_BOTTOM_MARGIN,
+    PAGE_HEIGHT,
+    ROW_HEIGHT,
+    TABLE_HEADER_HEIGHT,
+)
+
+# Her sayfada orijinal konumunda tekrar edilecek elemanlar için item alanı
+REPEAT_KEY = "repeatOnEveryPage"
+
+# Tekrar eden elemanlarla devam eden tablo arasındaki boşluk
+REPEAT_GAP = 10
+
+
+def row_offsets(row_count, row_heights=None):
+    """Satırların tablo gövdesi başına göre birikimli alt kenarları (başta 0); sabit modelde `range`"""
+    if row_heights is None:
+        return range(0, (row_count + 1) * ROW_HEIGHT, ROW_HEIGHT)
+    return list(accumulate(row_heights, initial=0))
+
+
+def paginate_items(page_items, row_counts, page_height=PAGE_HEIGHT, order=None, row_heights=None):
+    """Elemanları ve tablo satırlarını sayfalara dağıt.
+
+    Elemanlar y konumuna göre tek geçişte işlenir. Sayfaya sığmayan tablo
+    satırları sonraki sayfalara bölünür (her parçada başlık tekrar edilir);
+    `row_heights` (bkz. `Layout.row_heights`) verilen tablolarda ölçülen
+    satır yükseklikleri, diğerlerinde sabit satır yüksekliği kullanılır.
+    Sayfaya sığan satır sayısı birikimli yüksekliklerde `bisect` ile
+    bulunur; devam sayfasına en az bir satır yerleşir. Bir tablonun
+    altında kalan elemanlar tablonun bittiği sayfaya, tablo sonuna göre
+    kaydırılarak yerleşir; birden fazla tablonun kaydırmaları birikir. Kaydırma sonucu alt kenarı sayfa
+    sınırını (`PAGE_HEIGHT - PAGE_BOTTOM_MARGIN`) aşan eleman, altındaki
+    elemanlarla birlikte sonraki sayfaya devam başlangıcından (tekrar eden
+    elemanların altından) yerleşir. `repeatOnEveryPage` işaretli
+    elemanlar her sayfada orijinal konumlarında yer alır; devam sayfalarındaki
+    tablo parçaları bu elemanların altından başlar.
+
+    Sonuç sayfa listesidir; her sayfa eleman sırasına göre sıralı
+    `(item indeksi, top, satır başlangıcı, satır sonu)` demetleri içerir
+    (tablo olmayan elemanlarda satır aralığı `None`). `order` verilirse
+    (ör. `Layout.y_order`) elemanlar yeniden sıralanmaz.
+    """
+    limit = page_height - PAGE_BOTTOM_MARGIN
+
+    # Devam sayfalarında tablo, tekrar eden elemanların (ör. logo) altından başlar
+    repeated = [
+        index for index, item in enumerate(page_items)
+        if item.get(REPEAT_KEY) and item.get("type", "text") in EMITTED_TYPES
+    ]
+    continuation_top = CONTINUATION_TOP
+    for index in repeated:
+        item = page_items[index]
+        continuation_top = max(continuation_top, item["position"]["y"] + item["size"]["height"] + REPEAT_GAP)
+    continuation_space = limit - continuation_top - TABLE_HEADER_HEIGHT
+
+    pages = [[]]
+
+    # Orijinal tablo altı -> (sayfa, y kaydırması); altı bilinen en yakın tablo geçerli
+    flow_bottoms = [float("-inf")]
+    flow_states = [(0, 0)]
+
+    if order is None:
+        order = sorted(range(len(page_items)), key=lambda index: page_items[index]["position"]["y"])
+
+    for index in order:
+        item = page_items[index]
+        item_type = item.get("type", "text")
+        if item_type not in EMITTED_TYPES:
+            continue
+
+        if item.get(REPEAT_KEY):
+            continue
+
+        y = item["position"]["y"]
+        page, shift = flow_states[bisect_right(flow_bottoms, y) - 1]
+        top = y + shift
+
+        if item_type != "table":
+            if shift and top + item["size"]["height"] > limit:
+                # Kaydırılınca sayfa sonunu aşan eleman (ve altındakiler) yeni sayfanın başından devam eder
+                page += 1
+                if page == len(pages):
+                    pages.append([])
+                shift = continuation_top - y
+                top = continuation_top
+                position = bisect_right(flow_bottoms, y)
+                flow_bottoms.insert(position, y)
+                flow_states.insert(position, (page, shift))
+            pages[page].append((index, top, None, None))
+            continue
+
+        row_count = row_counts.get(item["value"], 1)
+        offsets = row_offsets(row_count, row_heights.get(item["value"]) if row_heights else None)
+        capacity = max(bisect_right(offsets, limit - top - TABLE_HEADER_HEIGHT) - 1, 0)
+
+        if row_count <= capacity:
+            pages[page].append((index, top, 0, row_count))
+            end_page = page
+            end_y = top + TABLE_HEADER_HEIGHT + offsets[row_count]
+        else:
+            # İlk sayfaya sığan satırlar, kalanlar devam sayfalarına
+            start = capacity
+            if capacity:
+                pages[page].append((index, top, 0, capacity))
+            end_page = page
+            while start < row_count:
+                end_page += 1
+                if end_page == len(pages):
+                    pages.append([])
+                end = bisect_right(offsets, offsets[start] + continuation_space, start) - 1
+                end = min(row_count, max(end, start + 1))
+                pages[end_page].append((index, continuation_top, start, end))
+                end_y = continuation_top + TABLE_HEADER_HEIGHT + offsets[end] - offsets[start]
+                start = end
+
+        table_bottom = y + item["size"]["height"]
+        end_shift = end_y - table_bottom
+        if end_page == page:
+            # Aynı sayfada tablo küçüldüyse alttaki elemanlar yukarı çekilmez
+            end_shift = max(end_shift, shift)
+
+        position = bisect_right(flow_bottoms, table_bottom)
+        flow_bottoms.insert(position, table_bottom)
+        flow_states.insert(position, (end_page, end_shift))
+
+    for page in pages:
+        for index in repeated:
+            page.append((index, page_items[index]["position"]["y"], None, None))
+        page.sort(key=lambda placement: (placement[0], placement[2] or 0))
+
+    return pages
@@ -0,0 +1,155 @@
+import os
+from collections import deque
+
+from layout import ROW_HEIGHT
+from text_metrics import table_columns
+
+# `row_workers=None` iken bu satır sayısından büyük tablolar process havuzunda üretilir
+PARALLEL_MIN_ROWS = 20000
+
+# Bir worker görevinde üretilen yaklaşık satır sayısı (görev başına IPC maliyeti bununla bölünür)
+DEFAULT_TASK_ROWS = 5000
+
+# Worker'daki satırlar; fork ile ana process'ten kopyalanmadan devralınır
+_shared_rows = None
+
+
+def _init_worker(table_data):
+    """Worker başlangıcında (fork'ta) tablonun satırlarını bir kez yerleştir"""
+    global _shared_rows
+    _shared_rows = table_data
+
+
+def _run_task(function, args, bounds, rows=None, offset=0):
+    """Worker görevi: her `(başlangıç, son)` aralığının satır dilimi için `function(dilim, *args)`.
+
+    Satırlar worker'a devralınmadıysa (spawn) görevle birlikte `rows`
+    olarak gelir; aralıklar bu durumda `offset` kadar kaydırılır.
+    """
+    table_data = _shared_rows if rows is None else rows
+    return [function(table_data[start - offset:end - offset], *args) for start, end in bounds]
+
+
+def _render_rows(table_data, row_renderer):
+    return row_renderer.render_rows(table_data)
+
+
+def _row_heights(table_data, measure, keys):
+    return measure.row_heights(table_columns(table_data, keys))
+
+
+def _pool_context():
+    """Satırları kopyalamadan paylaşmak için fork; desteklenmiyorsa platform varsayılanı"""
+    import multiprocessing
+
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork"), True
+    return multiprocessing.get_context(), False
+
+
+def row_ranges(row_count, chunk_rows):
+    """`[0, row_count)` aralığını `chunk_rows` satırlık ardışık parçalara böl"""
+    return [(start, min(start + chunk_rows, row_count)) for start in range(0, row_count, chunk_rows)]
+
+
+def resolve_row_workers(row_count, row_workers=None):
+    """Tablo için kullanılacak process sayısı; 0 tablonun aynı process'te seri üretileceği anlamına gelir.
+
+    `row_workers=None` otomatik moddur: tablo `PARALLEL_MIN_ROWS`'tan
+    küçükse, makine tek çekirdekliyse veya zaten bir worker process'te
+    (ör. `batch_process` havuzu) çalışılıyorsa seri üretilir. Görev
+    sayısından fazla process açılmaz.
+    """
+    if row_workers is None:
+        if row_count < PARALLEL_MIN_ROWS:
+            return 0
+        # multiprocessing sadece büyük tablolarda yüklenir (kısa ömürlü process'lerin açılışı için)
+        import multiprocessing
+
+        if multiprocessing.parent_process() is not None:
+            return 0
+        row_workers = os.cpu_count() or 1
+    workers = min(row_workers, -(-row_count // DEFAULT_TASK_ROWS))
+    return workers if workers > 1 else 0
+
+
+class ParallelRows:
+    """Tek bir tablonun satırlarını process havuzunda parça parça işleyen yardımcı.
+
+    Satır yükseklikleri (`row_heights`) ve gövde HTML'i (`iter_rows`) aynı
+    havuzda üretilir. Aralıklar `DEFAULT_TASK_ROWS` satırlık görevlerde
+    toplanıp worker'lara dağıtılır, sonuçlar aralık sırasıyla döner; gövde
+    üretiminde aynı anda en fazla `workers * 2` görev bekler, böylece
+    bellekte tüm gövde birikmez. Her aralığın çıktısı
+    `RowRenderer.render_rows` ile aynıdır; ardışık aralıkların birleşimi
+    tablonun seri gövdesiyle byte düzeyinde aynıdır. Fork desteklenen
+    sistemlerde satırlar worker'lara kopyalanmadan devralınır,
+    diğerlerinde görev başına kendi satır dilimiyle gönderilir.
+    """
+
+    def __init__(self, table_data, workers, task_rows=DEFAULT_TASK_ROWS):
+        from concurrent.futures import ProcessPoolExecutor
+
+        context, inherit = _pool_context()
+        self.table_data = table_data
+        self.workers = workers
+        self.task_rows = task_rows
+        self.inherit = inherit
+        self.pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(table_data if inherit else None,),
+        )
+
+    def _tasks(self, bounds):
+        """Ardışık aralıkları yaklaşık `task_rows` satırlık görevlere grupla"""
+        task = []
+        task_size = 0
+        for start, end in bounds:
+            task.append((start, end))
+            task_size += end - start
+            if task_size >= self.task_rows:
+                yield task
+                task = []
+                task_size = 0
+        if task:
+            yield task
+
+    def _submit(self, function, args, task):
+        if self.inherit:
+            return self.pool.submit(_run_task, function, args, task)
+        first, last = task[0][0], task[-1][1]
+        return self.pool.submit(_run_task, function, args, task, self.table_data[first:last], first)
+
+    def row_heights(self, measure, keys):
+        """`TableMeasure.row_heights` sonucunu görevlere bölüp worker'larda hesapla"""
+        bounds = row_ranges(len(self.table_data), self.task_rows)
+        futures = [self._submit(_row_heights, (measure, keys), task) for task in self._tasks(bounds)]
+        parts = [heights for future in futures for heights in future.result()]
+        if all(heights is None for heights in parts):
+            return None
+        # Hiç kaymayan görev aralıkları sabit yükseklikle doldurulur
+        row_heights = []
+        for (start, end), heights in zip(bounds, parts):
+            row_heights.extend([ROW_HEIGHT] * (end - start) if heights is None else heights)
+        return row_heights
+
+    def iter_rows(self, row_renderer, bounds):
+        """Her `(başlangıç, son)` aralığının satır HTML'ini sırayla üret"""
+        in_flight = deque()
+        for task in self._tasks(bounds):
+            in_flight.append(self._submit(_render_rows, (row_renderer,), task))
+            if len(in_flight) >= self.workers * 2:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
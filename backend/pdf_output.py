@@ -0,0 +1,118 @@
+import os
+from collections import OrderedDict
+
+# Render edilen faturaların birleştirilmeden önce yazıldığı ara klasör
+MERGE_PARTS_DIR = ".pdf_parts"
+
+
+def require_weasyprint():
+    """weasyprint'i içe aktar; kurulu değilse anlaşılır bir hata ver"""
+    try:
+        import weasyprint
+    except ImportError:
+        raise RuntimeError("PDF çıktısı için weasyprint gerekli: pip install weasyprint")
+    return weasyprint
+
+
+def pdf_file_name(html_name):
+    """`.html` çıktı adını `.pdf` adına çevir"""
+    return os.path.splitext(html_name)[0] + ".pdf"
+
+
+class PdfRenderer:
+    """HTML'den PDF üreten, font ve görsel kaynaklarını dokümanlar arasında paylaşan render edici.
+
+    Font yapılandırması (fontconfig taraması) bir kez yapılır; şablondaki
+    logo gibi tekrar eden görseller `fetch` ile önbelleğe alınır ve her
+    dokümanda yeniden okunmaz. Process başına bir örnek `get_renderer`
+    ile sıcak tutulur.
+    """
+
+    def __init__(self, base_url=None, max_resources=256):
+        weasyprint = require_weasyprint()
+        from weasyprint.text.fonts import FontConfiguration
+
+        self.weasyprint = weasyprint
+        self.base_url = base_url
+        self.font_config = FontConfiguration()
+        self.max_resources = max_resources
+        self.resources = OrderedDict()
+        self.stats = {"documents": 0, "pages": 0, "resource_hits": 0, "resource_misses": 0}
+
+    def fetch(self, url):
+        """weasyprint url_fetcher'ı: kaynağı bir kez oku, sonra bellekten ver"""
+        cached = self.resources.get(url)
+        if cached is not None:
+            self.resources.move_to_end(url)
+            self.stats["resource_hits"] += 1
+            return dict(cached)
+
+        self.stats["resource_misses"] += 1
+        result = self.weasyprint.default_url_fetcher(url)
+        if "file_obj" in result:
+            file_obj = result.pop("file_obj")
+            try:
+                result["string"] = file_obj.read()
+            finally:
+                file_obj.close()
+
+        self.resources[url] = result
+        if len(self.resources) > self.max_resources:
+            self.resources.popitem(last=False)
+        return dict(result)
+
+    def render(self, html, base_url=None):
+        """HTML'i sayfalara ayrılmış bir weasyprint dokümanına çevir"""
+        document = self.weasyprint.HTML(
+            string=html,
+            base_url=base_url or self.base_url,
+            url_fetcher=self.fetch,
+        ).render(font_config=self.font_config)
+        self.stats["documents"] += 1
+        self.stats["pages"] += len(document.pages)
+        return document
+
+    def write_pdf(self, html, target=None, base_url=None):
+        """HTML'i PDF olarak yaz; `target` yoksa PDF baytlarını döndür"""
+        return self.render(html, base_url).write_pdf(target)
+
+    def merge(self, documents, target=None):
+        """Dokümanların tüm sayfalarını tek bir PDF'te birleştir"""
+        documents = list(documents)
+        if not documents:
+            raise ValueError("Birleştirilecek doküman yok")
+        pages = [page for document in documents for page in document.pages]
+        return documents[0].copy(pages).write_pdf(target)
+
+
+_renderers = {}
+
+
+def get_renderer(base_url=None):
+    """Process içinde `base_url` başına tek, sıcak tutulan render edici"""
+    renderer = _renderers.get(base_url)
+    if renderer is None:
+        renderer = _renderers[base_url] = PdfRenderer(base_url)
+    return renderer
+
+
+def merge_pdf_files(paths, target):
+    """Parça PDF'lerini sırayla tek dosyada birleştir (pypdf gerekir)"""
+    paths = list(paths)
+    if len(paths) == 1:
+        os.replace(paths[0], target)
+        return
+
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        raise RuntimeError("Birden çok parçayı birleştirmek için pypdf gerekli: pip install pypdf")
+
+    writer = PdfWriter()
+    for path in paths:
+        writer.append(path)
+    with open(target, "wb") as file:
+        writer.write(file)
+    writer.close()
+    for path in paths:
+        os.remove(path)
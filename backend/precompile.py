@@ -0,0 +1,35 @@
+import argparse
+import os
+
+from json_process import load_json_content
+from layout_schema import LayoutError
+from stylesheet import STYLE_MODES
+from template_cache import PRECOMPILED_SUFFIX, compile_template, save_precompiled
+
+
+def precompile(json_file_path, output_path=None, styles="inline"):
+    """Şablon JSON'unu derleyip `.ctpl` dosyasına yaz; (yol, bayt sayısı) döner"""
+    output_path = output_path or os.path.splitext(json_file_path)[0] + PRECOMPILED_SUFFIX
+    compiled = compile_template(load_json_content(json_file_path), styles)
+    return output_path, save_precompiled(compiled, output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Şablonu önceden derle: CLI/worker'lar JSON ve bs4 yerine .ctpl dosyasını yükler"
+    )
+    parser.add_argument("layout", help="Şablon JSON dosyası (ör. test.json)")
+    parser.add_argument("-o", "--output", default=None, help=f"Çıktı dosyası (varsayılan: <şablon>{PRECOMPILED_SUFFIX})")
+    parser.add_argument("--styles", choices=STYLE_MODES, default="inline",
+                        help="Derlemenin stil modu; render tarafında aynı --styles verilmelidir")
+    args = parser.parse_args()
+
+    try:
+        output_path, size = precompile(args.layout, args.output, args.styles)
+    except LayoutError as error:
+        raise SystemExit(str(error))
+    print(f"Önceden derlenmiş şablon yazıldı: {output_path} ({size} bayt)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Bellek sınırı: izleme (trace) için tutulan en fazla olay sayısı
+DEFAULT_MAX_EVENTS = 200000
+
+
+class _NullStage:
+    """Profilleme kapalıyken kullanılan, hiçbir şey yapmayan aşama"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Bir aşamanın duvar saati ve CPU süresini ölçen bağlam yöneticisi"""
+
+    __slots__ = ("profiler", "name", "wall", "cpu")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.wall = time.perf_counter()
+        self.cpu = time.process_time()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, self.wall, time.perf_counter() - self.wall, time.process_time() - self.cpu)
+        return False
+
+
+class Profiler:
+    """Render hattı için aşama süreleri, sayaçlar ve isteğe bağlı Chrome-trace olayları.
+
+    `stages` aşama başına `[çağrı, duvar sn, CPU sn]`, `counters` ise
+    sayaç değerlerini tutar. `trace=True` ise her aşama bir "complete"
+    olayı olarak saklanır ve `write_trace` ile Chrome `about:tracing`,
+    Perfetto veya speedscope'ta açılabilecek JSON yazılır. Worker'lardan
+    gelen `snapshot` çıktıları `merge` ile birleştirilir.
+    """
+
+    def __init__(self, trace=False, max_events=DEFAULT_MAX_EVENTS):
+        self.trace = trace
+        self.max_events = max_events
+        self.stages = {}
+        self.counters = {}
+        self.events = []
+        self.dropped_events = 0
+
+    def stage(self, name):
+        return _Stage(self, name)
+
+    def record(self, name, started, wall, cpu):
+        """Tamamlanan bir aşamayı kaydet"""
+        totals = self.stages.get(name)
+        if totals is None:
+            totals = self.stages[name] = [0, 0.0, 0.0]
+        totals[0] += 1
+        totals[1] += wall
+        totals[2] += cpu
+
+        if self.trace:
+            if len(self.events) >= self.max_events:
+                self.dropped_events += 1
+                return
+            self.events.append({
+                "name": name,
+                "ph": "X",
+                # perf_counter sistem genelinde monoton: worker olayları aynı zaman ekseninde
+                "ts": round(started * 1e6, 3),
+                "dur": round(wall * 1e6, 3),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Process'ler arası aktarılabilir (pickle) özet"""
+        return {
+            "stages": self.stages,
+            "counters": self.counters,
+            "events": self.events,
+            "dropped_events": self.dropped_events,
+        }
+
+    def merge(self, snapshot):
+        """Başka bir profilin (ör. worker) özetini bu profile ekle"""
+        for name, (calls, wall, cpu) in snapshot["stages"].items():
+            totals = self.stages.setdefault(name, [0, 0.0, 0.0])
+            totals[0] += calls
+            totals[1] += wall
+            totals[2] += cpu
+        for name, amount in snapshot["counters"].items():
+            self.count(name, amount)
+        if self.trace:
+            room = self.max_events - len(self.events)
+            self.events.extend(snapshot["events"][:max(room, 0)])
+            self.dropped_events += max(len(snapshot["events"]) - max(room, 0), 0)
+        self.dropped_events += snapshot["dropped_events"]
+
+    def report(self):
+        """Aşama ve sayaçları okunabilir tablo olarak döndür"""
+        lines = [f"{'aşama':<20} {'çağrı':>8} {'duvar ms':>10} {'CPU ms':>10} {'ort. µs':>10}"]
+        for name, (calls, wall, cpu) in sorted(self.stages.items(), key=lambda entry: -entry[1][1]):
+            lines.append(f"{name:<20} {calls:>8} {wall * 1e3:>10.2f} {cpu * 1e3:>10.2f} {wall / calls * 1e6:>10.1f}")
+        if self.counters:
+            lines.append("")
+            lines.extend(f"{name:<20} {value:>8}" for name, value in sorted(self.counters.items()))
+        return "\n".join(lines)
+
+    def write_trace(self, path):
+        """Olayları Chrome trace biçiminde (speedscope ile de açılır) yaz"""
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({
+                "traceEvents": self.events,
+                "displayTimeUnit": "ms",
+                "otherData": {"counters": self.counters, "dropped_events": self.dropped_events},
+            }, file)
+
+
+_active = None
+
+
+def stage(name):
+    """Aktif profilde bir aşama başlat; profilleme kapalıyken maliyeti tek bir kontroldür"""
+    if _active is None:
+        return NULL_STAGE
+    return _Stage(_active, name)
+
+
+def count(name, amount=1):
+    """Aktif profilde sayacı artır (kapalıyken hiçbir şey yapmaz)"""
+    if _active is not None:
+        _active.count(name, amount)
+
+
+def enabled():
+    return _active is not None
+
+
+def activate(profiler):
+    """Profili process genelinde aktif yap, öncekini döndür (`None` kapatır)"""
+    global _active
+    previous, _active = _active, profiler
+    return previous
+
+
+@contextmanager
+def profile(trace=False):
+    """`with profile() as profiler:` bloğu boyunca profilleme yap"""
+    profiler = Profiler(trace)
+    previous = activate(profiler)
+    try:
+        yield profiler
+    finally:
+        activate(previous)
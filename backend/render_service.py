@@ -0,0 +1,463 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from layout_schema import LayoutError, load_layout
+from output_writers import ChunkedSink
+from template_cache import get_compiled_template
+from totals import apply_totals, find_mismatches
+
+MAX_BODY_SIZE = 50 * 1024 * 1024
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# Worker ile olay döngüsü arasında bekleyebilecek blok sayısı (yavaş istemcide worker bekler)
+STREAM_QUEUE_SIZE = 4
+
+# Kuyruk okuyan thread'lerin bir beklemede kalabileceği süre (sn); thread'ler render'lar arasında döner
+STREAM_POLL_SECONDS = 0.1
+
+# `?totals=1` ile gönderilen toplamlar hesaplananlarla uyuşmadığında eklenen yanıt başlığı
+MISMATCH_HEADER = "X-Totals-Mismatch"
+
+# Çağıranın verisinden kaynaklanan render hataları (400 ile döner)
+DATA_ERRORS = (ValueError, TypeError, AttributeError, KeyError)
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    501: "Not Implemented",
+}
+
+
+class HTTPError(Exception):
+    """İstemciye durum kodu ve mesajla dönülecek hata"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def request_length(headers):
+    """İstek gövdesinin uzunluğu; geçersiz veya desteklenmeyen başlıklar `HTTPError` verir"""
+    if "transfer-encoding" in headers:
+        raise HTTPError(501, "Chunked istek gövdesi desteklenmiyor; Content-Length gönderin")
+    value = headers.get("content-length", "0")
+    if not (value.isascii() and value.isdigit()):
+        raise HTTPError(400, f"Geçersiz Content-Length: {value!r}")
+    length = int(value)
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(413, "İstek gövdesi çok büyük")
+    return length
+
+
+class RenderAborted(Exception):
+    """Yanıt başlığı gönderildikten sonra yarıda kalan render (bağlantı kapatılır)"""
+
+
+def load_render_data(body, totals=False, mismatches=None):
+    """İstek gövdesini render verisine çevir (istenirse toplamları hesaplayarak).
+
+    `mismatches` bir liste ise gönderilen toplamların hesaplananlardan
+    farkları `totals.find_mismatches` biçiminde eklenir.
+    """
+    data = json.loads(body) if body else None
+    if data is not None and not isinstance(data, dict):
+        raise ValueError("veri bir JSON nesnesi olmalı")
+    if totals and data:
+        computed = apply_totals(data)
+        if mismatches is not None:
+            mismatches.extend(find_mismatches(data, computed))
+        data = computed
+    return data
+
+
+def stream_layout_file(layout_path, body, paginate, totals, blocks):
+    """Worker içinde çalışır: `render_to` çıktısını `STREAM_CHUNK_SIZE`'lık UTF-8 bloklar halinde `blocks` kuyruğuna yaz.
+
+    Doküman worker'da tek string olarak oluşturulmaz; kuyruk doluysa
+    (istemci yavaşsa) worker bekler. Toplam uyuşmazlıkları varsa ilk
+    bloktan önce `[anahtar, gönderilen, hesaplanan]` listesi olarak konur.
+    Kuyruğa en sonda `None` konur, hata future üzerinden döner. Yazılan
+    sayfa sayısını döndürür.
+    """
+    try:
+        mismatches = []
+        data = load_render_data(body, totals, mismatches)
+        if mismatches:
+            blocks.put([[key, str(sent), str(computed)] for key, sent, computed in mismatches])
+        sink = ChunkedSink(blocks.put, STREAM_CHUNK_SIZE)
+        pages = get_compiled_template(layout_path).render_to(sink, data, paginate=paginate)
+        sink.close()
+        return pages
+    finally:
+        blocks.put(None)
+
+
+class RenderStream:
+    """Tek bir render'ın bloklarını, render ilk bloğu üretmeden katılan tüm isteklere dağıtan yayın.
+
+    Her abonenin sınırlı bir kuyruğu vardır; en yavaş abone kadar ilerlenir.
+    Ayrılan abonenin kuyruğu boşaltılır, hiç abone kalmasa da worker'ın
+    bitebilmesi için bloklar okunup atılır.
+    """
+
+    def __init__(self):
+        self.subscribers = []
+        self.started = False
+        # Worker'ın ilk bloktan önce bildirdiği toplam uyuşmazlıkları
+        self.mismatches = []
+
+    def subscribe(self):
+        subscriber = asyncio.Queue(STREAM_QUEUE_SIZE)
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        # Bu kuyruğa yazmak için bekleyen `publish` serbest kalır
+        while not subscriber.empty():
+            subscriber.get_nowait()
+
+    async def publish(self, kind, value):
+        for subscriber in list(self.subscribers):
+            if subscriber in self.subscribers:
+                await subscriber.put((kind, value))
+
+
+def warm_layout(layout_path):
+    """Worker'da şablonu önceden derle"""
+    get_compiled_template(layout_path)
+    return True
+
+
+class RenderService:
+    """Şablon kaydı ve fatura render'ı yapan uzun ömürlü servis.
+
+    Kayıtlı şablonlar `layout_dir` altına yazılır; her worker process bir
+    şablonu `TemplateCache` üzerinden ilk kullanımda bir kez derler ve sıcak
+    tutar. Render çıktısı worker'dan bloklar halinde gelir ve üretildikçe
+    chunked olarak gönderilir. Aynı şablon + byte düzeyinde aynı gövdeyle
+    eş zamanlı gelen istekler, render ilk bloğu üretene kadar aynı
+    yayına katılır.
+    """
+
+    def __init__(self, layout_dir, workers=None):
+        self.layout_dir = layout_dir
+        os.makedirs(layout_dir, exist_ok=True)
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        # Worker'lar bağlantı kabul edilmeden başlatılır: ilk isteğin içinde fork edilen
+        # worker'lar o anki istemci soketlerini devralır ve `Connection: close` yanıtı EOF'suz kalır
+        self.pool.submit(int).result()
+        # Worker'lardan blok taşıyan kuyruklar ve bunları olay döngüsünü bloklamadan okuyan thread'ler
+        import multiprocessing
+
+        self.manager = multiprocessing.Manager()
+        self.readers = ThreadPoolExecutor(max_workers=32, thread_name_prefix="render-stream")
+        self.layouts = {}
+        self.in_flight = {}
+        self.pumps = set()
+        self.stats = {"requests": 0, "renders": 0, "coalesced": 0, "errors": 0}
+
+        # Önceki çalışmadan kalan şablonları yükle
+        for file_name in os.listdir(layout_dir):
+            if file_name.endswith(".json"):
+                self.layouts[file_name[:-5]] = os.path.join(layout_dir, file_name)
+
+    async def register_layout(self, body):
+        """Editörün dışa aktardığı JSON'u kaydet, şablon kimliğini döndür"""
+        try:
+            json_data = json.loads(body)
+        except ValueError as error:
+            raise HTTPError(400, f"Geçersiz JSON: {error}")
+        if not isinstance(json_data, dict) or not isinstance(json_data.get("pageItems"), list):
+            raise HTTPError(400, "Şablon 'pageItems' listesi içermeli")
+        try:
+            # Şema hataları worker'a gitmeden, eleman kimlikleriyle bildirilir
+            load_layout(json_data)
+        except LayoutError as error:
+            raise HTTPError(400, str(error))
+
+        canonical = json.dumps(json_data, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        layout_id = hashlib.sha256(canonical).hexdigest()[:16]
+
+        if layout_id not in self.layouts:
+            layout_path = os.path.join(self.layout_dir, f"{layout_id}.json")
+            with open(layout_path, "wb") as file:
+                file.write(canonical)
+            self.layouts[layout_id] = layout_path
+
+            # Bir worker'da derlemeyi tetikle; hatalı şablon burada yakalanır
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(self.pool, warm_layout, layout_path)
+            except Exception as error:
+                del self.layouts[layout_id]
+                os.remove(layout_path)
+                raise HTTPError(400, f"Şablon derlenemedi: {error}")
+
+        return layout_id
+
+    async def render(self, layout_id, body, paginate=False, totals=False):
+        """Render'ı worker havuzunda başlat (veya aynı istekteki yayına katıl).
+
+        `(blok üreten async iterator, toplam uyuşmazlıkları)` döndürür. İlk
+        blok gelene kadar beklenir: o ana kadarki hatalar durum koduyla
+        (`DATA_ERRORS` → 400) döner. Sonraki hatalarda iterator
+        `RenderAborted` verir.
+        """
+        layout_path = self.layouts.get(layout_id)
+        if layout_path is None:
+            raise HTTPError(404, f"Şablon bulunamadı: {layout_id}")
+
+        key = (layout_id, hashlib.sha256(body).digest(), paginate, totals)
+        stream = self.in_flight.get(key)
+        if stream is not None:
+            self.stats["coalesced"] += 1
+        else:
+            stream = self.in_flight[key] = RenderStream()
+            self.stats["renders"] += 1
+            pump = asyncio.get_running_loop().create_task(self._pump(key, stream, layout_path, body, paginate, totals))
+            self.pumps.add(pump)
+            pump.add_done_callback(self.pumps.discard)
+
+        subscriber = stream.subscribe()
+        try:
+            kind, value = await subscriber.get()
+        except BaseException:
+            stream.unsubscribe(subscriber)
+            raise
+        if kind == "error":
+            stream.unsubscribe(subscriber)
+            if isinstance(value, DATA_ERRORS):
+                # Birleştirilen tüm istekler aynı 400 yanıtını alır
+                raise HTTPError(400, f"Geçersiz veri: {type(value).__name__}: {value}")
+            raise value
+        return self._blocks(stream, subscriber, kind, value), stream.mismatches
+
+    async def _blocks(self, stream, subscriber, kind, value):
+        """Aboneye gelen blokları sırayla ver"""
+        try:
+            while kind == "block":
+                yield value
+                kind, value = await subscriber.get()
+            if kind == "error":
+                raise RenderAborted(f"{type(value).__name__}: {value}")
+        finally:
+            stream.unsubscribe(subscriber)
+
+    async def _pump(self, key, stream, layout_path, body, paginate, totals):
+        """Worker'ın kuyruğundaki blokları okuyup yayına aktar"""
+        loop = asyncio.get_running_loop()
+        blocks = self.manager.Queue(STREAM_QUEUE_SIZE)
+        try:
+            future = loop.run_in_executor(self.pool, stream_layout_file, layout_path, body, paginate, totals, blocks)
+            while True:
+                try:
+                    block = await loop.run_in_executor(self.readers, blocks.get, True, STREAM_POLL_SECONDS)
+                except queue.Empty:
+                    # Worker çöktüyse bitiş işareti hiç gelmez
+                    if future.done():
+                        break
+                    continue
+                if block is None:
+                    break
+                if isinstance(block, list):
+                    # Uyuşmazlıklar ilk bloktan önce gelir; ilk bloğu alan her abone görür
+                    stream.mismatches = block
+                    continue
+                if not stream.started:
+                    # İlk bloktan sonra gelen aynı istekler yeni bir render başlatır
+                    stream.started = True
+                    self._forget(key, stream)
+                await stream.publish("block", block)
+            await future
+            await stream.publish("done", None)
+        except Exception as error:
+            await stream.publish("error", error)
+        finally:
+            self._forget(key, stream)
+
+    def _forget(self, key, stream):
+        if self.in_flight.get(key) is stream:
+            del self.in_flight[key]
+
+    async def handle_request(self, method, target, body):
+        """İsteği yönlendir; (durum, içerik tipi, gövde, ek başlıklar veya None) döndür"""
+        url = urlsplit(target)
+        parts = [part for part in url.path.split("/") if part]
+        query = parse_qs(url.query)
+
+        if parts == ["health"] and method == "GET":
+            return 200, "application/json", b'{"status": "ok"}', None
+
+        if parts == ["stats"] and method == "GET":
+            stats = dict(self.stats, layouts=len(self.layouts), in_flight=len(self.in_flight))
+            return 200, "application/json", json.dumps(stats).encode("utf-8"), None
+
+        if parts == ["layouts"]:
+            if method == "GET":
+                return 200, "application/json", json.dumps(sorted(self.layouts)).encode("utf-8"), None
+            if method == "POST":
+                layout_id = await self.register_layout(body)
+                return 201, "application/json", json.dumps({"layoutId": layout_id}).encode("utf-8"), None
+            raise HTTPError(405, "Sadece GET ve POST desteklenir")
+
+        if len(parts) == 3 and parts[0] == "layouts" and parts[2] == "render":
+            if method != "POST":
+                raise HTTPError(405, "Sadece POST desteklenir")
+            paginate = query.get("paginate", ["0"])[0] in ("1", "true")
+            totals = query.get("totals", ["0"])[0] in ("1", "true")
+            blocks, mismatches = await self.render(parts[1], body, paginate, totals)
+            headers = {MISMATCH_HEADER: json.dumps(mismatches)} if mismatches else None
+            return 200, "text/html; charset=utf-8", blocks, headers
+
+        raise HTTPError(404, f"Bulunamadı: {url.path}")
+
+    async def handle_connection(self, reader, writer):
+        """Bir bağlantıdaki istekleri sırayla işle (keep-alive destekli)"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                self.stats["requests"] += 1
+
+                try:
+                    length = request_length(headers)
+                    body = await reader.readexactly(length) if length else b""
+                    status, content_type, payload, extra_headers = await self.handle_request(method, target, body)
+                except HTTPError as error:
+                    self.stats["errors"] += 1
+                    status, content_type = error.status, "application/json"
+                    payload = json.dumps({"error": error.message}, ensure_ascii=False).encode("utf-8")
+                    extra_headers = None
+                    # Gövdesi okunmamış olabilecek isteklerden sonra bağlantı sürdürülemez
+                    keep_alive = keep_alive and error.status not in (400, 413, 501)
+                except Exception as error:
+                    self.stats["errors"] += 1
+                    status, content_type = 500, "application/json"
+                    payload = json.dumps({"error": f"{type(error).__name__}: {error}"}, ensure_ascii=False).encode("utf-8")
+                    extra_headers = None
+
+                try:
+                    await self.write_response(writer, status, content_type, payload, keep_alive, version, extra_headers)
+                except RenderAborted:
+                    # Başlık gönderildi; yarım yanıt chunked bitişi yazılmadan bağlantı kapatılarak bildirilir
+                    self.stats["errors"] += 1
+                    break
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def write_response(writer, status, content_type, payload, keep_alive, version="HTTP/1.1", headers=None):
+        """Yanıtı yaz; yavaş istemcide her blokta `drain` ile beklenir.
+
+        `headers` (ad -> ASCII değer) yanıt başlığına eklenir. `payload` bytes ise `Content-Length` ile, async iterator ise
+        (render blokları) üretildikçe gönderilir: HTTP/1.1'de chunked,
+        HTTP/1.0'da gövde bağlantı kapatılarak sonlandırılır.
+        """
+        streaming = not isinstance(payload, bytes)
+        chunked = streaming and version != "HTTP/1.0"
+        if streaming and not chunked:
+            keep_alive = False
+        head = [
+            f"{'HTTP/1.0' if version == 'HTTP/1.0' else 'HTTP/1.1'} {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        if chunked:
+            head.append("Transfer-Encoding: chunked")
+        elif not streaming:
+            head.append(f"Content-Length: {len(payload)}")
+        head.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+
+        if not streaming:
+            view = memoryview(payload)
+            for start in range(0, len(view), STREAM_CHUNK_SIZE):
+                writer.write(view[start:start + STREAM_CHUNK_SIZE])
+                await writer.drain()
+            await writer.drain()
+            return
+
+        try:
+            async for block in payload:
+                if chunked:
+                    writer.write(f"{len(block):x}\r\n".encode("latin-1"))
+                    writer.write(block)
+                    writer.write(b"\r\n")
+                else:
+                    writer.write(block)
+                await writer.drain()
+        finally:
+            await payload.aclose()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        self.readers.shutdown(wait=False, cancel_futures=True)
+        self.manager.shutdown()
+
+
+async def serve(host, port, layout_dir, workers=None):
+    """Servisi başlat ve kapatılana kadar çalıştır"""
+    service = RenderService(layout_dir, workers)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    print(f"Render servisi dinliyor: http://{host}:{port} (şablonlar: {layout_dir})")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Şablon kaydı ve fatura render'ı için HTTP servisi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--layout-dir", default=os.path.join(tempfile.gettempdir(), "invoice_layouts"))
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Render process sayısı")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.layout_dir, args.workers))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
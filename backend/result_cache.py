@@ -0,0 +1,209 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+from collections import OrderedDict
+
+# Render çıktısının biçimi değiştiğinde artırılır; eski önbellek kayıtları kullanılmaz
+RENDERER_VERSION = "5"
+
+DEFAULT_MAX_MEMORY_BYTES = 32 * 1024 * 1024
+DEFAULT_MAX_DISK_BYTES = 1024 * 1024 * 1024
+
+# Disk taşınca en eski kayıtlar bu orana inene kadar silinir
+DISK_LOW_WATERMARK = 0.9
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+COUNTERS = ("memory_hits", "disk_hits", "misses", "stores", "memory_evictions", "disk_evictions")
+
+
+def canonical_json(value):
+    """Anahtar sırasından bağımsız, kararlı JSON metni (JSON dışı değerler `str` ile)"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def result_key(layout_digest, data, kind="html", **options):
+    """(şablon içeriği, kanonik veri, render seçenekleri, render sürümü) için SHA-256 anahtar"""
+    digest = hashlib.sha256()
+    digest.update(f"{RENDERER_VERSION}\0{layout_digest}\0{kind}\0{canonical_json(options)}\0".encode("utf-8"))
+    digest.update(canonical_json(data).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Render sonuçları için içerik adresli, bellek + disk katmanlı önbellek.
+
+    Bellek katmanı byte sınırlı bir LRU'dur. Disk katmanı `directory`
+    altında `<anahtar[:2]>/<anahtar>` dosyaları tutar; yazımlar geçici
+    dosya + `os.replace` ile atomik olduğundan aynı makinedeki worker
+    process'leri klasörü güvenle paylaşır. Disk `max_disk_bytes`'ı aşınca
+    en eski erişilen (mtime) kayıtlar silinir; diskten okunan kayıtların
+    mtime'ı güncellenir. `compress=True` kayıtları gzip ile saklar, okuma
+    sıkıştırmayı kendisi algılar.
+    """
+
+    def __init__(self, directory=None, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 max_disk_bytes=DEFAULT_MAX_DISK_BYTES, compress=False):
+        self.directory = os.path.abspath(directory) if directory else None
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.compress = compress
+        self.entries = OrderedDict()
+        self.memory_bytes = 0
+        self.disk_bytes = None
+        self.unscanned_bytes = 0
+        self.stats = dict.fromkeys(COUNTERS, 0)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    def path_for(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Kaydı önce bellekten, sonra diskten döndür; yoksa None"""
+        payload = self.entries.get(key)
+        if payload is not None:
+            self.entries.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return payload
+
+        if self.directory:
+            path = self.path_for(key)
+            try:
+                with open(path, "rb") as file:
+                    payload = file.read()
+            except FileNotFoundError:
+                payload = None
+            if payload is not None:
+                if payload.startswith(GZIP_MAGIC):
+                    payload = gzip.decompress(payload)
+                try:
+                    # Erişim zamanı disk tahliyesinde LRU sırası olarak kullanılır
+                    os.utime(path)
+                except OSError:
+                    pass
+                self.stats["disk_hits"] += 1
+                self._remember(key, payload)
+                return payload
+
+        self.stats["misses"] += 1
+        return None
+
+    def put(self, key, payload):
+        """Kaydı bellek ve (varsa) disk katmanına yaz"""
+        self.stats["stores"] += 1
+        self._remember(key, payload)
+        if not self.directory:
+            return
+
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        stored = gzip.compress(payload, compresslevel=6, mtime=0) if self.compress else payload
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(stored)
+        os.replace(temporary, path)
+
+        self.unscanned_bytes += len(stored)
+        if (self.disk_bytes is None or self.disk_bytes + self.unscanned_bytes > self.max_disk_bytes
+                or self.unscanned_bytes > self.max_disk_bytes // 8):
+            self._evict_disk()
+
+    def _remember(self, key, payload):
+        """Bellek katmanına ekle; sınırı aşan en eski kayıtları at (çok büyük kayıtlar tutulmaz)"""
+        if len(payload) > self.max_memory_bytes // 4:
+            return
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.memory_bytes -= len(previous)
+        self.entries[key] = payload
+        self.memory_bytes += len(payload)
+        while self.memory_bytes > self.max_memory_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.memory_bytes -= len(evicted)
+            self.stats["memory_evictions"] += 1
+
+    def _evict_disk(self):
+        """Klasörü tara; boyut sınırı aşıldıysa en eski kayıtları sil (diğer process'lerin yazdıkları dahil)"""
+        files = []
+        total = 0
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.endswith(".tmp"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+
+        if total > self.max_disk_bytes:
+            files.sort()
+            target = self.max_disk_bytes * DISK_LOW_WATERMARK
+            for _, size, path in files:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    # Başka bir process aynı kaydı silmiş
+                    pass
+                total -= size
+                self.stats["disk_evictions"] += 1
+
+        self.disk_bytes = total
+        self.unscanned_bytes = 0
+
+    def render(self, compiled, data=None, paginate=False):
+        """`CompiledTemplate.render` sonucunu UTF-8 bytes olarak önbellekten döndür, yoksa render edip sakla"""
+        key = result_key(compiled.digest, data, "html", paginate=paginate)
+        payload = self.get(key)
+        if payload is None:
+            payload = compiled.render(data, paginate=paginate).encode("utf-8")
+            self.put(key, payload)
+        return payload
+
+    def render_with_pages(self, compiled, data=None, paginate=False):
+        """`render` gibi, ama `(UTF-8 bytes, sayfa sayısı)` döndürür; sayfa sayısı kayıtla birlikte saklanır"""
+        key = result_key(compiled.digest, data, "html_pages", paginate=paginate)
+        payload = self.get(key)
+        if payload is None:
+            buffer = io.StringIO()
+            pages = compiled.render_to(buffer, data, paginate=paginate)
+            payload = b"%d\n" % pages + buffer.getvalue().encode("utf-8")
+            self.put(key, payload)
+        header_end = payload.index(b"\n")
+        return payload[header_end + 1:], int(payload[:header_end])
+
+    def info(self):
+        """Katman bazında isabet/ıska sayıları, isabet oranı ve boyutlar"""
+        info = dict(self.stats)
+        lookups = info["memory_hits"] + info["disk_hits"] + info["misses"]
+        info["hit_rate"] = (info["memory_hits"] + info["disk_hits"]) / lookups if lookups else 0.0
+        info["memory_entries"] = len(self.entries)
+        info["memory_bytes"] = self.memory_bytes
+        info["disk_bytes"] = self.disk_bytes
+        return info
+
+
+_caches = {}
+
+
+def get_result_cache(directory=None, max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                     max_disk_bytes=DEFAULT_MAX_DISK_BYTES, compress=False):
+    """Process içinde ayar başına paylaşılan sonuç önbelleği"""
+    key = (os.path.abspath(directory) if directory else None, max_memory_bytes, max_disk_bytes, compress)
+    cache = _caches.get(key)
+    if cache is None:
+        cache = _caches[key] = ResultCache(directory, max_memory_bytes, max_disk_bytes, compress)
+    return cache
+
+
+def counter_delta(before, after):
+    """İki `info()` arasındaki sayaç farkları (parça bazında raporlama için)"""
+    return {name: after[name] - before[name] for name in COUNTERS}
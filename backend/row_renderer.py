@@ -0,0 +1,53 @@
+CELL_STYLE = "border:1px solid #d1d5db;padding:8px;text-align:left"
+
+CELL_OPEN = f'<td style="{CELL_STYLE}">'
+
+
+class RowRenderer:
+    """Tablo gövdesi satırlarını doğrusal zamanda üreten yardımcı.
+
+    Kolon başına hücre öneki (`<td style=...>`) bir kez hesaplanır ve tüm
+    satır tek bir format kalıbına dönüştürülür; satırlar `str.format` ile
+    doldurulup tek bir `join` ile birleştirilir. Değerler kolon bazında
+    string'e çevrilir ve `escape_column` verilmişse kolon kolon kaçışlanır.
+    """
+
+    def __init__(self, headers, cell_prefixes=None, escape_column=None):
+        self.headers = list(headers)
+        if cell_prefixes is None:
+            cell_prefixes = [CELL_OPEN] * len(self.headers)
+        self.cell_prefixes = list(cell_prefixes)
+        self.escape_column = escape_column
+
+        cells = "".join(
+            prefix.replace("{", "{{").replace("}", "}}") + "{}</td>"
+            for prefix in self.cell_prefixes
+        )
+        self.row_format = "<tr>" + cells + "</tr>"
+        self.empty_row = "<tr>" + "".join(prefix + "</td>" for prefix in self.cell_prefixes) + "</tr>"
+
+    def columns(self, table_data):
+        """Satır verisini string kolonlara çevir (eksik değerler boş string)"""
+        columns = []
+        for key in self.headers:
+            column = [str(row_data.get(key, "")) for row_data in table_data]
+            if self.escape_column is not None:
+                column = self.escape_column(column)
+            columns.append(column)
+        return columns
+
+    def render_rows(self, table_data):
+        """Satır listesinden `<tr>` dizisini üret; veri yoksa tek boş satır döner"""
+        if not table_data:
+            return self.empty_row
+        if not self.headers:
+            return "<tr></tr>" * len(table_data)
+        return "".join(map(self.row_format.format, *self.columns(table_data)))
+
+    def iter_rows(self, table_data, chunk_rows):
+        """`render_rows` çıktısını `chunk_rows` satırlık parçalar halinde üret"""
+        if not table_data:
+            yield self.empty_row
+            return
+        for start in range(0, len(table_data), chunk_rows):
+            yield self.render_rows(table_data[start:start + chunk_rows])
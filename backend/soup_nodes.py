@@ -0,0 +1,11 @@
+from bs4.element import PreformattedString
+
+
+class RawRows(PreformattedString):
+    """Önceden üretilmiş `<tr>` dizisini ağaca parse etmeden ekler, olduğu gibi yazılır"""
+    PREFIX = ""
+    SUFFIX = ""
+
+    def output_ready(self, formatter=None):
+        # Formatter'ı hiç çalıştırma; içerik zaten kaçışlanmış durumda
+        return str(self)
@@ -0,0 +1,196 @@
+import argparse
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from assets import prepare_render_options
+from batch_process import (
+    DEFAULT_NAME_PATTERN,
+    prepare_chunk,
+    iter_chunks,
+    iter_jsonl_records,
+    output_file_name,
+    init_worker,
+    named_chunks,
+)
+from event_log import configure_logging
+from output_writers import COMPRESSIONS, open_writer
+from stylesheet import STYLE_MODES
+from template_cache import get_compiled_template
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_MAX_IN_FLIGHT = 4
+
+
+def render_records(json_file_path, chunk, name_pattern=DEFAULT_NAME_PATTERN, name_key=None, render_options=None,
+                   names=None):
+    """Parçadaki kayıtları render et, (sıra, dosya adı, html, hata) listesi döndür.
+
+    Link modundaki görseller listenin başında `(None, ad, içerik, None)`
+    olarak döner; yazma tarafı her adı bir kez yazar. `names` (`sıra ->
+    dosya adı`, bkz. `batch_process.OutputNames`) verilirse adlar oradan
+    alınır.
+    """
+    render_options, asset_cache = prepare_render_options(render_options)
+    compiled = get_compiled_template(json_file_path, render_options.pop("styles", "inline"))
+    results = []
+    for index, record, error in prepare_chunk(chunk, render_options.pop("totals", None)):
+        if error is not None:
+            results.append((index, None, None, error))
+            continue
+        try:
+            if names is None:
+                name = output_file_name(index, record, name_pattern, name_key)
+            else:
+                name = names[index]
+            results.append((index, name, compiled.render(record, **render_options), None))
+        except Exception as error:
+            results.append((index, None, None, f"{type(error).__name__}: {error}"))
+    if asset_cache is not None:
+        results[:0] = [(None, name, payload, None) for name, payload in asset_cache.new_assets()]
+    return results
+
+
+def stream_render(json_file_path, records, writer, workers=0, chunk_size=DEFAULT_CHUNK_SIZE,
+                  max_in_flight=DEFAULT_MAX_IN_FLIGHT, name_pattern=DEFAULT_NAME_PATTERN, name_key=None,
+                  render_options=None):
+    """Kayıtları tek tek okuyup render et ve çıktıları sırayla yazıcıya aktar.
+
+    Kayıtlar hiçbir zaman topluca belleğe alınmaz: aynı anda en fazla
+    `max_in_flight` parça (her biri `chunk_size` kayıt) işlenir, biten
+    parçalar sırayla yazılıp bellekten çıkar. Böylece bellek kullanımı
+    giriş dosyasının boyutundan bağımsızdır. `workers=0` aynı process'te
+    çalışır. Okunamayan satırlar ve çöken worker'lardaki kayıtlar diğer
+    hatalar gibi `summary["failures"]` içinde raporlanır.
+    """
+    json_file_path = os.path.abspath(json_file_path)
+    styles = (render_options or {}).get("styles", "inline")
+    summary = {"rendered": 0, "failed": 0, "failures": [], "bytes": 0}
+    started = time.perf_counter()
+    written_assets = set()
+
+    def write_results(results):
+        for index, name, html, error in results:
+            if index is None:
+                # Tekil görsel: worker'lar arasında tekrar edebilir, bir kez yaz
+                if name not in written_assets:
+                    written_assets.add(name)
+                    writer.write(name, html)
+                    summary["bytes"] += len(html)
+                continue
+            if error is not None:
+                summary["failed"] += 1
+                summary["failures"].append((index, error))
+                continue
+            writer.write(name, html)
+            summary["rendered"] += 1
+            summary["bytes"] += len(html)
+
+    chunks = named_chunks(iter_chunks(records, chunk_size), name_pattern, name_key)
+
+    if workers == 0:
+        for chunk, names in chunks:
+            write_results(render_records(json_file_path, chunk, name_pattern, name_key, render_options, names))
+    else:
+        workers = workers or os.cpu_count() or 1
+
+        def start_pool():
+            return ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                       initargs=(json_file_path, None, styles))
+
+        def submit(pool, chunk, names):
+            return pool.submit(render_records, json_file_path, chunk, name_pattern, name_key, render_options, names)
+
+        pool = start_pool()
+        in_flight = deque()
+        try:
+            for chunk, names in chunks:
+                try:
+                    future = submit(pool, chunk, names)
+                except BrokenProcessPool:
+                    # Çöken worker havuzu bozar: bekleyen parçalar hatalı yazılır, yeni havuzla devam edilir
+                    while in_flight:
+                        write_results(_records_result(*in_flight.popleft()))
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    pool = start_pool()
+                    future = submit(pool, chunk, names)
+                in_flight.append((future, chunk))
+                if len(in_flight) >= max_in_flight:
+                    write_results(_records_result(*in_flight.popleft()))
+            while in_flight:
+                write_results(_records_result(*in_flight.popleft()))
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+    summary["seconds"] = time.perf_counter() - started
+    summary["per_second"] = summary["rendered"] / summary["seconds"] if summary["seconds"] else 0.0
+    return summary
+
+
+def _records_result(future, chunk):
+    """Parça sonucunu al; worker çökerse parçanın her kaydı hatalı döner"""
+    try:
+        return future.result()
+    except Exception as error:
+        message = f"{type(error).__name__}: {error}"
+        return [(index, None, None, message) for index, _ in chunk]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL kayıtlarını akış halinde render edip klasöre/arşive yaz")
+    parser.add_argument("layout", help="Şablon JSON dosyası (ör. test.json)")
+    parser.add_argument("records", help="Her satırı bir fatura verisi olan JSONL dosyası")
+    parser.add_argument("-o", "--output", default="batch_output",
+                        help="Klasör, .tar, .tar.gz, .zip veya :memory: hedefi (--shard-size ile shard klasörü)")
+    parser.add_argument("-w", "--workers", type=int, default=0, help="Process sayısı (0: aynı process)")
+    parser.add_argument("-c", "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Parça başına kayıt sayısı")
+    parser.add_argument("--max-in-flight", type=int, default=DEFAULT_MAX_IN_FLIGHT, help="Aynı anda işlenen parça sayısı")
+    parser.add_argument("--name-key", default=None, help="Dosya adı olarak kullanılacak kayıt alanı")
+    parser.add_argument("--paginate", action="store_true", help="Taşan tabloları birden çok sayfaya böl")
+    parser.add_argument("--totals", nargs="?", const="{}", default=None,
+                        help="Toplamları satır kalemlerinden hesapla (isteğe bağlı JSON seçenekler)")
+    parser.add_argument("--assets", choices=["inline", "link"], default=None,
+                        help="Görselleri data URI olarak göm veya assets/ altında tek kopya tut")
+    parser.add_argument("--styles", choices=STYLE_MODES, default="inline",
+                        help="classes: tekrar eden stilleri <style> içindeki sınıflarda topla")
+    parser.add_argument("--compress", choices=COMPRESSIONS, default=None,
+                        help="HTML çıktılarını dosya başına sıkıştır (zstd için zstandard gerekir)")
+    parser.add_argument("--shard-size", type=float, default=None, metavar="MB",
+                        help="Çıktıyı bu boyutta dönen, indeksli shard arşivlerine yaz")
+    parser.add_argument("--shard-format", choices=["tar", "zip"], default="tar", help="Shard arşiv biçimi")
+    parser.add_argument("--log-level", default="WARNING", help="invoice logger seviyesi (ör. INFO, DEBUG)")
+    parser.add_argument("--log-json", action="store_true", help="Log kayıtlarını tek satır JSON olarak yaz")
+    args = parser.parse_args()
+
+    configure_logging(args.log_level, args.log_json)
+    shard_size = int(args.shard_size * 1024 * 1024) if args.shard_size else None
+    with open_writer(args.output, args.compress, shard_size, args.shard_format) as writer:
+        summary = stream_render(
+            args.layout,
+            iter_jsonl_records(args.records),
+            writer,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            max_in_flight=args.max_in_flight,
+            name_key=args.name_key,
+            render_options={
+                "paginate": args.paginate,
+                "assets": args.assets,
+                "totals": None if args.totals is None else json.loads(args.totals) or True,
+                "styles": args.styles,
+            },
+        )
+
+    print(
+        f"Toplam: {summary['rendered']} render, {summary['failed']} hata, "
+        f"{summary['seconds']:.2f} sn, {summary['per_second']:.0f} fatura/sn"
+    )
+    for index, message in summary["failures"][:20]:
+        print(f"  kayıt {index}: {message}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+STYLE_MODES = ("inline", "classes")
+
+# `<style>` içeriği ham metindir; `<`/`>` CSS kaçışıyla yazılır ki `</style>` asla oluşmasın
+CSS_ESCAPES = str.maketrans({"<": "\\3c ", ">": "\\3e "})
+
+
+def check_style_mode(styles):
+    """Stil modunu doğrula (`inline`: her elemanda tam style, `classes`: paylaşılan sınıflar)"""
+    if styles not in STYLE_MODES:
+        raise ValueError(f"Geçersiz stil modu: {styles} ({'/'.join(STYLE_MODES)} olmalı)")
+    return styles
+
+
+def css_escape(declaration):
+    """Bildirimi `<style>` bloğuna güvenle yazılacak hale getir (`<`, `>` CSS kaçışı)"""
+    return declaration.translate(CSS_ESCAPES)
+
+
+def split_declarations(style):
+    """`a: b; c: d` biçimindeki style metnini normalize bildirim demetine çevir"""
+    declarations = []
+    for declaration in style.split(";"):
+        name, _, value = declaration.partition(":")
+        if name.strip():
+            declarations.append(f"{name.strip()}: {value.strip()}")
+    return tuple(declarations)
+
+
+class StyleSheet:
+    """Aynı stil bildirimlerini tek bir üretilmiş sınıfta toplayan stil tablosu.
+
+    `intern` aynı bildirimler için her zaman aynı sınıf adını döndürür;
+    sınıflar ilk görülme sırasıyla `s0`, `s1`, ... olarak adlandırılır ve
+    `css()` ile temel şablonun `<style>` bloğuna yazılır.
+    """
+
+    def __init__(self, prefix="s"):
+        self.prefix = prefix
+        self.classes = {}
+
+    def intern(self, style):
+        """Style metni veya bildirim demeti için sınıf adını döndür"""
+        declarations = split_declarations(style) if isinstance(style, str) else tuple(style)
+        name = self.classes.get(declarations)
+        if name is None:
+            name = self.classes[declarations] = f"{self.prefix}{len(self.classes)}"
+        return name
+
+    def css(self):
+        """Üretilen sınıfların CSS kuralları (şablondaki girintiyle)"""
+        rules = []
+        for declarations, name in self.classes.items():
+            body = "".join(f"      {css_escape(declaration)};\n" for declaration in declarations)
+            rules.append(f"\n    .{name} {{\n{body}    }}\n")
+        return "".join(rules)
@@ -0,0 +1,569 @@
+import hashlib
+import json
+import os
+import pickle
+import re
+from collections import OrderedDict
+from contextlib import ExitStack
+from itertools import islice
+
+from json_process import (
+    create_base_html_template,
+    create_cell_prefixes,
+    create_item_attributes,
+    create_item_html,
+    create_table_headers,
+    create_table_html,
+    create_image_content,
+)
+from data_keys import DataKey, KeyExtractor
+from escaping import escape_text
+from layout_schema import load_layout
+from pagination import paginate_items
+from parallel_rows import DEFAULT_TASK_ROWS, ParallelRows, resolve_row_workers, row_ranges
+from stylesheet import StyleSheet, check_style_mode
+import profiling
+from row_renderer import RowRenderer
+
+# Önceden derlenmiş şablon dosyası uzantısı ve başlığı; `CompiledTemplate` alanları değişince sürüm artırılır
+PRECOMPILED_SUFFIX = ".ctpl"
+PRECOMPILED_VERSION = 2
+PRECOMPILED_HEADER = f"invoice-template {PRECOMPILED_VERSION}\n".encode("ascii")
+
+# Şablon parçalarını bölmek için kullanılan işaretçi (şablon içinde geçmez)
+SLOT = "\ue000"
+
+CONTENT_PLACEHOLDER = "<!-- CONTENT_PLACEHOLDER -->"
+
+# Normalize edilmiş dokümanda eleman ve sayfa div'lerinin başlangıcı
+ITEM_START = '<div class="item'
+PAGE_OPEN = '<div class="page">'
+PAGE_OPEN_BREAK = '<div class="page" style="page-break-after:always;break-after:page">'
+
+# Eleman ve tablo gövdesi içeriğinin şablondaki girintileri
+ITEM_CONTENT_LEAD = "\n        "
+ITEM_CONTENT_TRAIL = "\n    "
+TBODY_CONTENT_LEAD = "\n            "
+TBODY_CONTENT_TRAIL = "\n          "
+
+# `render_to` ile akışta tablo gövdesinin tek seferde yazılan satır sayısı
+DEFAULT_CHUNK_ROWS = 1000
+
+# BeautifulSoup'un boşluk olarak kabul ettiği ASCII karakterler
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+# `"\0"` ile birleştirilmiş kolonda ayraçtan sonra gelen, sadece boşluktan oluşan değer
+BLANK_VALUE_PATTERN = re.compile(r"\0[" + ASCII_SPACES + r"]+(?:\0|\Z)")
+
+
+def _soup_text(value):
+    """Metni BeautifulSoup'un (minimal formatter) yazacağı şekilde döndür.
+
+    Sadece boşluktan oluşan metinler tek satır sonu/boşluğa indirgenir,
+    `&`, `<` ve `>` karakterleri kaçışlanır.
+    """
+    if _is_blank(value):
+        return "\n" if "\n" in value else " "
+    return escape_text(value)
+
+
+def _soup_column(values):
+    """Kolonu toplu olarak `_soup_text` biçimine getir; gerek yoksa dokunma"""
+    joined = "\0".join(values)
+    if "&" in joined or "<" in joined or ">" in joined:
+        return [_soup_text(value) for value in values]
+    # Boşluk içermeyen kolonlar (sayılar) regex taramasına girmez
+    if any(char in joined for char in ASCII_SPACES):
+        if _is_blank(values[0]) or BLANK_VALUE_PATTERN.search(joined):
+            return [_soup_text(value) for value in values]
+    return values
+
+
+def _is_blank(value):
+    """Değer boş değil ve sadece boşluktan mı oluşuyor"""
+    return bool(value) and not value.strip(ASCII_SPACES)
+
+
+def _soup_attr(value):
+    """Attribute değerini tırnaklarıyla birlikte BeautifulSoup biçiminde döndür"""
+    value = escape_text(value)
+    if '"' in value:
+        if "'" in value:
+            return '"' + value.replace('"', "&quot;") + '"'
+        return "'" + value + "'"
+    return '"' + value + '"'
+
+
+def _normalize_html(html):
+    """HTML'yi BeautifulSoup ile bir kez parse edip seri hale getir (sadece derlemede)"""
+    # bs4 render yolunda gerekmez; sadece derleme sırasında yüklenir
+    from bs4 import BeautifulSoup
+
+    return str(BeautifulSoup(html, "html.parser"))
+
+
+class CompiledTemplate:
+    """Bir JSON şablonunun bir kez derlenmiş hali.
+
+    Statik HTML (temel şablon, text elemanları, style metinleri, tablo
+    başlıkları) derleme sırasında bir kez üretilip normalize edilir ve
+    eleman bazında parçalara ayrılır; her render'da önce konumlar
+    hesaplanır, sonra sadece `top` değerleri ve veri slotları doldurulur.
+    Çıktı, eski `generate_html_from_json` + BeautifulSoup +
+    `adjust_elements_after_table_processing` zinciriyle aynıdır, fakat
+    doküman hiçbir zaman geri parse edilmez. `styles="classes"` ile yazı
+    ve hücre stilleri üretilen sınıflarda toplanır (bkz. `stylesheet`).
+    """
+
+    def __init__(self, json_data, styles="inline"):
+        with profiling.stage("compile"):
+            self._compile(json_data, check_style_mode(styles))
+
+    def _compile(self, json_data, styles="inline"):
+        """Statik parçaları üret, normalize et ve elemanlara ayır"""
+        self.json_data = json_data
+        self.styles = styles
+        self.stylesheet = StyleSheet() if styles == "classes" else None
+        # İçerik özeti (dosya biçiminden bağımsız); sonuç önbelleği anahtarında kullanılır
+        canonical = json.dumps(json_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        if styles != "inline":
+            canonical += f"\0styles={styles}"
+        self.digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+        # Şema doğrulaması derlemede bir kez yapılır; hatalı şablon `LayoutError` ile reddedilir
+        self.layout = load_layout(json_data)
+        self.page_size = self.layout.page_size
+        self.page_items = self.layout.page_items
+
+        # Slotlar doküman sırasıyla: (tip, item indeksi, ek bilgi)
+        self.slots = []
+        skeleton = self._build_skeleton()
+
+        self.segments = _normalize_html(skeleton).split(SLOT)
+        if len(self.segments) != len(self.slots) + 1:
+            raise ValueError("Şablon derlenemedi: slot sayısı uyuşmuyor")
+
+        # İçerik slotlarının çevresindeki girintiler render sırasında yazılır
+        for position, (kind, _, _) in enumerate(self.slots):
+            if kind in ("data", "image"):
+                self._strip_padding(position, ITEM_CONTENT_LEAD, ITEM_CONTENT_TRAIL)
+            elif kind == "table":
+                self._strip_padding(position, TBODY_CONTENT_LEAD, TBODY_CONTENT_TRAIL)
+
+        self._split_items()
+
+        # Tüm veri anahtarları (data, tablo, görsel) için toplu erişici
+        self.extractor = KeyExtractor(
+            item["value"] for item in self.page_items if item.get("type") in ("data", "table", "image")
+        )
+
+    def extract(self, data):
+        """Kayıttaki tüm slot değerlerini tek geçişte `{anahtar: değer}` olarak döndür"""
+        return self.extractor.extract(data)
+
+    def _build_skeleton(self):
+        """Dinamik kısımları işaretçiyle doldurulmuş şablon HTML'ini oluştur"""
+        elements_html = ""
+
+        for item in self.layout.items:
+            index, item_type = item.index, item.type
+
+            self.slots.append(("top", index, None))
+            style, class_name = create_item_attributes(item, SLOT, self.stylesheet)
+
+            if item_type == "text":
+                # Sabit metin derlemede bir kez kaçışlanır
+                content = escape_text(item.value)
+            elif item_type == "data":
+                self.slots.append(("data", index, DataKey(item.value)))
+                content = SLOT
+            elif item_type == "table":
+                headers, headers_html = create_table_headers(item, self.stylesheet)
+                cell_prefixes = create_cell_prefixes(headers, self.stylesheet)
+                self.slots.append(("table", index, RowRenderer(headers, cell_prefixes, escape_column=_soup_column)))
+                content = create_table_html(headers_html, SLOT)
+            else:
+                placeholder = _normalize_html(ITEM_CONTENT_LEAD + create_image_content("") + ITEM_CONTENT_TRAIL)
+                self.slots.append(("image", index, placeholder))
+                content = SLOT
+
+            elements_html += create_item_html(item_type, item, style, content, class_name) + "\n\n"
+
+        css = self.stylesheet.css() if self.stylesheet is not None else ""
+        base_html = create_base_html_template(self.page_size, css)
+        return base_html.replace(CONTENT_PLACEHOLDER, elements_html)
+
+    def _strip_padding(self, position, lead, trail):
+        """Slotun önündeki ve arkasındaki girintiyi segmentlerden çıkar"""
+        before = self.segments[position]
+        after = self.segments[position + 1]
+        if not before.endswith(lead) or not after.startswith(trail):
+            raise ValueError("Şablon derlenemedi: beklenmeyen içerik girintisi")
+        self.segments[position] = before[: -len(lead)]
+        self.segments[position + 1] = after[len(trail):]
+
+    def _split_items(self):
+        """Segmentleri baş, eleman parçaları, ayraçlar ve son kısım olarak ayır.
+
+        Her eleman `(indeks, tip, açılış, orta, kapanış, ek bilgi)` olarak
+        tutulur ve `açılış + top + orta + içerik + kapanış` şeklinde yazılır.
+        """
+        self.items = []
+        self.separators = []
+        segments = self.segments
+
+        if not self.slots:
+            self.head, self.tail = segments[0], ""
+            self._split_page()
+            return
+
+        rest = segments[0]
+        position = 0
+        while position < len(self.slots):
+            kind, index, _ = self.slots[position]
+
+            # Elemanın açılışı önceki segmentin son `<div class="item"` kısmıdır
+            start = rest.rfind(ITEM_START)
+            if self.items:
+                self.separators.append(rest[:start])
+            else:
+                self.head = rest[:start]
+            opening = rest[start:]
+
+            if position + 1 < len(self.slots) and self.slots[position + 1][1] == index:
+                kind, _, extra = self.slots[position + 1]
+                middle = segments[position + 1]
+                rest = segments[position + 2]
+                position += 2
+            else:
+                kind, extra = "text", None
+                middle = ""
+                rest = segments[position + 1]
+                position += 1
+
+            # Elemanın kapanışı, son slottan sonraki ilk `</div>`
+            end = rest.find("</div>") + len("</div>")
+            closing = rest[:end]
+            rest = rest[end:]
+            if kind == "text":
+                middle, closing = closing, ""
+
+            self.items.append((index, kind, opening, middle, closing, extra))
+
+        self.tail = rest
+        self._split_page()
+
+    def _split_page(self):
+        """Sayfa div'inin açılış/kapanışını sayfalama için ayır"""
+        page_start = self.head.rfind(PAGE_OPEN)
+        self.page_prefix = self.head[:page_start]
+        self.page_opening = self.head[page_start + len(PAGE_OPEN):]
+        close_end = self.tail.find("</div>") + len("</div>")
+        self.page_closing = self.tail[:close_end]
+        self.page_suffix = self.tail[close_end:]
+
+    def render(self, data=None, paginate=False, assets=None, row_workers=None):
+        """Konumları hesapla, veriyi slotlara yerleştirip son HTML'yi döndür.
+
+        `paginate=True` ile sayfaya sığmayan tablolar birden çok `.page`
+        div'ine bölünür (bkz. `pagination.paginate_items`). `assets` bir
+        `assets.AssetCache` ise görseller önbellekten (data URI veya tekil
+        dosya yolu olarak) yerleştirilir. Büyük tabloların gövdesi
+        `row_workers` process'te satır parçaları halinde üretilir
+        (None: satır sayısına göre otomatik, 0: her zaman seri; bkz.
+        `parallel_rows.resolve_row_workers`); çıktı seri üretimle aynıdır.
+        """
+        with ExitStack() as stack:
+            pools = self._row_pools(data, row_workers, stack)
+            pages, tops = self._layout(data, paginate, pools)
+            with profiling.stage("emit"):
+                return "".join(self._iter_parts(data, pages, tops, assets, pools=pools))
+
+    def render_to(self, sink, data=None, paginate=False, assets=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                  row_workers=None):
+        """`render` çıktısını doküman tek string olarak oluşturulmadan `sink.write` ile parça parça yaz.
+
+        Statik parçalar derlemedeki segmentlerden olduğu gibi, tablo
+        gövdeleri `chunk_rows` satırlık parçalar halinde yazılır; bellekte
+        en fazla bir satır parçası tutulur. `sink` metin kabul eden her
+        nesne olabilir (dosya, `io.StringIO`, `output_writers.ChunkedSink`).
+        `row_workers` `render` ile aynıdır; paralel üretilen parçalar da
+        sırayla yazılır. Yazılan sayfa sayısını döndürür.
+        """
+        with ExitStack() as stack:
+            pools = self._row_pools(data, row_workers, stack)
+            pages, tops = self._layout(data, paginate, pools)
+            write = sink.write
+            with profiling.stage("emit"):
+                for part in self._iter_parts(data, pages, tops, assets, chunk_rows, pools):
+                    write(part)
+        return 1 if pages is None else len(pages)
+
+    def _row_pools(self, data, row_workers, stack):
+        """Paralel işlenecek büyük tablolar için eleman indeksi -> `ParallelRows` (havuzlar `stack` ile kapanır)"""
+        pools = {}
+        if row_workers == 0:
+            return pools
+        for index, kind, _, _, _, _ in self.items:
+            if kind != "table":
+                continue
+            table_data = self._table_data(self.page_items[index], data)
+            workers = resolve_row_workers(len(table_data), row_workers)
+            if workers:
+                pools[index] = stack.enter_context(ParallelRows(table_data, workers))
+                profiling.count("parallel_tables")
+        return pools
+
+    def _layout(self, data, paginate, pools=None):
+        """Tablo satır sayıları ve ölçülen satır yüksekliklerinden sayfa yerleşimini veya eleman konumlarını hesapla"""
+        if profiling.enabled():
+            profiling.count("renders")
+            profiling.count("items", len(self.items))
+
+        with profiling.stage("layout"):
+            row_counts = self.layout.row_counts(data)
+            profiling.count("rows", sum(row_counts.values()))
+            parallel = {self.page_items[index]["value"]: pool for index, pool in pools.items()} if pools else None
+            row_heights = self.layout.row_heights(data, parallel)
+
+            if paginate and self.items:
+                return paginate_items(self.page_items, row_counts, order=self.layout.y_order,
+                                      row_heights=row_heights), None
+            return None, self.layout.tops(row_counts, row_heights)
+
+    def _iter_parts(self, data, pages, tops, assets=None, chunk_rows=None, pools=None):
+        """Dokümanı sırasıyla birleştirilecek parçalar olarak üret"""
+        bodies = self._parallel_bodies(pages, chunk_rows, pools) if pools else {}
+        if pages is not None:
+            yield from self._iter_pages(data, pages, assets, chunk_rows, bodies)
+            return
+
+        yield self.head
+        for position, compiled_item in enumerate(self.items):
+            if position:
+                yield self.separators[position - 1]
+            index = compiled_item[0]
+            yield from self._iter_item(compiled_item, tops[index], data, None, assets, chunk_rows, bodies.get(index))
+        yield self.tail
+
+    def _parallel_bodies(self, pages, chunk_rows, pools):
+        """Paralel üretilen tablolar için eleman indeksi -> sırayla üretilen gövde parçaları.
+
+        Sayfalamasız çıktıda tablo `chunk_rows` (yoksa `DEFAULT_TASK_ROWS`)
+        satırlık parçalara, sayfalı çıktıda sayfa parçalarına bölünür.
+        """
+        items_by_index = {compiled_item[0]: compiled_item for compiled_item in self.items}
+        bodies = {}
+        for index, pool in pools.items():
+            if pages is None:
+                bounds = row_ranges(len(pool.table_data), chunk_rows or DEFAULT_TASK_ROWS)
+            else:
+                bounds = [(start, end) for page in pages for placed, _, start, end in page if placed == index]
+            bodies[index] = pool.iter_rows(items_by_index[index][5], bounds)
+        return bodies
+
+    def _iter_pages(self, data, pages, assets=None, chunk_rows=None, bodies=None):
+        """Sayfalara dağıtılmış elemanlardan çok sayfalı dokümanın parçalarını üret"""
+        items_by_index = {compiled_item[0]: compiled_item for compiled_item in self.items}
+
+        yield self.page_prefix
+        for page_number, placements in enumerate(pages):
+            if page_number:
+                yield "\n"
+            last_page = page_number == len(pages) - 1
+            yield PAGE_OPEN if last_page else PAGE_OPEN_BREAK
+            yield self.page_opening
+
+            for position, (index, top, row_start, row_end) in enumerate(placements):
+                if position:
+                    yield "\n"
+                rows = None if row_start is None else (row_start, row_end)
+                # Paralel üretilen tabloda her sayfa parçası sıradaki tek aralıktır
+                body = islice(bodies[index], 1) if bodies and index in bodies else None
+                yield from self._iter_item(items_by_index[index], str(top), data, rows, assets, chunk_rows, body)
+
+            yield self.page_closing
+        yield self.page_suffix
+
+    def _iter_item(self, compiled_item, top, data, rows=None, assets=None, chunk_rows=None, body=None):
+        """Tek bir elemanın parçalarını verilen `top` değeriyle üret (`body`: paralel üretilen tablo gövdesi)"""
+        index, kind, opening, middle, closing, extra = compiled_item
+        yield opening
+        yield top
+        yield middle
+        if body is not None:
+            yield "\n"
+            yield from body
+            yield "\n"
+        elif kind == "table" and chunk_rows:
+            yield "\n"
+            yield from extra.iter_rows(self._table_data(self.page_items[index], data, rows), chunk_rows)
+            yield "\n"
+        else:
+            yield self.render_content(compiled_item, data, rows, assets)
+        yield closing
+
+    def render_content(self, compiled_item, data, rows=None, assets=None):
+        """Elemanın veriye bağlı içeriği (text elemanlarında boş)"""
+        index, kind, _, _, _, extra = compiled_item
+        item = self.page_items[index]
+
+        if kind == "data":
+            content = item["value"]
+            if data:
+                value = extra.get(data)
+                if value is not None:
+                    content = str(value)
+            return _soup_text(ITEM_CONTENT_LEAD + content + ITEM_CONTENT_TRAIL)
+        if kind == "table":
+            return self._render_table_body(item, extra, data, rows)
+        if kind == "image":
+            image_url = ""
+            if data and item["value"] in data:
+                image_url = data[item["value"]]
+            if image_url:
+                if assets is not None:
+                    image_url = assets.src(image_url, (item["size"]["width"], item["size"]["height"]))
+                return f'\n<img src={_soup_attr(str(image_url))} style="width:100%;height:100%;object-fit:cover;"/>\n'
+            return extra
+        return ""
+
+    @staticmethod
+    def _table_data(item, data, rows=None):
+        """Tablonun satır listesi (isteğe bağlı satır aralığıyla)"""
+        table_data = []
+        if data and item["value"] in data and isinstance(data[item["value"]], list):
+            table_data = data[item["value"]]
+            if rows is not None:
+                table_data = table_data[rows[0]:rows[1]]
+        return table_data
+
+    def _render_table_body(self, item, row_renderer, data, rows=None):
+        """Tablo gövdesinin normalize edilmiş içeriğini oluştur (isteğe bağlı satır aralığıyla)"""
+        return "\n" + row_renderer.render_rows(self._table_data(item, data, rows)) + "\n"
+
+
+def compile_template(json_data, styles="inline"):
+    """JSON şablon verisinden derlenmiş şablon oluştur"""
+    return CompiledTemplate(json_data, styles)
+
+
+def save_precompiled(compiled, path):
+    """Derlenmiş şablonu başlık + pickle olarak `.ctpl` dosyasına yaz; yazılan bayt sayısı döner.
+
+    Dosya geçici adla yazılıp yerine taşınır; çalışan worker'lar yarım
+    dosya görmez.
+    """
+    payload = PRECOMPILED_HEADER + pickle.dumps(compiled, protocol=pickle.HIGHEST_PROTOCOL)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "wb") as file:
+        file.write(payload)
+    os.replace(temp_path, path)
+    return len(payload)
+
+
+def loads_precompiled(payload, path="<bytes>"):
+    """`save_precompiled` çıktısından derlenmiş şablonu yükle (JSON okuma, doğrulama ve bs4 gerekmez).
+
+    pickle kullanıldığından sadece kendi ürettiğimiz (güvenilen) dosyalar
+    yüklenmelidir. Başlık veya sürüm farklıysa `ValueError` verilir.
+    """
+    if not payload.startswith(PRECOMPILED_HEADER):
+        raise ValueError(f"Önceden derlenmiş şablon bu sürümle uyumsuz: {path} (precompile.py ile yeniden üretin)")
+    return pickle.loads(memoryview(payload)[len(PRECOMPILED_HEADER):])
+
+
+def load_precompiled(path):
+    """`.ctpl` dosyasından derlenmiş şablonu yükle"""
+    with open(path, "rb") as file:
+        return loads_precompiled(file.read(), path)
+
+
+class TemplateCache:
+    """Dosya yolu + mtime/içerik hash'i ile anahtarlanan, boyutu sınırlı LRU önbellek.
+
+    Dosyanın mtime ve boyutu değişmediyse JSON hiç okunmaz. Değiştiyse
+    içerik hash'i karşılaştırılır; içerik aynıysa (ör. sadece `touch`)
+    derlenmiş şablon yeniden kullanılır. `.ctpl` uzantılı yollar
+    `save_precompiled` çıktısı olarak derlenmeden yüklenir.
+    """
+
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, json_file_path, styles="inline"):
+        """Şablonu önbellekten döndür, gerekirse yükleyip derle (stil modu başına ayrı kayıt)"""
+        path = os.path.abspath(json_file_path)
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        key = (path, styles)
+
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == stamp:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            profiling.count("template_cache_hits")
+            return entry[2]
+
+        with open(path, "rb") as file:
+            raw = file.read()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if entry is not None and entry[1] == digest:
+            # İçerik aynı, sadece dosya bilgisi değişmiş
+            self.entries[key] = (stamp, digest, entry[2])
+            self.entries.move_to_end(key)
+            self.hits += 1
+            profiling.count("template_cache_hits")
+            return entry[2]
+
+        self.misses += 1
+        profiling.count("template_cache_misses")
+        compiled = self._load(path, raw, styles)
+        self.entries[key] = (stamp, digest, compiled)
+        self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+        return compiled
+
+    @staticmethod
+    def _load(path, raw, styles):
+        """Dosya içeriğini derlenmiş şablona çevir (JSON derlenir, `.ctpl` olduğu gibi yüklenir)"""
+        if not path.endswith(PRECOMPILED_SUFFIX):
+            return compile_template(json.loads(raw.decode("utf-8")), styles)
+        compiled = loads_precompiled(raw, path)
+        if compiled.styles != check_style_mode(styles):
+            raise ValueError(f"{path} '{compiled.styles}' stil moduyla derlenmiş, '{styles}' istendi")
+        return compiled
+
+    def clear(self):
+        """Önbelleği ve sayaçları sıfırla"""
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """Önbellek istatistiklerini döndür"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+        }
+
+
+_default_cache = TemplateCache()
+
+
+def get_compiled_template(json_file_path, styles="inline"):
+    """Varsayılan önbellekten derlenmiş şablonu al"""
+    return _default_cache.get(json_file_path, styles)
+
+
+def template_cache_info():
+    """Varsayılan önbelleğin istatistiklerini döndür"""
+    return _default_cache.info()
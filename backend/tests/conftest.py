@@ -0,0 +1,47 @@
+import copy
+import os
+import sys
+
+import pytest
+
+# Backend modülleri paket değil, düz dosyalardır; testler backend klasöründen içe aktarır
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+LAYOUT_PATH = os.path.join(BACKEND_DIR, "test.json")
+
+
+def read_data_file(name):
+    """`tests/data` altındaki dosyayı satır sonlarına dokunmadan metin olarak oku"""
+    with open(os.path.join(DATA_DIR, name), "r", encoding="utf-8", newline="") as file:
+        return file.read()
+
+
+@pytest.fixture
+def layout_path():
+    return LAYOUT_PATH
+
+
+@pytest.fixture
+def layout():
+    from json_process import load_json_content
+
+    return load_json_content(LAYOUT_PATH)
+
+
+@pytest.fixture
+def fake_date():
+    """`main.fake_date`'in testin değiştirebileceği kopyası"""
+    import main
+
+    return copy.deepcopy(main.fake_date)
+
+
+@pytest.fixture
+def compiled():
+    from template_cache import compile_template
+    from json_process import load_json_content
+
+    return compile_template(load_json_content(LAYOUT_PATH))
@@ -0,0 +1,70 @@
+import os
+
+import pytest
+
+from assets import AssetCache, detect_mime_type
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 32
+
+
+@pytest.fixture
+def cache(tmp_path):
+    (tmp_path / "logo.png").write_bytes(PNG)
+    (tmp_path / "not_image.png").write_text("merhaba", encoding="utf-8")
+    return AssetCache("inline", base_dir=str(tmp_path))
+
+
+def test_path_for_stays_inside_base_dir(cache, tmp_path):
+    base = os.path.realpath(str(tmp_path))
+    assert cache.path_for("logo.png") == os.path.join(base, "logo.png")
+    assert cache.path_for("file:///" + os.path.join(base, "logo.png").lstrip("/")) == os.path.join(base, "logo.png")
+
+
+@pytest.mark.parametrize("reference", [
+    "/etc/passwd",
+    "../gizli.png",
+    "file:///etc/passwd",
+    "file://sunucu/logo.png",
+    "http://example.com/logo.png",
+    "logo.png\0.txt",
+    "logo%00.png",
+    "data:image/png;base64,AAAA",
+])
+def test_path_for_rejects_outside_references(cache, reference):
+    assert cache.path_for(reference) is None
+
+
+def test_path_for_rejects_symlink_escape(cache, tmp_path):
+    os.symlink("/etc/passwd", tmp_path / "link.png")
+    assert cache.path_for("link.png") is None
+
+
+def test_src_resolves_images_only(cache):
+    assert cache.src("logo.png").startswith("data:image/png;base64,")
+    assert cache.src("not_image.png") == "not_image.png"
+    assert cache.src("/etc/passwd") == "/etc/passwd"
+    cache.src("logo.png")
+    assert cache.info()["hits"] == 1
+
+
+def test_link_mode_reports_new_assets_once(tmp_path):
+    (tmp_path / "logo.png").write_bytes(PNG)
+    cache = AssetCache("link", base_dir=str(tmp_path))
+    src = cache.src("logo.png")
+    assert src.startswith("assets/") and src.endswith(".png")
+    assert cache.new_assets() == [(src, PNG)]
+    cache.src("logo.png")
+    assert cache.new_assets() == []
+
+
+@pytest.mark.parametrize("path, payload, mime_type", [
+    ("a.png", PNG, "image/png"),
+    ("a", b"\xff\xd8\xff\xe0", "image/jpeg"),
+    ("a.webp", b"RIFF\0\0\0\0WEBPVP8 ", "image/webp"),
+    ("a.webp", b"RIFF\0\0\0\0WAVEfmt ", None),
+    ("a.svg", b'<?xml version="1.0"?><svg/>', "image/svg+xml"),
+    ("a.svg", b'<?xml version="1.0"?><html/>', None),
+    ("a.png", b"merhaba", None),
+])
+def test_detect_mime_type(path, payload, mime_type):
+    assert detect_mime_type(path, payload) == mime_type
@@ -0,0 +1,72 @@
+"""test.json çıktısının ilk sürümdeki (`generate_html_from_json` + BeautifulSoup +
+`adjust_elements_after_table_processing`) çıktıyla byte düzeyinde aynı kaldığını doğrular.
+
+`tests/data/baseline_*.html` dosyaları ilk sürümün koduyla üretilmiştir; render
+çıktısını bilerek değiştiren bir değişiklik bu dosyaları yeniden üretmeli ve
+`result_cache.RENDERER_VERSION`'ı artırmalıdır.
+"""
+import gzip
+import io
+
+import pytest
+from bs4 import BeautifulSoup
+
+from conftest import read_data_file
+
+CASES = ["fake_date", "no_data", "fake_date_rows50"]
+
+
+def case_data(name, fake_date):
+    if name == "fake_date":
+        return fake_date
+    if name == "no_data":
+        return None
+    return dict(fake_date, table=fake_date["table"] * 5)
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_compiled_render_matches_baseline(name, compiled, fake_date):
+    assert compiled.render(case_data(name, fake_date)) == read_data_file(f"baseline_{name}.html")
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_render_to_matches_baseline(name, compiled, fake_date):
+    buffer = io.StringIO()
+    pages = compiled.render_to(buffer, case_data(name, fake_date), chunk_rows=7)
+    assert pages == 1
+    assert buffer.getvalue() == read_data_file(f"baseline_{name}.html")
+
+
+@pytest.mark.parametrize("name", CASES)
+def test_legacy_chain_matches_baseline(name, layout, fake_date):
+    from json_process import adjust_elements_after_table_processing, generate_html_from_json
+
+    data = case_data(name, fake_date)
+    soup = BeautifulSoup(generate_html_from_json(layout, data), "html.parser")
+    adjust_elements_after_table_processing(soup, layout, data)
+    assert str(soup) == read_data_file(f"baseline_{name}.html")
+
+
+def test_process_json_to_html_matches_baseline(tmp_path, layout_path, fake_date):
+    from json_process import process_json_to_html
+
+    expected = read_data_file("baseline_fake_date.html")
+    output_path = tmp_path / "fatura.html"
+
+    assert process_json_to_html(layout_path, fake_date, str(output_path)) == expected
+    assert output_path.read_text(encoding="utf-8") == expected
+
+    assert process_json_to_html(layout_path, fake_date, str(output_path), stream=True) is None
+    assert output_path.read_text(encoding="utf-8") == expected
+
+    compressed_path = tmp_path / "fatura.html.gz"
+    process_json_to_html(layout_path, fake_date, str(compressed_path), stream=True)
+    assert gzip.decompress(compressed_path.read_bytes()).decode("utf-8") == expected
+
+
+def test_precompiled_template_matches_baseline(tmp_path, compiled, fake_date):
+    from template_cache import load_precompiled, save_precompiled
+
+    path = str(tmp_path / "test.ctpl")
+    save_precompiled(compiled, path)
+    assert load_precompiled(path).render(fake_date) == read_data_file("baseline_fake_date.html")
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+import batch_process
+from batch_process import (
+    DEFAULT_NAME_PATTERN,
+    OutputNames,
+    RecordError,
+    iter_chunks,
+    iter_jsonl_records,
+    named_chunks,
+    output_file_name,
+    render_batch,
+)
+
+
+@pytest.mark.parametrize("name", ["", ".", "..", "a/b", "a\\b", "a\0b"])
+def test_output_file_name_rejects_invalid_names(name):
+    if not name:
+        # Boş değer ada dönüşmez, kalıp kullanılır
+        assert output_file_name(3, {"no": name}, DEFAULT_NAME_PATTERN, "no") == "invoice_3.html"
+        return
+    with pytest.raises(ValueError):
+        output_file_name(3, {"no": name}, DEFAULT_NAME_PATTERN, "no")
+
+
+def test_output_names_deduplicate_case_insensitively():
+    names = OutputNames(DEFAULT_NAME_PATTERN, "no")
+    chunk, assigned = names.assign([(0, {"no": "A"}), (1, {"no": "a"}), (2, {"no": "A_2"}), (3, {"no": "A"})])
+    assert assigned == {0: "A.html", 1: "a_1.html", 2: "A_2.html", 3: "A_3.html"}
+    assert [record for _, record in chunk] == [{"no": "A"}, {"no": "a"}, {"no": "A_2"}, {"no": "A"}]
+
+    # Sonraki parçalarda da önceki adlar dikkate alınır; geçersiz ad hatalı kayda dönüşür
+    chunk, assigned = names.assign([(4, {"no": "A_2"}), (5, {"no": ".."})])
+    assert assigned == {4: "A_2_4.html"}
+    assert isinstance(chunk[1][1], RecordError)
+
+
+def test_named_chunks_skip_default_pattern():
+    chunks = iter_chunks([{"no": "A"}, {"no": "A"}, {}], 2)
+    assert [names for _, names in named_chunks(chunks, DEFAULT_NAME_PATTERN)] == [None, None]
+
+
+def test_iter_jsonl_records(tmp_path):
+    path = tmp_path / "kayitlar.jsonl"
+    path.write_text('{"a": 1}\n\n{bozuk\n{"b": 2}\n', encoding="utf-8")
+    records = list(iter_jsonl_records(str(path)))
+    assert records[0] == {"a": 1} and records[2] == {"b": 2}
+    assert isinstance(records[1], RecordError)
+    assert "satır 3" in records[1].message
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_render_batch_names(tmp_path, layout_path, fake_date, workers):
+    records = [dict(fake_date, no=name) for name in ("A", "a", "A", "a/", "..", "B")] + [dict(fake_date)]
+    output_dir = str(tmp_path / "out")
+    summary = render_batch(layout_path, iter(records), output_dir, workers=workers, chunk_size=2, name_key="no")
+    assert sorted(os.listdir(output_dir)) == ["A.html", "A_2.html", "B.html", "a_1.html", "invoice_6.html"]
+    assert [index for index, _ in summary["failures"]] == [3, 4]
+    assert summary["rendered"] == 5
+
+
+def test_render_batch_output_matches_single_render(tmp_path, layout_path, compiled, fake_date):
+    output_dir = str(tmp_path / "out")
+    render_batch(layout_path, [fake_date], output_dir, workers=0)
+    with open(os.path.join(output_dir, "invoice_0.html"), "r", encoding="utf-8", newline="") as file:
+        assert file.read() == compiled.render(fake_date)
+
+
+@pytest.mark.parametrize("options", [None, "result_cache"])
+def test_failed_record_keeps_earlier_output(tmp_path, layout_path, options):
+    output_dir = str(tmp_path / "out")
+    if options == "result_cache":
+        options = {"result_cache": {"directory": str(tmp_path / "cache")}}
+    render_batch(layout_path, [{"invoiceName": "A"}], output_dir, workers=0)
+    path = os.path.join(output_dir, "invoice_0.html")
+    before = open(path, "rb").read()
+
+    summary = render_batch(layout_path, [{"table": [1, 2]}], output_dir, workers=0, render_options=options)
+    assert summary["failed"] == 1
+    assert os.listdir(output_dir) == ["invoice_0.html"]
+    assert open(path, "rb").read() == before
+
+
+def test_render_batch_totals_warnings(tmp_path, layout_path, fake_date):
+    records = [dict(fake_date, totalAmount={"totalAmount": "1"}), {"table": [{"unitPrice": "x"}]}, fake_date]
+    summary = render_batch(layout_path, records, str(tmp_path / "out"), workers=0, render_options={"totals": True})
+    assert summary["rendered"] == 2
+    assert [index for index, _ in summary["failures"]] == [1]
+    assert summary["warnings"] == [(0, "totalAmount.totalAmount: gönderilen 1, hesaplanan 167.60")]
+
+
+def test_prepare_chunk_keeps_record_order(fake_date):
+    chunk = [(0, fake_date), (1, RecordError("bozuk")), (2, {})]
+    assert batch_process.prepare_chunk(chunk) == [(0, fake_date, None), (1, None, "bozuk"), (2, {}, None)]
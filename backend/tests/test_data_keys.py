@@ -0,0 +1,34 @@
+import pytest
+
+from data_keys import KeyExtractor
+from escaping import escape_attr, escape_column, escape_text, text
+from json_process import get_nested_value
+
+DATA = {"user": {"name": "Ayşe", "items": [{"n": 1}]}, "total": 0}
+
+
+@pytest.mark.parametrize("key, value", [
+    ("user.name", "Ayşe"),
+    ("user.items[0].n", 1),
+    ("user.items.0.n", 1),
+    ("total", 0),
+    ("user.missing", None),
+    ("user.items[3].n", None),
+    ("user.name.first", None),
+])
+def test_get_nested_value(key, value):
+    assert get_nested_value(DATA, key) == value
+
+
+def test_key_extractor_defaults():
+    extractor = KeyExtractor(["user.name", "user.items[0].n", "x"], {"x": "-"})
+    assert extractor.extract(DATA) == {"user.name": "Ayşe", "user.items[0].n": 1, "x": "-"}
+
+
+def test_escaping():
+    plain = "düz metin"
+    assert escape_text(plain) is plain
+    assert escape_text('a<b&"') == 'a&lt;b&amp;"'
+    assert escape_attr('a"<') == "a&quot;&lt;"
+    assert text(3) == "3"
+    assert escape_column(["x", "<"]) == ["x", "&lt;"]
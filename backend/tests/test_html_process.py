@@ -0,0 +1,53 @@
+import re
+
+import pytest
+
+from html_process import process_html, process_html_soup
+from html_template import prepare_html_template
+from json_process import generate_html_from_json, generate_html_template_only
+
+
+def tops(html):
+    return [int(top) for top in re.findall(r"top: (\d+)px", html)]
+
+
+def render_all(html, data):
+    soup = process_html_soup(html, data)
+    assert prepare_html_template(html).render(data) == soup
+    assert process_html(html, data) == soup
+    return soup
+
+
+def test_html_flow_shifts_tables_sequentially():
+    # A'nın altı 38, B'ninki 100; 80'deki eleman A ile 110'a iner ve B'nin altına takılır
+    layout = {"pageItems": [
+        {"id": "a", "type": "table", "value": "a", "position": {"x": 0, "y": 0}, "size": {"width": 150, "height": 38}},
+        {"id": "b", "type": "table", "value": "b", "position": {"x": 300, "y": 20}, "size": {"width": 150, "height": 80}},
+        {"id": "c", "type": "text", "value": "alt", "position": {"x": 0, "y": 80}, "size": {"width": 100, "height": 20}},
+    ]}
+    data = {"a": [{"productName": "x"}] * 2, "b": [{"productName": "y"}] * 3}
+    html = render_all(generate_html_template_only(layout), data)
+    assert tops(html) == [0, 20, 132]
+
+
+@pytest.mark.parametrize("data", [
+    {},
+    {"table": "x", "image": "", "invoiceName": "<b>&amp;</b>", "totalVat": None},
+    {"image": 'http://a/b?x=1&amp;y="2"'},
+    {"table": []},
+])
+def test_prepared_template_matches_soup(layout, data):
+    render_all(generate_html_template_only(layout), data)
+
+
+def test_prepared_template_matches_soup_for_invoice(layout, fake_date):
+    html = render_all(generate_html_template_only(layout), dict(fake_date, table=fake_date["table"] * 10))
+    assert "Widget A" in html
+
+
+def test_filled_template_is_refilled(layout, fake_date):
+    # Doldurulmuş çıktı tekrar şablon olarak kullanılabilir; eski satırlar silinir
+    filled = generate_html_from_json(layout, fake_date)
+    html = render_all(filled, {"table": [{"productName": "Yeni"}]})
+    assert "Yeni" in html
+    assert "Widget A" not in html
@@ -0,0 +1,88 @@
+import copy
+
+import pytest
+
+from layout import ROW_HEIGHT, TABLE_HEADER_HEIGHT, ItemIndex, compute_item_tops, table_actual_height, table_shifts
+
+
+def test_cumulative_shifts_use_original_bottoms():
+    # A (y=0) ve yanındaki B (y=50) tablosu; 120 sadece A'nın, 200 ikisinin altında
+    index = ItemIndex([0, 50, 120, 200])
+    assert index.cumulative_shifts([(100, 30), (150, 20)]) == [0, 0, 30, 50]
+
+
+def test_sequential_shifts_compare_against_shifted_positions():
+    # A kaydırdıktan sonra 120 → 150 olur ve B'nin alt sınırına (150) takılır
+    index = ItemIndex([0, 50, 120, 200])
+    assert index.sequential_shifts([(0, 100, 30), (1, 150, 20)]) == [0, 0, 50, 50]
+
+
+def test_sequential_shifts_move_bottom_of_shifted_table():
+    # B (y=110) A'nın altında olduğundan alt sınırı 160 → 190 olur; 140 → 170 onun üstünde kalır
+    index = ItemIndex([0, 110, 140])
+    assert index.sequential_shifts([(0, 100, 30), (1, 160, 20)]) == [0, 30, 30]
+    # Tablo sırası verilmezse alt sınır olduğu gibi kullanılır
+    assert index.sequential_shifts([(None, 100, 30), (None, 160, 20)]) == [0, 30, 50]
+    assert index.cumulative_shifts([(100, 30), (160, 20)]) == [0, 30, 30]
+
+
+def test_items_without_position_are_not_shifted():
+    index = ItemIndex([0, None, 120])
+    assert index.cumulative_shifts([(100, 30)]) == [0, 0, 30]
+    assert index.sequential_shifts([(0, 100, 30)]) == [0, 0, 30]
+
+
+def test_table_actual_height():
+    assert table_actual_height(3) == TABLE_HEADER_HEIGHT + 3 * ROW_HEIGHT
+    assert table_actual_height(2, [34, 55]) == TABLE_HEADER_HEIGHT + 89
+
+
+def test_table_shifts_only_for_growing_tables(layout):
+    table = next(item for item in layout["pageItems"] if item["type"] == "table")
+    height = table["size"]["height"]
+    fitting_rows = (height - TABLE_HEADER_HEIGHT) // ROW_HEIGHT
+
+    assert table_shifts(layout["pageItems"], {table["value"]: fitting_rows}) == []
+    shifts = table_shifts(layout["pageItems"], {table["value"]: fitting_rows + 2})
+    bottom = table["position"]["y"] + height
+    assert shifts == [(bottom, table_actual_height(fitting_rows + 2) - height)]
+
+
+@pytest.mark.parametrize("rows", [0, 1, 10, 60])
+def test_layout_tops_match_compute_item_tops(layout, rows):
+    from layout_schema import load_layout
+
+    parsed = load_layout(layout)
+    table = parsed.tables[0]
+    row_counts = {table.value: rows}
+    assert parsed.tops(row_counts) == compute_item_tops(parsed.page_items, row_counts)
+
+
+def test_layout_tops_with_measured_heights(layout):
+    from layout_schema import load_layout
+
+    parsed = load_layout(layout)
+    table = parsed.tables[0]
+    row_counts = {table.value: 3}
+    row_heights = {table.value: [34, 200, 34]}
+    tops = parsed.tops(row_counts, row_heights)
+    assert tops == compute_item_tops(parsed.page_items, row_counts, row_heights)
+    assert tops != parsed.tops(row_counts)
+
+
+def test_json_flow_shifts_side_by_side_tables_cumulatively(layout):
+    from template_cache import compile_template
+
+    # İkinci tablo birincinin yanında; altındaki eleman iki kaydırmanın toplamı kadar iner
+    layout = copy.deepcopy(layout)
+    table = next(item for item in layout["pageItems"] if item["type"] == "table")
+    side = dict(table, id="side", value="side", position={"x": table["position"]["x"] + 400, "y": table["position"]["y"]})
+    footer = {"id": "footer", "type": "text", "value": "alt", "position": {"x": 0, "y": 2000},
+              "size": {"width": 100, "height": 20}}
+    layout["pageItems"] += [side, footer]
+    data = {table["value"]: [{"productName": "x"}] * 10, "side": [{"productName": "y"}] * 5}
+
+    html = compile_template(layout).render(data)
+    grow = table_actual_height(10) - table["size"]["height"]
+    grow_side = table_actual_height(5) - table["size"]["height"]
+    assert f"top: {2000 + grow + grow_side}px" in html
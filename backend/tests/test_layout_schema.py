@@ -0,0 +1,63 @@
+import copy
+
+import pytest
+
+from layout_schema import DEFAULT_COLUMNS, LayoutError, get_layout, item_columns, load_layout
+
+
+def test_loads_test_layout(layout):
+    parsed = load_layout(layout)
+    assert len(parsed.items) == len(layout["pageItems"])
+    table = parsed.tables[0]
+    assert table.type == "table"
+    assert [column.value for column in item_columns(table)] == [
+        column["value"] for column in layout["pageItems"][table.index]["dataColumns"]
+    ]
+
+
+def test_table_without_columns_uses_defaults():
+    layout = {"pageItems": [{"id": "t", "type": "table", "value": "table",
+                             "position": {"x": 0, "y": 0}, "size": {"width": 100, "height": 90}}]}
+    assert item_columns(load_layout(layout).tables[0]) is DEFAULT_COLUMNS
+
+
+def test_errors_are_aggregated():
+    layout = {"pageItems": [
+        {"id": "a", "value": 3, "type": "chart", "position": {"x": 0, "y": 0}, "size": {"width": 1, "height": 1}},
+        {"id": "b", "value": "b", "position": {"x": "0"}, "size": {"width": 1, "height": 1}, "textAlign": "justify"},
+        "metin",
+    ]}
+    with pytest.raises(LayoutError) as info:
+        load_layout(layout)
+    fields = [(item_id, field) for item_id, field, _ in info.value.errors]
+    assert ("a", "value") in fields
+    assert ("a", "type") in fields
+    assert ("b", "textAlign") in fields
+    assert ("#2", "") in fields
+    assert any(item_id == "b" and field.startswith("position") for item_id, field in fields)
+    assert "Şablon geçersiz" in str(info.value)
+
+
+def test_layout_error_is_value_error():
+    with pytest.raises(ValueError):
+        load_layout([])
+    with pytest.raises(LayoutError):
+        load_layout({"pageItems": {}})
+
+
+@pytest.mark.parametrize("font_family", ["a;b", "x}", "<style>", ""])
+def test_forbidden_font_family(font_family):
+    layout = {"pageItems": [{"id": "a", "value": "a", "fontFamily": font_family,
+                             "position": {"x": 0, "y": 0}, "size": {"width": 1, "height": 1}}]}
+    with pytest.raises(LayoutError) as info:
+        load_layout(layout)
+    assert info.value.errors[0][1] == "fontFamily"
+
+
+def test_get_layout_caches_by_content(layout):
+    first = get_layout(layout)
+    assert get_layout(copy.deepcopy(layout)) is first
+
+    changed = copy.deepcopy(layout)
+    changed["pageItems"][0]["position"]["y"] += 1
+    assert get_layout(changed) is not first
@@ -0,0 +1,111 @@
+import gzip
+import json
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from output_writers import ChunkedSink, MemoryWriter, ShardIndex, ShardWriter, open_output, open_writer
+
+HTML = "<html>ş" + "x" * 3000 + "</html>"
+
+
+@pytest.mark.parametrize("shard_format", ["tar", "zip"])
+@pytest.mark.parametrize("compression", [None, "gzip"])
+def test_shard_round_trip(tmp_path, shard_format, compression):
+    path = str(tmp_path / "shards")
+    with ShardWriter(path, shard_format, max_shard_bytes=20000, compression=compression, buffer_size=300) as writer:
+        for number in range(40):
+            writer.write(f"inv_{number}.html", HTML + str(number))
+        writer.write("assets/a.png", b"\x89PNG" * 10)
+    # Yeni çalıştırma mevcut shard'lara dokunmadan sıradaki numaradan devam eder
+    with open_writer(path, compression, shard_size=20000, shard_format=shard_format) as writer:
+        writer.write("late.html", "late")
+
+    index = ShardIndex(path)
+    assert len(index) == 42
+    for number in range(40):
+        assert index.read(f"inv_{number}.html").decode("utf-8") == HTML + str(number)
+    assert index.read("assets/a.png") == b"\x89PNG" * 10
+    assert index.read("late.html") == b"late"
+
+    shards = sorted(name for name in os.listdir(path) if not name.endswith(".idx"))
+    assert len(shards) >= 2
+    for name in shards:
+        if shard_format == "tar":
+            with tarfile.open(os.path.join(path, name)) as archive:
+                archive.getmembers()
+        else:
+            with zipfile.ZipFile(os.path.join(path, name)) as archive:
+                assert archive.testzip() is None
+
+
+def test_shard_index_skips_incomplete_and_unwritten_entries(tmp_path):
+    path = str(tmp_path / "shards")
+    with ShardWriter(path, "tar") as writer:
+        writer.write("a.html", HTML)
+        writer.write("b.html", HTML)
+    index_path = os.path.join(path, "shard-00000.tar.idx")
+    shard_size = os.path.getsize(os.path.join(path, "shard-00000.tar"))
+
+    with open(index_path, "a", encoding="utf-8") as file:
+        # Verisi shard'da olmayan kayıt ve yarım kalmış son satır
+        file.write(json.dumps({"name": "c.html", "member": "c.html", "offset": shard_size - 10, "size": 50}) + "\n")
+        file.write('{"name": "d.html", "member": "d.ht')
+
+    index = ShardIndex(path)
+    assert sorted(index.names()) == ["a.html", "b.html"]
+    assert "c.html" not in index
+    assert index.read("b.html").decode("utf-8") == HTML
+
+
+def test_shard_index_skips_missing_shard(tmp_path):
+    path = str(tmp_path / "shards")
+    with ShardWriter(path, "zip") as writer:
+        writer.write("a.html", HTML)
+    os.remove(os.path.join(path, "shard-00000.zip"))
+    assert len(ShardIndex(path)) == 0
+
+
+def test_invalid_shard_format(tmp_path):
+    with pytest.raises(ValueError):
+        ShardWriter(str(tmp_path), "rar")
+
+
+def test_directory_and_memory_writers(tmp_path):
+    path = str(tmp_path / "out")
+    with open_writer(path, "gzip") as writer:
+        writer.write("a.html", HTML)
+    with gzip.open(os.path.join(path, "a.html.gz"), "rt", encoding="utf-8") as file:
+        assert file.read() == HTML
+
+    memory = MemoryWriter("gzip")
+    memory.write("a.html", HTML)
+    assert memory.read("a.html").decode("utf-8") == HTML
+
+
+def test_open_output_compresses_by_suffix(tmp_path):
+    path = str(tmp_path / "fatura.html.gz")
+    with open_output(path) as file:
+        file.write(HTML)
+    assert gzip.decompress(open(path, "rb").read()).decode("utf-8") == HTML
+
+
+def test_zstd_requires_package(tmp_path):
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        with pytest.raises(RuntimeError):
+            open_writer(str(tmp_path / "out"), "zstd")
+    else:
+        pytest.skip("zstandard kurulu")
+
+
+def test_chunked_sink_groups_writes():
+    blocks = []
+    with ChunkedSink(blocks.append, chunk_size=10) as sink:
+        for part in ["abc", "def", "ghij", "k", "ş"]:
+            sink.write(part)
+    assert blocks == [b"abcdefghij", "kş".encode("utf-8")]
+    assert sink.written == 12
@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from parallel_rows import DEFAULT_TASK_ROWS, PARALLEL_MIN_ROWS, resolve_row_workers, row_ranges
+
+
+def test_row_ranges():
+    assert row_ranges(7, 3) == [(0, 3), (3, 6), (6, 7)]
+    assert row_ranges(0, 3) == []
+
+
+def test_resolve_row_workers():
+    assert resolve_row_workers(PARALLEL_MIN_ROWS - 1) == 0
+    assert resolve_row_workers(10, row_workers=0) == 0
+    # Görev sayısından fazla process açılmaz; tek görevlik tablo seri üretilir
+    assert resolve_row_workers(DEFAULT_TASK_ROWS, row_workers=4) == 0
+    assert resolve_row_workers(DEFAULT_TASK_ROWS * 3, row_workers=8) == 3
+    assert resolve_row_workers(DEFAULT_TASK_ROWS * 3, row_workers=2) == 2
+
+
+@pytest.fixture
+def large_data(fake_date):
+    rows = []
+    for number in range(DEFAULT_TASK_ROWS * 2 + 7):
+        row = dict(fake_date["table"][number % len(fake_date["table"])])
+        row["productName"] = f"Ürün {number} " + "uzun açıklama " * (number % 9)
+        rows.append(row)
+    return dict(fake_date, table=rows)
+
+
+def test_parallel_render_matches_serial(compiled, large_data):
+    serial = compiled.render(large_data, row_workers=0)
+    assert compiled.render(large_data, row_workers=2) == serial
+
+    buffer = io.StringIO()
+    compiled.render_to(buffer, large_data, chunk_rows=999, row_workers=2)
+    assert buffer.getvalue() == serial
+
+
+def test_parallel_row_heights_match_serial(layout, large_data):
+    from layout_schema import load_layout
+    from parallel_rows import ParallelRows
+
+    parsed = load_layout(layout)
+    pool = ParallelRows(large_data["table"], 2)
+    try:
+        assert parsed.row_heights(large_data, {"table": pool}) == parsed.row_heights(large_data)
+    finally:
+        pool.close()
@@ -0,0 +1,114 @@
+import asyncio
+import json
+
+import pytest
+
+from render_service import MISMATCH_HEADER, HTTPError, RenderService, load_render_data, request_length
+
+
+@pytest.mark.parametrize("headers, status", [
+    ({"transfer-encoding": "chunked"}, 501),
+    ({"content-length": "-1"}, 400),
+    ({"content-length": "１２"}, 400),
+    ({"content-length": "abc"}, 400),
+    ({"content-length": str(10 ** 12)}, 413),
+])
+def test_request_length_errors(headers, status):
+    with pytest.raises(HTTPError) as info:
+        request_length(headers)
+    assert info.value.status == status
+
+
+def test_request_length():
+    assert request_length({}) == 0
+    assert request_length({"content-length": "42"}) == 42
+
+
+def test_load_render_data():
+    assert load_render_data(b"") is None
+    with pytest.raises(ValueError):
+        load_render_data(b"[1, 2]")
+    mismatches = []
+    data = load_render_data(b'{"table": [{"unitPrice": 1}], "totalAmount": {"subTotal": "2"}}', True, mismatches)
+    assert data["totalAmount"]["subTotal"] == "1.00"
+    assert mismatches == [("totalAmount.subTotal", "2", "1.00")]
+
+
+async def read_response(reader):
+    """Yanıtı `(durum, başlıklar, gövde)` olarak oku (chunked gövde birleştirilir)"""
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+    status_line, *header_lines = head.strip().split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, value = line.split(":", 1)
+        headers[name.lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        body = b""
+        while True:
+            size = int((await reader.readuntil(b"\r\n"))[:-2], 16)
+            chunk = await reader.readexactly(size + 2)
+            if not size:
+                break
+            body += chunk[:-2]
+    else:
+        body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return int(status_line.split()[1]), headers, body
+
+
+def test_service_round_trip(tmp_path, layout_path, compiled, fake_date):
+    async def scenario():
+        service = RenderService(str(tmp_path), workers=1)
+        server = await asyncio.start_server(service.handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        connection = {}
+
+        async def request(method, path, body=b"", extra=""):
+            if not connection:
+                connection["reader"], connection["writer"] = await asyncio.open_connection("127.0.0.1", port)
+            connection["writer"].write(
+                f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n{extra}\r\n".encode() + body)
+            response = await asyncio.wait_for(read_response(connection["reader"]), 30)
+            if response[1]["connection"] == "close":
+                assert await asyncio.wait_for(connection["reader"].read(), 10) == b""
+                connection.pop("writer").close()
+                connection.clear()
+            return response
+
+        try:
+            status, _, body = await request("POST", "/layouts", open(layout_path, "rb").read())
+            assert status == 201
+            layout_id = json.loads(body)["layoutId"]
+
+            # Aynı bağlantıda (keep-alive) render
+            status, headers, body = await request("POST", f"/layouts/{layout_id}/render",
+                                                  json.dumps(fake_date).encode("utf-8"))
+            assert status == 200
+            assert headers["connection"] == "keep-alive"
+            assert MISMATCH_HEADER.lower() not in headers
+            assert body.decode("utf-8") == compiled.render(fake_date)
+
+            sent = dict(fake_date, totalAmount={"totalAmount": "1"})
+            status, headers, _ = await request("POST", f"/layouts/{layout_id}/render?totals=1",
+                                               json.dumps(sent).encode("utf-8"))
+            assert status == 200
+            assert json.loads(headers[MISMATCH_HEADER.lower()]) == [["totalAmount.totalAmount", "1", "167.60"]]
+
+            # Geçersiz veri 400 ile döner ve bağlantı kapatılır
+            status, headers, _ = await request("POST", f"/layouts/{layout_id}/render", b"[1]")
+            assert status == 400
+            assert headers["connection"] == "close"
+
+            status, _, _ = await request("POST", "/layouts/yok/render", b"{}")
+            assert status == 404
+
+            status, headers, _ = await request("GET", "/health", extra="Connection: close\r\n")
+            assert status == 200
+            assert headers["connection"] == "close"
+        finally:
+            if connection:
+                connection["writer"].close()
+            server.close()
+            await server.wait_closed()
+            service.close()
+
+    asyncio.run(scenario())
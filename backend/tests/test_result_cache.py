@@ -0,0 +1,42 @@
+import os
+
+from result_cache import ResultCache, result_key
+
+
+def test_result_key_ignores_key_order():
+    assert result_key("d", {"a": 1, "b": 2}) == result_key("d", {"b": 2, "a": 1})
+    assert result_key("d", {"a": 1}) != result_key("d", {"a": 1}, paginate=True)
+    assert result_key("d", {"a": 1}) != result_key("d", {"a": 1}, "html_pages")
+
+
+def test_render_matches_compiled(tmp_path, compiled, fake_date):
+    cache = ResultCache(str(tmp_path))
+    expected = compiled.render(fake_date).encode("utf-8")
+    assert cache.render(compiled, fake_date) == expected
+    assert cache.render(compiled, fake_date) == expected
+    assert cache.info()["memory_hits"] == 1
+
+    # Yeni bir önbellek aynı klasörden okur
+    other = ResultCache(str(tmp_path))
+    assert other.render(compiled, fake_date) == expected
+    assert other.info()["disk_hits"] == 1
+
+
+def test_render_with_pages(tmp_path, compiled, fake_date):
+    data = dict(fake_date, table=fake_date["table"] * 40)
+    cache = ResultCache(str(tmp_path), compress=True)
+    payload, pages = cache.render_with_pages(compiled, data, paginate=True)
+    assert payload == compiled.render(data, paginate=True).encode("utf-8")
+    assert pages > 1
+    assert ResultCache(str(tmp_path), compress=True).render_with_pages(compiled, data, paginate=True) == (payload, pages)
+
+
+def test_disk_eviction(tmp_path):
+    cache = ResultCache(str(tmp_path), max_memory_bytes=0, max_disk_bytes=3000)
+    for number in range(10):
+        cache.put(result_key("d", {"n": number}), b"x" * 1000)
+    files = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert sum(os.path.getsize(path) for path in (
+        os.path.join(root, name) for root, _, names in os.walk(tmp_path) for name in names)) <= 3000
+    assert len(files) < 10
+    assert cache.info()["disk_evictions"] > 0
@@ -0,0 +1,67 @@
+import io
+import os
+
+import pytest
+
+from template_cache import TemplateCache, compile_template
+
+
+def many_rows(fake_date, times):
+    return dict(fake_date, table=fake_date["table"] * times)
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 3, 1000])
+@pytest.mark.parametrize("paginate", [False, True])
+def test_render_to_matches_render(compiled, fake_date, chunk_rows, paginate):
+    data = many_rows(fake_date, 20)
+    buffer = io.StringIO()
+    pages = compiled.render_to(buffer, data, paginate=paginate, chunk_rows=chunk_rows)
+    html = compiled.render(data, paginate=paginate)
+    assert buffer.getvalue() == html
+    assert pages == (html.count('<div class="page"') if paginate else 1)
+
+
+def test_paginated_render_splits_long_tables(compiled, fake_date):
+    html = compiled.render(many_rows(fake_date, 40), paginate=True)
+    assert html.count('<div class="page"') > 1
+
+
+def test_class_styles_render_to_matches_render(layout, fake_date):
+    compiled = compile_template(layout, styles="classes")
+    buffer = io.StringIO()
+    compiled.render_to(buffer, fake_date, chunk_rows=2)
+    assert buffer.getvalue() == compiled.render(fake_date)
+
+
+def test_template_cache_reuses_compiled_template(tmp_path, layout_path):
+    path = tmp_path / "layout.json"
+    path.write_bytes(open(layout_path, "rb").read())
+    cache = TemplateCache(maxsize=2)
+
+    first = cache.get(str(path))
+    assert cache.get(str(path)) is first
+
+    # Sadece mtime değişirse içerik hash'i eşleşir ve şablon yeniden derlenmez
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get(str(path)) is first
+    assert cache.info()["hits"] == 2
+    assert cache.info()["misses"] == 1
+
+    # Stil modu ayrı bir kayıttır
+    assert cache.get(str(path), styles="classes") is not first
+    assert cache.info()["size"] == 2
+
+
+def test_template_cache_recompiles_changed_content(tmp_path, layout_path):
+    path = tmp_path / "layout.json"
+    content = open(layout_path, "rb").read()
+    path.write_bytes(content)
+    cache = TemplateCache()
+    first = cache.get(str(path))
+
+    path.write_bytes(content + b"\n")
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert cache.get(str(path)) is not first
+    assert cache.info()["misses"] == 2
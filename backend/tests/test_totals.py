@@ -0,0 +1,107 @@
+from decimal import Decimal
+
+import pytest
+
+from totals import (
+    amount_in_words,
+    apply_totals,
+    apply_totals_batch,
+    apply_totals_chunk,
+    find_mismatches,
+    format_rate,
+    to_decimal,
+)
+
+
+def test_fake_date_totals(fake_date):
+    result = apply_totals(fake_date, line_total_key="totalAmount")
+    totals = result["totalAmount"]
+    assert totals["subTotal"] == "140.00"
+    assert totals["totalVat"] == "27.60"
+    assert totals["totalAmount"] == "167.60"
+    assert totals["totalWithText"] == "Yüz Altmış Yedi TL Altmış Kr"
+    assert result["vatBreakdown"] == [
+        {"rate": "18", "base": "20.00", "vat": "3.60"},
+        {"rate": "20", "base": "120.00", "vat": "24.00"},
+    ]
+    assert result["table"][0]["totalAmount"] == "12.00"
+    # Girdi kaydı değiştirilmez
+    assert fake_date["table"][0]["totalAmount"] == 12
+
+
+def test_float_inputs_use_decimal_arithmetic():
+    # 0.1 + 0.2 float'ta 0.30000000000000004 olur; kolonlar Decimal ile toplanır
+    record = {"table": [{"unitPrice": 0.1}, {"unitPrice": 0.2}]}
+    assert apply_totals(record)["totalAmount"]["subTotal"] == "0.30"
+    assert to_decimal(12.5) == Decimal("12.5")
+
+
+def test_percent_rate_unit():
+    record = {"table": [{"unitPrice": "10", "vatRate": "18", "quantity": "3", "discount": "1.5"}]}
+    totals = apply_totals(record, rate_unit="percent")["totalAmount"]
+    assert totals["subTotal"] == "30.00"
+    assert totals["totalDiscount"] == "1.50"
+    assert totals["totalVat"] == "5.13"
+    assert totals["totalAmount"] == "33.63"
+
+
+def test_invalid_number_raises():
+    with pytest.raises(ValueError):
+        apply_totals({"table": [{"unitPrice": "on"}]})
+
+
+def test_batch_matches_single(fake_date):
+    records = [
+        fake_date,
+        {"table": []},
+        {"table": [{"unitPrice": "3.33", "quantity": 3, "vatRate": "0.01"}]},
+        {"other": 1},
+    ]
+    assert apply_totals_batch(records, aliases={"total": "totalAmount"}) == [
+        apply_totals(record, aliases={"total": "totalAmount"}) for record in records
+    ]
+
+
+@pytest.mark.parametrize("rate, text", [
+    (Decimal("0.18"), "18"),
+    (Decimal("0.085"), "8.5"),
+    (Decimal("1"), "100"),
+    (Decimal("0"), "0"),
+])
+def test_format_rate(rate, text):
+    assert format_rate(rate) == text
+
+
+@pytest.mark.parametrize("amount, text", [
+    ("0", "Sıfır TL"),
+    ("1001.05", "Bin Bir TL Beş Kr"),
+    ("2000000", "İki Milyon TL"),
+    ("-2", "Eksi İki TL"),
+])
+def test_amount_in_words(amount, text):
+    assert amount_in_words(amount) == text
+
+
+def test_find_mismatches(fake_date):
+    record = dict(fake_date, totalAmount={"subTotal": "140", "totalAmount": "170.00", "totalWithText": "x"}, total="1")
+    computed = apply_totals(record)
+    assert find_mismatches(record, computed, {"total": "totalAmount"}) == [
+        ("totalAmount.totalAmount", "170.00", "167.60"),
+        ("total", "1", "167.60"),
+    ]
+    assert find_mismatches(fake_date, apply_totals(fake_date)) == []
+
+
+def test_apply_totals_chunk_marks_only_failing_record(fake_date):
+    chunk = [
+        (0, fake_date),
+        (1, {"table": [{"unitPrice": "on"}]}),
+        (2, dict(fake_date, totalAmount={"totalVat": "1"})),
+    ]
+    warnings = []
+    results = apply_totals_chunk(chunk, warnings=warnings)
+
+    assert [index for index, _, _ in results] == [0, 1, 2]
+    assert results[0][1] == apply_totals(fake_date)
+    assert results[1][1] is None and results[1][2].startswith("ValueError:")
+    assert warnings == [(2, "totalAmount.totalVat: gönderilen 1, hesaplanan 27.60")]
@@ -0,0 +1,188 @@
+import unicodedata
+from itertools import compress
+from operator import methodcaller
+
+from layout import ROW_HEIGHT
+
+# Karakter genişlikleri em'in 1/200'ü biriminde tutulur (en geniş karakter bir bayta sığar)
+UNITS_PER_EM = 200
+
+# Tek baytlık kodlama: Türkçe karakterler (ç, ğ, ı, İ, ş) dahil her karakter bir bayt olur
+ENCODING = "cp1254"
+
+# Kolon metinleri birleştirilirken satır ayracı; genişlik tablosunda başka hiçbir karaktere verilmez
+SEPARATOR = "\0"
+SEPARATOR_UNIT = 255
+
+# Hücre iç boşluğu ve kenarlığı (`CELL_STYLE`: padding 8px, border 1px) ve satır aralığı (`line-height: 1.5`)
+CELL_PADDING = 8
+CELL_BORDER = 1
+LINE_HEIGHT = 1.5
+
+# ASCII 32..126 için karakter genişlikleri (em'in 1/1000'i; Helvetica / Times AFM değerleri)
+SANS_WIDTHS = (
+    "278 278 355 556 556 889 667 191 333 333 389 584 278 333 278 278 556 556 556 556 556 556 556 556 556 556 "
+    "278 278 584 584 584 556 1015 667 667 722 722 667 611 778 722 278 500 667 556 833 722 778 667 778 722 "
+    "667 611 722 667 944 667 667 611 278 278 278 469 556 333 556 556 500 556 556 278 556 556 222 222 500 "
+    "222 833 556 556 556 556 333 500 278 556 500 722 500 500 500 334 260 334 584"
+)
+SERIF_WIDTHS = (
+    "250 333 408 500 500 833 778 180 333 333 500 564 250 333 250 278 500 500 500 500 500 500 500 500 500 500 "
+    "278 278 564 564 564 444 921 722 667 667 722 611 556 722 722 333 389 722 611 889 722 722 556 722 667 "
+    "556 611 722 722 944 722 722 611 333 278 333 469 500 333 444 500 444 500 444 333 500 500 278 278 500 "
+    "278 778 500 500 500 500 333 389 278 500 500 722 500 500 444 480 200 480 541"
+)
+MONO_WIDTH = 600
+
+# Kalın yazı için yaklaşık genişleme (Helvetica-Bold / Times-Bold ortalaması)
+BOLD_SCALE = 1.06
+
+# Tabloda olmayan harflerin ASCII karşılığı (NFD ile ayrışmayanlar)
+BASE_LETTERS = {"ı": "i", "ß": "s", "æ": "a", "Æ": "A", "ø": "o", "Ø": "O", "œ": "o", "Œ": "O"}
+
+
+def font_kind(family):
+    """CSS font ailesini metrik tablosuna eşle: `mono`, `serif` veya `sans`"""
+    family = family.lower()
+    if "mono" in family or "courier" in family:
+        return "mono"
+    if ("serif" in family and "sans" not in family) or "times" in family or "georgia" in family:
+        return "serif"
+    return "sans"
+
+
+class FontMetrics:
+    """Bir font ailesi + kalınlık için karakter genişlik tablosu.
+
+    Genişlikler `ENCODING` baytlarına göre 256 elemanlı bir `bytes.translate`
+    tablosunda tutulur; bir metnin genişliği `encode` + `translate` + `sum`
+    ile Python döngüsü olmadan hesaplanır. Tabloda olmayan karakterler
+    (kodlanamayanlar `?` olur) ortalama harf genişliğini alır.
+    """
+
+    def __init__(self, kind, bold=False):
+        if kind == "mono":
+            ascii_widths = [MONO_WIDTH] * 95
+        else:
+            ascii_widths = [int(width) for width in (SERIF_WIDTHS if kind == "serif" else SANS_WIDTHS).split()]
+        scale = BOLD_SCALE if bold and kind != "mono" else 1.0
+        advances = {chr(32 + offset): width * scale for offset, width in enumerate(ascii_widths)}
+        average = sum(advances[char] for char in "abcdefghijklmnopqrstuvwxyz") / 26
+
+        table = bytearray(256)
+        for byte in range(256):
+            try:
+                char = bytes([byte]).decode(ENCODING)
+            except UnicodeDecodeError:
+                char = "?"
+            if char.isspace() or unicodedata.category(char) == "Cc":
+                # HTML boşlukları tek boşluğa indirir; satır sonu ve sekme de boşluk kadar yer kaplar
+                advance = advances[" "]
+            else:
+                base = BASE_LETTERS.get(char) or unicodedata.normalize("NFD", char)[0]
+                advance = advances.get(base, average)
+            table[byte] = min(round(advance * UNITS_PER_EM / 1000), SEPARATOR_UNIT - 1)
+        table[ord(SEPARATOR)] = SEPARATOR_UNIT
+
+        self.table = bytes(table)
+        self.space = self.table[ord(" ")]
+
+    def width(self, text):
+        """Metnin genişliği (em'in 1/`UNITS_PER_EM`'i biriminde)"""
+        return sum(text.encode(ENCODING, "replace").translate(self.table))
+
+    def widths(self, texts):
+        """Metin listesinin genişlikleri; tüm liste tek `encode`/`translate` ile işlenir"""
+        joined = SEPARATOR.join(texts).encode(ENCODING, "replace").translate(self.table)
+        parts = joined.split(bytes([SEPARATOR_UNIT]))
+        if len(parts) != len(texts):
+            # Metinlerde ayraç karakteri var; tek tek ölç
+            return [self.width(text) for text in texts]
+        return list(map(sum, parts))
+
+    def line_count(self, text, limit):
+        """Metnin `limit` genişliğindeki hücrede kaç satıra kaydığı (kelimeler bölünmez, CSS `normal` kaydırma)"""
+        lines = 1
+        line_width = 0
+        for word in text.split():
+            word_width = self.width(word)
+            if line_width and line_width + self.space + word_width > limit:
+                lines += 1
+                line_width = word_width
+            elif line_width:
+                line_width += self.space + word_width
+            else:
+                line_width = word_width
+        return lines
+
+
+_font_metrics = {}
+
+
+def get_font_metrics(family="sans", font_weight="normal"):
+    """Font ailesi ve kalınlığı için `FontMetrics`; tablo aile başına bir kez kurulur"""
+    key = (font_kind(family), font_weight == "bold")
+    metrics = _font_metrics.get(key)
+    if metrics is None:
+        metrics = _font_metrics[key] = FontMetrics(*key)
+    return metrics
+
+
+def table_columns(table_data, headers):
+    """Satır listesinden kolon başına metin listeleri (`RowRenderer.columns` ile aynı değerler, kaçışsız)"""
+    return [list(map(str, map(methodcaller("get", key, ""), table_data))) for key in headers]
+
+
+class TableMeasure:
+    """Bir tablonun kolon genişlikleri ve yazı bilgisinden satır yüksekliklerini tahmin eden ölçer.
+
+    Kolon genişlikleri (`width`) tablo genişliğinden kısaysa tarayıcının
+    otomatik tablo yerleşimi gibi orantılı genişletilir; hücre içeriği
+    padding ve kenarlık düşülmüş genişliğe kaydırılır. Tek satıra sığan
+    satır `ROW_HEIGHT` (34px) yüksekliğindedir, her ek satır
+    `fontSize * 1.5` ekler. Ölçüm kolon kolon yapılır: önce tüm kolonun
+    uzunlukları, sonra sadece sığmayabilecek hücrelerin toplu genişlikleri
+    hesaplanır; kelime kaydırma sadece gerçekten taşan hücrelerde çalışır.
+    """
+
+    def __init__(self, widths, table_width, font_family="sans", font_size=14, font_weight="normal"):
+        self.metrics = get_font_metrics(font_family, font_weight)
+        total = sum(widths)
+        scale = table_width / total if total and total < table_width else 1.0
+        # Hücre içerik genişlikleri font birimine çevrilir (karşılaştırmada çarpma yapılmaz)
+        self.limits = [
+            max(width * scale - 2 * CELL_PADDING - CELL_BORDER, 0) / font_size * UNITS_PER_EM
+            for width in widths
+        ]
+        self.line_height = round(font_size * LINE_HEIGHT)
+        # Bu uzunluğa kadar olan metinler en geniş karakterle bile tek satıra sığar
+        widest = max(unit for unit in self.metrics.table if unit != SEPARATOR_UNIT)
+        self.safe_lengths = [int(limit // widest) for limit in self.limits]
+
+    def extra_lines(self, columns):
+        """Satır başına ek satır sayıları; hiçbir hücre kaymıyorsa None"""
+        extra = None
+        metrics = self.metrics
+        for texts, limit, safe_length in zip(columns, self.limits, self.safe_lengths):
+            if not texts or max(map(len, texts)) <= safe_length:
+                continue
+            # Uzunluğu güvenli sınırı aşan hücrelerin genişlikleri toplu hesaplanır
+            candidates = list(compress(range(len(texts)), map(safe_length.__lt__, map(len, texts))))
+            widths = metrics.widths([texts[row] for row in candidates])
+            for row, width in zip(candidates, widths):
+                if width <= limit:
+                    continue
+                lines = metrics.line_count(texts[row], limit)
+                if lines > 1:
+                    if extra is None:
+                        extra = [0] * len(texts)
+                    extra[row] = max(extra[row], lines - 1)
+        return extra
+
+    def row_heights(self, columns):
+        """Satır yükseklikleri (px); tüm satırlar tek satırsa None (sabit `ROW_HEIGHT` modeli)"""
+        extra = self.extra_lines(columns)
+        if extra is None:
+            return None
+        line_height = self.line_height
+        return [ROW_HEIGHT + lines * line_height for lines in extra]
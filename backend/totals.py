@@ -0,0 +1,365 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from itertools import compress, repeat
+from operator import add, eq, methodcaller, mul, sub
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0")
+HUNDRED = Decimal("100")
+
+# Oran alanlarının birimi: kesir (0.2) veya yüzde (20); veriden tahmin edilmez
+RATE_UNITS = {"fraction": None, "percent": HUNDRED}
+
+# Satır alanları (tool.json `product.*`) ve eksik olduklarında kullanılan değer. tool.json'daki
+# `withholdingTaxId` bir tevkifat kodudur (oran değil); tevkifat tutarı KDV'ye uygulanacak oranla
+# (ör. 5/10 için 0.5) ayrı `withholdingRate` alanından hesaplanır, kod okunmaz
+LINE_FIELDS = {
+    "quantity": ("quantity", "1"),
+    "unit_price": ("unitPrice", "0"),
+    "discount": ("discount", "0"),
+    "excise_duty": ("exciseDuty", "0"),
+    "communication": ("communication", "0"),
+    "accommodation": ("accomodation", "0"),
+    "vat_rate": ("vatRate", "0"),
+    "withholding_rate": ("withholdingRate", "0"),
+    "stoppage": ("stoppage", "0"),
+}
+
+# tool.json `totalAmount.*` alanları
+TOTAL_KEYS = (
+    "subTotal",
+    "totalDiscount",
+    "totalStoppage",
+    "totalAccommodationTax",
+    "totalVat",
+    "totalExciseDuty",
+    "totalCommunicationTax",
+    "totalWithholdingTax",
+    "totalAmount",
+)
+
+# Tutarı yazıya çevirmek için
+ONES = ("", "Bir", "İki", "Üç", "Dört", "Beş", "Altı", "Yedi", "Sekiz", "Dokuz")
+TENS = ("", "On", "Yirmi", "Otuz", "Kırk", "Elli", "Altmış", "Yetmiş", "Seksen", "Doksan")
+SCALES = ("", "Bin", "Milyon", "Milyar", "Trilyon", "Katrilyon")
+
+_round_cent = methodcaller("quantize", CENT, ROUND_HALF_UP)
+
+
+def to_decimal(value, default=ZERO):
+    """Sayı veya metni Decimal'e çevir (float kısa gösterimiyle, `12.5` → `Decimal('12.5')`)"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, Decimal):
+        return value
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f"Sayıya çevrilemedi: {value!r}")
+
+
+def decimal_column(rows, key, default):
+    """Satırlardan bir kolonu Decimal listesi olarak çıkar.
+
+    Hızlı yolda dönüşüm `map` ile C seviyesinde yapılır; `None` veya
+    geçersiz değer varsa değer bazlı `to_decimal`'a düşülür. Kolonun tüm
+    değerleri varsayılansa (ör. hiç indirim yoksa) `None` döner ve ilgili
+    hesap atlanır.
+    """
+    values = list(map(methodcaller("get", key, default), rows))
+    if values.count(default) == len(values):
+        return None
+    try:
+        return list(map(Decimal, map(str, values)))
+    except InvalidOperation:
+        default_value = Decimal(default)
+        return [to_decimal(value, default_value) for value in values]
+
+
+def rate_column(rows, key, rate_unit="fraction"):
+    """Oran kolonu kesir olarak; `rate_unit="percent"` ise değerler (ör. 20) 100'e bölünür"""
+    if rate_unit not in RATE_UNITS:
+        raise ValueError(f"Geçersiz oran birimi: {rate_unit!r} (fraction veya percent)")
+    rates = decimal_column(rows, key, "0")
+    divisor = RATE_UNITS[rate_unit]
+    if rates is None or divisor is None:
+        return rates
+    return [rate / divisor for rate in rates]
+
+
+def amount_column(rows, key, default):
+    """Kuruşa yuvarlanmış tutar kolonu (hepsi varsayılansa `None`)"""
+    column = decimal_column(rows, key, default)
+    return None if column is None else list(map(_round_cent, column))
+
+
+def add_columns(left, right):
+    """İki kolonu topla; `None` kolon sıfır kabul edilir"""
+    if right is None:
+        return left
+    if left is None:
+        return right
+    return list(map(add, left, right))
+
+
+def compute_line_columns(rows, fields=LINE_FIELDS, rate_unit="fraction"):
+    """Satır kalemlerinden kolon bazında tutarları hesapla.
+
+    Tüm işlemler kolonlar üzerinde `map` ile yapılır, satır başına Python
+    döngüsü yoktur; tamamen boş kolonlar (`None`) hesaba katılmaz. Tutarlar
+    satır bazında kuruşa yuvarlanır (ROUND_HALF_UP). KDV matrahı = net
+    tutar + ÖTV + ÖİV; satır toplamı = matrah + KDV + konaklama vergisi.
+    """
+    size = len(rows)
+    quantity = decimal_column(rows, *fields["quantity"])
+    unit_price = decimal_column(rows, *fields["unit_price"]) or [ZERO] * size
+    discount = amount_column(rows, *fields["discount"])
+    excise_duty = amount_column(rows, *fields["excise_duty"])
+    communication = amount_column(rows, *fields["communication"])
+    accommodation = amount_column(rows, *fields["accommodation"])
+    stoppage = amount_column(rows, *fields["stoppage"])
+    vat_rate = rate_column(rows, fields["vat_rate"][0], rate_unit) or [ZERO] * size
+    withholding_rate = rate_column(rows, fields["withholding_rate"][0], rate_unit)
+
+    gross = unit_price if quantity is None else map(mul, quantity, unit_price)
+    gross = list(map(_round_cent, gross))
+    net = gross if discount is None else list(map(sub, gross, discount))
+    vat_base = add_columns(add_columns(net, excise_duty), communication)
+    vat = list(map(_round_cent, map(mul, vat_base, vat_rate)))
+    withholding = None
+    if withholding_rate is not None:
+        withholding = list(map(_round_cent, map(mul, vat, withholding_rate)))
+    line_total = add_columns(list(map(add, vat_base, vat)), accommodation)
+
+    return {
+        "gross": gross,
+        "discount": discount,
+        "excise_duty": excise_duty,
+        "communication": communication,
+        "accommodation": accommodation,
+        "stoppage": stoppage,
+        "vat_rate": vat_rate,
+        "vat_base": vat_base,
+        "vat": vat,
+        "withholding": withholding,
+        "line_total": line_total,
+        # Tüm bileşenler kuruşa yuvarlı olduğundan toplam zaten iki hanelidir
+        "line_total_text": list(map(str, line_total)),
+    }
+
+
+def summarize_columns(columns, start=0, end=None):
+    """Kolonların `[start:end)` aralığından `totalAmount.*` alanlarını ve KDV dökümünü hesapla"""
+    def total(name):
+        column = columns[name]
+        return ZERO if column is None else sum(column[start:end], ZERO)
+
+    totals = {
+        "subTotal": total("gross"),
+        "totalDiscount": total("discount"),
+        "totalStoppage": total("stoppage"),
+        "totalAccommodationTax": total("accommodation"),
+        "totalVat": total("vat"),
+        "totalExciseDuty": total("excise_duty"),
+        "totalCommunicationTax": total("communication"),
+        "totalWithholdingTax": total("withholding"),
+    }
+    totals["totalAmount"] = (
+        totals["subTotal"] - totals["totalDiscount"] + totals["totalExciseDuty"]
+        + totals["totalCommunicationTax"] + totals["totalAccommodationTax"] + totals["totalVat"]
+        - totals["totalWithholdingTax"] - totals["totalStoppage"]
+    )
+
+    # Oran bazında döküm: her farklı oran için kolonlar maskeyle süzülür
+    rates = columns["vat_rate"][start:end]
+    bases = columns["vat_base"][start:end]
+    vats = columns["vat"][start:end]
+    breakdown = []
+    for rate in sorted(set(rates)):
+        mask = list(map(eq, rates, repeat(rate)))
+        breakdown.append({
+            "rate": rate,
+            "base": sum(compress(bases, mask), ZERO),
+            "vat": sum(compress(vats, mask), ZERO),
+        })
+    return totals, breakdown
+
+
+def amount_in_words(amount, currency="TL", subunit="Kr"):
+    """Tutarı Türkçe yazıya çevir: `Decimal('167.60')` → `Yüz Altmış Yedi TL Altmış Kr`"""
+    amount = to_decimal(amount).quantize(CENT, ROUND_HALF_UP)
+    prefix = "Eksi " if amount < 0 else ""
+    amount = abs(amount)
+    lira = int(amount)
+    kurus = int((amount - lira) * 100)
+
+    text = f"{prefix}{number_in_words(lira)} {currency}"
+    if kurus:
+        text += f" {number_in_words(kurus)} {subunit}"
+    return text
+
+
+def number_in_words(number):
+    """Tam sayıyı Türkçe yazıya çevir (`1000` → `Bin`, `100` → `Yüz`)"""
+    if number == 0:
+        return "Sıfır"
+
+    words = []
+    scale = 0
+    while number:
+        number, group = divmod(number, 1000)
+        if group:
+            hundreds, rest = divmod(group, 100)
+            tens, ones = divmod(rest, 10)
+            parts = []
+            if hundreds:
+                parts.extend(["Yüz"] if hundreds == 1 else [ONES[hundreds], "Yüz"])
+            parts.extend(part for part in (TENS[tens], ONES[ones]) if part)
+            if scale == 1 and group == 1:
+                parts = []
+            if scale:
+                parts.append(SCALES[scale])
+            words[:0] = parts
+        scale += 1
+    return " ".join(words)
+
+
+def format_amount(value):
+    """Decimal tutarı iki haneli metne çevir (`Decimal('12')` → `12.00`)"""
+    return str(value.quantize(CENT, ROUND_HALF_UP))
+
+
+def format_rate(rate):
+    """Kesir oranı yüzde metnine çevir (`Decimal('0.18')` → `18`, `1` → `100`, `0` → `0`)"""
+    percent = rate * HUNDRED
+    if not percent:
+        return "0"
+    return format(percent.normalize(), "f")
+
+
+def _apply(record, rows, columns, start, end, table_key, line_total_key, aliases):
+    """Hesaplanan tutarları kaydın kopyasına yaz"""
+    totals, breakdown = summarize_columns(columns, start, end)
+
+    result = dict(record)
+    if line_total_key:
+        result[table_key] = [
+            dict(row, **{line_total_key: value})
+            for row, value in zip(rows, columns["line_total_text"][start:end])
+        ]
+
+    total_amount = {key: format_amount(totals[key]) for key in TOTAL_KEYS}
+    total_amount["totalWithText"] = amount_in_words(totals["totalAmount"])
+    result["totalAmount"] = total_amount
+    result["vatBreakdown"] = [
+        {
+            "rate": format_rate(item["rate"]),
+            "base": format_amount(item["base"]),
+            "vat": format_amount(item["vat"]),
+        }
+        for item in breakdown
+    ]
+    for target, source in (aliases or {}).items():
+        result[target] = total_amount[source]
+    return result
+
+
+def table_rows(record, table_key):
+    """Kayıttaki satır kalemleri (liste değilse boş)"""
+    rows = record.get(table_key) if isinstance(record, dict) else None
+    return rows if isinstance(rows, list) else []
+
+
+def apply_totals(record, table_key="table", line_total_key="total", aliases=None, fields=LINE_FIELDS,
+                 rate_unit="fraction"):
+    """Satır kalemlerinden toplamları hesaplayıp kaydın yeni bir kopyasını döndür.
+
+    Satırlara `line_total_key` alanı, kayda `totalAmount` (tool.json
+    `totalAmount.*` alanları, `totalWithText` dahil) ve `vatBreakdown`
+    eklenir. `aliases` düz anahtarları doldurur, ör. `{"total": "totalAmount"}`.
+    Oranlar varsayılan olarak kesirdir (0.2); yüzde (20) için `rate_unit="percent"`.
+    """
+    rows = table_rows(record, table_key)
+    columns = compute_line_columns(rows, fields, rate_unit)
+    return _apply(record, rows, columns, 0, len(rows), table_key, line_total_key, aliases)
+
+
+def apply_totals_batch(records, table_key="table", line_total_key="total", aliases=None, fields=LINE_FIELDS,
+                       rate_unit="fraction"):
+    """Çok sayıda faturanın toplamlarını tek kolon geçişinde hesapla.
+
+    Tüm faturaların satırları birleştirilip kolonlar bir kez hesaplanır;
+    fatura toplamları satır aralıkları (offset) üzerinden alınır.
+    """
+    records = list(records)
+    all_rows = []
+    offsets = [0]
+    for record in records:
+        all_rows.extend(table_rows(record, table_key))
+        offsets.append(len(all_rows))
+
+    columns = compute_line_columns(all_rows, fields, rate_unit)
+    return [
+        _apply(record, all_rows[offsets[position]:offsets[position + 1]], columns,
+               offsets[position], offsets[position + 1], table_key, line_total_key, aliases)
+        for position, record in enumerate(records)
+    ]
+
+
+def _same_amount(sent, computed):
+    """Gönderilen değer hesaplanan tutara eşit mi (sayıya çevrilemeyen değer eşit sayılmaz)"""
+    try:
+        return to_decimal(sent) == to_decimal(computed)
+    except ValueError:
+        return False
+
+
+def find_mismatches(record, computed, aliases=None):
+    """Çağıranın gönderdiği toplamları hesaplananlarla karşılaştır: (anahtar, gönderilen, hesaplanan) listesi.
+
+    Kayıttaki `totalAmount.*` alanları (`totalWithText` hariç) ve `aliases`
+    ile doldurulan düz alanlar karşılaştırılır; gönderilmeyen alanlar atlanır.
+    """
+    totals = computed["totalAmount"]
+    mismatches = []
+    sent = record.get("totalAmount")
+    if isinstance(sent, dict):
+        for key in TOTAL_KEYS:
+            if key in sent and not _same_amount(sent[key], totals[key]):
+                mismatches.append((f"totalAmount.{key}", sent[key], totals[key]))
+    for target, source in (aliases or {}).items():
+        if target in record and not _same_amount(record[target], totals[source]):
+            mismatches.append((target, record[target], totals[source]))
+    return mismatches
+
+
+def format_mismatches(mismatches):
+    """Uyuşmazlıkları tek satır uyarı metnine çevir"""
+    return "; ".join(f"{key}: gönderilen {sent}, hesaplanan {computed}" for key, sent, computed in mismatches)
+
+
+def apply_totals_chunk(chunk, options=None, warnings=None):
+    """`(sıra, kayıt)` parçasına toplamları uygula; `(sıra, kayıt, hata)` listesi döndür.
+
+    Önce tüm parça tek kolon geçişinde hesaplanır; hatalı bir kayıt varsa
+    kayıt bazında tekrar denenir ve sadece hatalı kayıt işaretlenir.
+    `warnings` bir liste ise gönderdiği toplamlar hesaplananlardan farklı
+    olan kayıtlar `(sıra, uyarı)` olarak eklenir (bkz. `find_mismatches`).
+    """
+    options = options if isinstance(options, dict) else {}
+    try:
+        records = apply_totals_batch((record for _, record in chunk), **options)
+        results = [(index, record, None) for (index, _), record in zip(chunk, records)]
+    except Exception:
+        results = []
+        for index, record in chunk:
+            try:
+                results.append((index, apply_totals(record, **options), None))
+            except Exception as error:
+                results.append((index, None, f"{type(error).__name__}: {error}"))
+    if warnings is not None:
+        for (index, record), (_, computed, error) in zip(chunk, results):
+            if error is None:
+                mismatches = find_mismatches(record, computed, options.get("aliases"))
+                if mismatches:
+                    warnings.append((index, format_mismatches(mismatches)))
+    return results